@@ -5,6 +5,12 @@ import math
 import sys
 from datetime import date
 
+#result store written by startingSimulation.py
+sys.path.append("..")
+from smartfly.resultStore import ResultStore
+resultStore = ResultStore("./GasCostsPaper/")
+from seriesStats import getSeriesStats
+
 ########## INPUT TO SCRIPT ############
 
 #Set values for different trustHp
@@ -68,27 +74,20 @@ for numberOfBlockPerLeaf in xAxisLabel :
 
     path = "./GasCostsPaper/GCF" + str(numberOfBlockPerLeaf) + endingFileNameUntrusted
     
-    f = open(path, "r")
-    dataString = f.read()
-
-    dataArray = dataString.split(" ")
+    dataArray = resultStore.get("GCF", n=numberOfBlockPerLeaf, trustHp=0)
     if len(dataArray)<math.ceil(numberOfBlocksInSimulation/numberOfBlockPerLeaf):
         print("LESS ELEMENTS in "+path)
         exit
     dataArray = dataArray[:math.ceil(numberOfBlocksInSimulation/numberOfBlockPerLeaf)]
-    sumA = 0
-
-    for data in dataArray:
-        #print(data)
-        if data != '':
-            sumA = sumA + (int(data))
+    stats = getSeriesStats(dataArray)
+    sumA = int(stats.total)
     print('Blocks per Leaf'+ str(numberOfBlockPerLeaf)+' - Sum '+ str(sumA) )
     #Add the sum of this scenario in cumulativeArray
     cumulativeArrayUntrusted = cumulativeArrayUntrusted + [sumA]
     cumulativeArrayCostEuroUntrusted = cumulativeArrayCostEuroUntrusted + [sumA * conversionGasEuro]
 
     #Perform avg calculation in this scenario 
-    avgValue = math.ceil( sumA / (len(dataArray)*numberOfBlockPerLeaf) )
+    avgValue = math.ceil( sumA / (stats.count*numberOfBlockPerLeaf) )
     avgArrayUntrusted = avgArrayUntrusted + [avgValue]
     avgArrayCostEuroUntrusted = avgArrayCostEuroUntrusted + [avgValue * conversionGasEuro ]
 
@@ -102,27 +101,20 @@ for numberOfBlockPerLeaf in xAxisLabel :
 
     path = "./GasCostsPaper/GCF" + str(numberOfBlockPerLeaf) + endingFileNameSemi
     
-    f = open(path, "r")
-    dataString = f.read()
-
-    dataArray = dataString.split(" ")
+    dataArray = resultStore.get("GCF", n=numberOfBlockPerLeaf, trustHp=1)
     if len(dataArray)<math.ceil(numberOfBlocksInSimulation/numberOfBlockPerLeaf):
         print("LESS ELEMENTS in "+path)
         exit
     dataArray = dataArray[:math.ceil(numberOfBlocksInSimulation/numberOfBlockPerLeaf)]
-    sumA = 0
-
-    for data in dataArray:
-        #print(data)
-        if data != '':
-            sumA = sumA + (int(data))
+    stats = getSeriesStats(dataArray)
+    sumA = int(stats.total)
     print('Blocks per Leaf'+ str(numberOfBlockPerLeaf)+' - Sum '+ str(sumA) )
     #Add the sum of this scenario in cumulativeArray
     cumulativeArraySemi = cumulativeArraySemi + [sumA]
     cumulativeArrayCostEuroSemi = cumulativeArrayCostEuroSemi + [sumA * conversionGasEuro]
 
     #Perform avg calculation in this scenario 
-    avgValue = math.ceil( sumA / (len(dataArray)*numberOfBlockPerLeaf) )
+    avgValue = math.ceil( sumA / (stats.count*numberOfBlockPerLeaf) )
     avgArraySemi = avgArraySemi + [avgValue]
     avgArrayCostEuroSemi = avgArrayCostEuroSemi + [avgValue * conversionGasEuro ]
 
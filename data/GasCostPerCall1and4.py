@@ -14,6 +14,11 @@ import numpy as np
 import sys
 from datetime import date
 
+#result store written by startingSimulation.py
+sys.path.append("..")
+from smartfly.resultStore import ResultStore
+resultStore = ResultStore("./GasCostsPaper/")
+
 ###### Data to change ######
 #Number of blocks produced
 numberOfCallsToTake = 32
@@ -36,28 +41,15 @@ trustHp = int(sys.argv[1])
 print("Plot for Trust Hypothesis: "+ sys.argv[1])
 #Set values for different trustHp
 if trustHp == 0:
-    endingFileName = "_exp.txt"
     saveFileName = "_untrusted"
 else:
-    endingFileName = "_semi_exp.txt"
     saveFileName = "_semi_trusted"
     
 #######################
 
-path = "./GasCostsPaper/GCF" + str(1) + endingFileName
-
-f = open(path, "r")
-dataString = f.read()
-dataArray = dataString.split(" ")
-dataArrayInteger = []
+dataArray = resultStore.get("GCF", n=1, trustHp=trustHp)
 print(dataArray)
-dataArray = dataArray[:numberOfCallsToTake]
-for data in dataArray:
-    #print(data)
-    if data != '':
-        dataArrayInteger.append(int(data))
-
-f.close()
+dataArrayInteger = dataArray[:numberOfCallsToTake].tolist()
 
 
 # 4 Blocks per Leaf Data
@@ -67,19 +59,9 @@ elems = int (numberOfCallsToTake / secondGraphBlocks)
 #Call indexes for the SC (1 call every secondGraphBlocks)
 scCalls4 = [secondGraphBlocks*(n+1) for n in range(elems)]
 
-path = "./GasCostsPaper/GCF" + str(secondGraphBlocks) + endingFileName
-f = open(path, "r")
-dataString = f.read()
-dataArray = dataString.split(" ")
-dataArrayInteger4 = []
+dataArray = resultStore.get("GCF", n=secondGraphBlocks, trustHp=trustHp)
 print(dataArray)
-dataArray = dataArray[:elems]
-for data in dataArray:
-    #print(data)
-    if data != '':
-        dataArrayInteger4.append(int(data))
-#print(dataArrayInteger)
-f.close()
+dataArrayInteger4 = dataArray[:elems].tolist()
 
 #Plot as stemlines (dotted lines starting from X axis and touching Y point)
 
@@ -8,6 +8,13 @@ import matplotlib.pyplot as plt
 import numpy as np
 import math
 from datetime import date
+import sys
+
+#result store written by proofOnly.py
+sys.path.append("..")
+from smartfly.resultStore import ResultStore
+resultStore = ResultStore("./ProofSizesPaper/")
+from seriesStats import getSeriesStats
 
 #### Label sizes ###
 fontlabel=54
@@ -27,60 +34,17 @@ maxBlocksPerLeaf = [1,8,16,64,128]
 L_size = (L-1) * 508/1000
 ####################
 
-def getMean(fileName,c,L,lamb,chainLength, blockPerLeaf):
-    #Reset the sum variable
-    sum_proof_sizes = 0
-    #Read data from file
-    path = fileName + str(blockPerLeaf) +"_c="+str(c)+"_L="+str(L)+"_lamb="+str(lamb)+"_cl="+str(chainLength)+".txt"
-    f = open(path,"r")
-    dataString = f.read()
-    #split data
-    dataArray = dataString.split(" ")
-    #reset sum 
-    samples  = len(dataArray)
-    #To take in account that the last element is empty subtract one
-    samples = samples - 1
-
-    #Perform sum (/1000 in order to get KBytes and not bytes + L in order take in account first Ls)
-    for data in dataArray:
-        if data != '':
-            sum_proof_sizes = sum_proof_sizes + (int(data)/1000) + L_size
-    mean = sum_proof_sizes / samples
-    return mean
-
-def getCI(fileName,c,L,lamb,chainLength, blockPerLeaf, mean):
-    sum_quadratic = 0
-    #confidence interval 95%
-    z = 1.96
-    sum_quadratic = 0
-    #Read data from file
-    path = fileName + str(blockPerLeaf) +"_c="+str(c)+"_L="+str(L)+"_lamb="+str(lamb)+"_cl="+str(chainLength)+".txt"
-    f = open(path,"r")
-    dataString = f.read()
-    #split data
-    dataArray = dataString.split(" ")
-    #reset sum 
-    samples  = len(dataArray)
-    #To take in account that the last element is empty subtract one
-    samples = samples - 1
-    #Perform sum (/1000 in order to get KBytes and not bytes + L in order take in account first Ls)
-    for data in dataArray:
-        if data != '':
-            sum_quadratic = sum_quadratic + (int(data)/1000 + L_size - mean)**2
-    #Calculate variance
-    variance = sum_quadratic/(samples - 1)
-    #Calculate CI and append to array
-    CI = z* math.sqrt(variance) / math.sqrt(samples)
+def getStats(c,L,lamb,chainLength, blockPerLeaf):
+    #proof sizes of the configuration from the result store: mean and CI 95%
+    #(/1000 in order to get KBytes and not bytes + L in order take in account first Ls)
+    proofSizes = resultStore.get("ProofSizeInteval", n=blockPerLeaf, c=c, L=L, lamb=lamb, cl=chainLength)
+    stats = getSeriesStats(proofSizes, scale=1/1000, offset=L_size)
 
     print("-----------------------------")
-    print(variance)
-    print(CI)
+    print(stats.variance)
+    print(stats.ci)
     print("-----------------------------")
-        
-    upper = mean + CI
-    lower = mean - CI
-
-    return upper, lower
+    return stats
 
 
 #plot styling 
@@ -94,11 +58,10 @@ for lamb in lambs[::-1]:
     lowerArray = []
     # get all values of mean, CI in different 
     for blocks in maxBlocksPerLeaf:
-        mean = getMean("./ProofSizesPaper/ProofSizeInteval_n=",c,L,lamb,ch,blocks)
-        meanArray = meanArray + [mean]
-        upperVal,lowerVal = getCI("./ProofSizesPaper/ProofSizeInteval_n=",c,L,lamb,ch, blocks, mean)
-        upperArray = upperArray + [upperVal]
-        lowerArray = lowerArray + [lowerVal]
+        stats = getStats(c,L,lamb,ch,blocks)
+        meanArray = meanArray + [stats.mean]
+        upperArray = upperArray + [stats.upper]
+        lowerArray = lowerArray + [stats.lower]
     
     print(meanArray)
     print(upperArray)
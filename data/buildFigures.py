@@ -0,0 +1,135 @@
+######################### DESCRIPTION ########################
+# Build all the paper plots with a single command.
+# Every figure script runs in its own process (in parallel) and
+# a figure is skipped when its script, its arguments, the shared
+# modules and its input data are the same of the last successful
+# build and its output is still in ./PaperPlots/.
+#
+# usage (from this directory):
+# python buildFigures.py [--force] [--jobs N] [figure names]
+##############################################################
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+#result store written by the simulation drivers
+sys.path.append("..")
+from smartfly.gridRunner import atomicWrite, formatSeconds
+
+OUTPUT_DIRECTORY = "./PaperPlots/"
+MANIFEST_PATH = "./.figureCache/figures.json"
+
+#modules imported by the figure scripts
+SHARED_MODULES = ["./seriesStats.py", "../smartfly/resultStore.py"]
+
+PROOF_SIZES = "./ProofSizesPaper/ProofSizeInteval"
+GAS_COSTS = "./GasCostsPaper/GCF"
+
+# name: script, arguments, input tables of the result store, glob of the output
+FIGURES = {
+    "proofSize-c": {"script": "ProofSize-changingC.py", "args": [], "inputs": [PROOF_SIZES],
+                    "output": "L=*-OnlyCNewChangingProofSizeComparison*.pdf"},
+    "proofSize-lambda": {"script": "ProofSize-changingLambda.py", "args": [], "inputs": [PROOF_SIZES],
+                         "output": "L=*-OnlyLambNewChangingProofSizeComparison*.pdf"},
+    "proofSize-chainLength": {"script": "ProofSize-changingChainLengthNew.py", "args": [],
+                              "inputs": [PROOF_SIZES], "output": "L=*lamb=*-NewChangingProofSizeComparison*.pdf"},
+    "gasCost-avg": {"script": "BothGasCostAnalysisEuro.py", "args": [], "inputs": [GAS_COSTS],
+                    "output": "AvgGasCost*_both.pdf"},
+    "gasCost-perCall-untrusted": {"script": "GasCostPerCall1and4.py", "args": ["0"], "inputs": [GAS_COSTS],
+                                  "output": "SingleCallGasCost1And4*_untrusted.pdf"},
+    "gasCost-perCall-semi": {"script": "GasCostPerCall1and4.py", "args": ["1"], "inputs": [GAS_COSTS],
+                             "output": "SingleCallGasCost1And4*_semi_trusted.pdf"},
+}
+
+
+def fileHash(digest, path):
+    if not os.path.exists(path):
+        digest.update(b"missing")
+        return
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+
+def figureHash(figure):
+    '''
+    Content hash of everything a figure depends on
+    '''
+    digest = hashlib.sha256()
+    digest.update(json.dumps(figure, sort_keys=True).encode())
+    for path in [figure["script"]] + SHARED_MODULES:
+        fileHash(digest, path)
+    for table in figure["inputs"]:
+        fileHash(digest, table + ".index")
+        fileHash(digest, table + ".bin")
+    return digest.hexdigest()
+
+
+def loadManifest():
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def buildFigure(name, figure):
+    '''
+    Run the script of a figure in a new process
+    @returns (name, elapsed seconds, error message or None)
+    '''
+    startTime = time.time()
+    result = subprocess.run([sys.executable, figure["script"]] + figure["args"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                            env=dict(os.environ, MPLBACKEND="Agg"))
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "exit " + str(result.returncode)
+    elif not glob.glob(OUTPUT_DIRECTORY + figure["output"]):
+        error = "no output matching " + figure["output"]
+    return name, time.time() - startTime, error
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the paper plots")
+    parser.add_argument("figures", nargs="*", help="figures to build (default: all) - " + ", ".join(FIGURES))
+    parser.add_argument("--force", action="store_true", help="build also the figures not changed")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="parallel processes")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.figures if name not in FIGURES]
+    if unknown:
+        parser.error("unknown figures: " + ", ".join(unknown))
+    os.makedirs(OUTPUT_DIRECTORY, exist_ok=True)
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+
+    manifest = loadManifest()
+    hashes = {}
+    todo = []
+    for name in args.figures or list(FIGURES):
+        figure = FIGURES[name]
+        hashes[name] = figureHash(figure)
+        upToDate = manifest.get(name) == hashes[name] and glob.glob(OUTPUT_DIRECTORY + figure["output"])
+        if upToDate and not args.force:
+            print("[skip] " + name + " (not changed)")
+        else:
+            todo.append(name)
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for name, elapsed, error in pool.map(lambda name: buildFigure(name, FIGURES[name]), todo):
+            if error is None:
+                manifest[name] = hashes[name]
+                print("[done] " + name + " - " + formatSeconds(elapsed))
+            else:
+                manifest.pop(name, None)
+                failed.append(name)
+                print("[FAILED] " + name + ": " + error)
+    atomicWrite(MANIFEST_PATH, json.dumps(manifest, indent=1, sort_keys=True))
+    sys.exit(1 if failed else 0)
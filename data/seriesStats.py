@@ -0,0 +1,108 @@
+######################### DESCRIPTION ########################
+# Statistics of a series of samples (proof sizes, gas costs)
+# shared by the plot scripts: mean, variance and 95% CI in a
+# single streaming pass (Welford, merged chunk by chunk) and,
+# optionally, a bootstrap CI of the mean.
+##############################################################
+
+import math
+from collections import namedtuple
+
+import numpy as np
+
+#confidence interval 95%
+Z_95 = 1.96
+#samples processed at once in the streaming pass
+CHUNK_SIZE = 1 << 16
+
+SeriesStats = namedtuple("SeriesStats", ["count", "total", "mean", "variance", "ci", "lower", "upper"])
+
+
+def welford(samples, chunkSize=CHUNK_SIZE):
+    '''
+    Single pass over samples (array or iterable of arrays/numbers)
+    returns count, total, mean, M2 (sum of the squared deviations from the mean)
+    '''
+    count = 0
+    total = 0
+    mean = 0.0
+    m2 = 0.0
+    for chunk in iterChunks(samples, chunkSize):
+        chunkCount = len(chunk)
+        if chunkCount == 0:
+            continue
+        chunkMean = chunk.mean()
+        chunkM2 = ((chunk - chunkMean)**2).sum()
+        #merge of two partial results (Chan et al.)
+        delta = chunkMean - mean
+        newCount = count + chunkCount
+        mean = mean + delta*chunkCount/newCount
+        m2 = m2 + chunkM2 + delta**2*count*chunkCount/newCount
+        count = newCount
+        total = total + chunk.sum()
+    return count, total, mean, m2
+
+
+def iterChunks(samples, chunkSize):
+    if isinstance(samples, np.ndarray):
+        for start in range(0, len(samples), chunkSize):
+            yield samples[start:start + chunkSize]
+        return
+    buffer = []
+    for sample in samples:
+        if isinstance(sample, np.ndarray):
+            yield sample
+            continue
+        buffer.append(sample)
+        if len(buffer) == chunkSize:
+            yield np.array(buffer)
+            buffer = []
+    if buffer:
+        yield np.array(buffer)
+
+
+def getSeriesStats(samples, scale=1, offset=0, z=Z_95, bootstrap=0, seed=0):
+    '''
+    @param samples array (or iterable) of samples
+    @param scale, offset every sample is used as sample*scale + offset
+        (e.g. scale=1/1000 to get KBytes, offset=L_size for the first L blocks)
+    @param z quantile of the CI (1.96: 95%)
+    @param bootstrap if > 0 number of bootstrap resamples used for the CI of the mean
+        instead of the normal approximation
+    @param seed seed of the bootstrap resamples
+    @returns SeriesStats(count, total, mean, variance, ci, lower, upper) of the scaled samples
+        (total is the sum of the original samples)
+    '''
+    if bootstrap > 0 and not isinstance(samples, np.ndarray):
+        #the samples are read twice
+        samples = np.concatenate([chunk for chunk in iterChunks(samples, CHUNK_SIZE)])
+    count, total, mean, m2 = welford(samples)
+    if count == 0:
+        raise ValueError("empty series")
+    mean = mean*scale + offset
+    variance = m2*scale**2/(count - 1) if count > 1 else 0.0
+    if bootstrap > 0:
+        lower, upper = bootstrapCI(samples, bootstrap, z, seed)
+        lower = lower*scale + offset
+        upper = upper*scale + offset
+        ci = (upper - lower)/2
+    else:
+        ci = z*math.sqrt(variance)/math.sqrt(count)
+        lower = mean - ci
+        upper = mean + ci
+    if isinstance(total, np.generic):
+        total = total.item()
+    return SeriesStats(count, total, float(mean), float(variance), float(ci), float(lower), float(upper))
+
+
+def bootstrapCI(samples, resamples, z=Z_95, seed=0):
+    '''
+    Percentile bootstrap CI of the mean (all the resamples drawn at once)
+    '''
+    samples = np.asarray(samples)
+    rng = np.random.default_rng(seed)
+    means = samples[rng.integers(0, len(samples), (resamples, len(samples)))].mean(axis=1)
+    #two-sided coverage of the normal quantile z
+    coverage = math.erf(z/math.sqrt(2))
+    lower, upper = np.quantile(means, [(1 - coverage)/2, (1 + coverage)/2])
+    return lower, upper
@@ -0,0 +1,61 @@
+//Benchmarks of the JS prover hot paths, driven by smartfly/benchmarks.py
+//usage: node ./js/DataModule/Benchmark.js <numberOfLeafs,...> <proofSamples> <simulation points> <experiments>
+//  simulation points: numberOfBlocksPerLeaf:c:L:lambda:chainLength,...
+//  experiments: simulations (seeds 0..experiments-1) timed for every point, as in proofOnly.py
+//The results are printed as JSON on the last line: {name: {value:, unit:, higherIsBetter:}}
+const Prover = require('../Prover Module/Prover');
+const DifficultyMMRTree = require('../Prover Module/DifficultyMMR');
+const DifficultyNode = require('../Prover Module/DifficultyNode');
+
+function seconds(start){
+    return Number(process.hrtime.bigint() - start) / 1e9;
+}
+
+function newLeaf(i){
+    let leaf = new DifficultyNode();
+    leaf.setValues('0x' + (i + 1).toString(16).padStart(64, '0'), 1600000000 + 13 * i, 1600000000 + 13 * i + 26,
+                   1, 1, 3, 3);
+    return leaf;
+}
+
+let args = process.argv
+let sizes = args[2].split(',').map((size) => parseInt(Number(size)));
+let proofSamples = parseInt(args[3]);
+let simulationPoints = args[4] != undefined && args[4] != '' ? args[4].split(',') : [];
+let experiments = args[5] != undefined ? parseInt(args[5]) : 1;
+let results = {};
+
+for(let size of sizes){
+    //append throughput
+    let mmr = new DifficultyMMRTree([[]]);
+    let start = process.hrtime.bigint();
+    for(let i = 0; i < size; i++){
+        mmr.addLeaf(newLeaf(i));
+    }
+    mmr.getRoot();
+    results['js.mmrAppend[n=' + size + ']'] = {value: size / seconds(start), unit: 'leafs/s', higherIsBetter: true};
+
+    //proof latency of random leafs
+    start = process.hrtime.bigint();
+    for(let i = 0; i < proofSamples; i++){
+        mmr.getLeafProof(Math.floor(Math.random() * size), 0);
+    }
+    results['js.leafProof[n=' + size + ']'] = {value: seconds(start) / proofSamples * 1e6, unit: 'us', higherIsBetter: false};
+}
+
+//Prover.generateProofSimulation of the experiments of a grid point (dummy MMR filled once)
+let prover = new Prover(null);
+let log = console.log;
+for(let point of simulationPoints){
+    let [numberOfBlocksPerLeaf, c, L, lambda, chainLength] = point.split(':');
+    console.log = () => {};
+    prover.fillDummyMMR(parseInt(numberOfBlocksPerLeaf), parseInt(chainLength));
+    let start = process.hrtime.bigint();
+    for(let seed = 0; seed < experiments; seed++){
+        prover.generateProofSimulation(parseInt(numberOfBlocksPerLeaf), c, parseInt(L), parseInt(lambda), parseInt(chainLength), seed);
+    }
+    let elapsed = seconds(start);
+    console.log = log;
+    results['js.proofSimulation[' + point + ']'] = {value: elapsed * 1e3, unit: 'ms', higherIsBetter: false};
+}
+console.log(JSON.stringify(results));
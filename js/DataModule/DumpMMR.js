@@ -0,0 +1,44 @@
+/**
+ * Build a DifficultyMMRTree from the leaves in a fixture file and dump
+ * the root, the number of nodes of each level and the proof of every leaf.
+ * Used by mmrCrossCheck.py to compare the JS tree with the Python one.
+ *
+ * usage: node ./js/DataModule/DumpMMR.js <fixtureFile> <outputFile>
+ * fixture format: {fixtures: [{name:, leafs: [<DifficultyNode tuple>, ...]}, ...]}
+ */
+const DifficultyMMRTree = require('../Prover Module/DifficultyMMR');
+const DifficultyNode = require('../Prover Module/DifficultyNode');
+const fs = require('fs');
+
+let args = process.argv
+let fixtureFile = args[2]
+let outputFile = args[3]
+
+function nodeToJSON(node){
+    return {node: node.toTuple(), hash: node.getKeccak256()}
+}
+
+let fixtures = JSON.parse(fs.readFileSync(fixtureFile))['fixtures'];
+let results = []
+
+for(let fixture of fixtures){
+    let mmr = new DifficultyMMRTree([[]]);
+    for(let tuple of fixture.leafs){
+        //setValues avoids the constructor (it copies nodeDifficulty in numberOfBlocksCoverd)
+        let leaf = new DifficultyNode();
+        leaf.setValues(...tuple);
+        mmr.addLeaf(leaf);
+    }
+    let proofs = []
+    for(let i = 0; i <= mmr.getLastLeafIndex(); i++){
+        proofs.push(mmr.getLeafProof(i, 0).map(nodeToJSON));
+    }
+    results.push({
+        name: fixture.name,
+        root: nodeToJSON(mmr.getRoot()),
+        numberOfNodesEachLevel: mmr.getNumberOfNodesEachLevel(),
+        proofs: proofs
+    })
+}
+
+fs.writeFileSync(outputFile, JSON.stringify({results: results}));
@@ -9,6 +9,8 @@ const fs = require('fs');
         let trustHp = parseInt(args[3])
         //8 hours of simulation (15 sec per block)
         let totalNumberOfBlocks = parseInt(args[4])
+        //directory where the gas costs are appended (optional)
+        let outputDirectory = args[5] != undefined ? args[5] : './data/GasCostsPaper/'
 
         let prover = new Prover();
 
@@ -32,12 +34,12 @@ const fs = require('fs');
                 // TESTING - in order to have a different timestamp every time (for 1 block per leaf scenario)
                 //////////////////////////////////
                 if(trustHp == 0){
-                    fs.appendFile('./data/GasCostsPaper/GCF' + numberOfBlockPerUpdate + '_exp.txt', (await prover.updateUntrusted(numberOfBlockPerUpdate, numberOfBlockPerUpdate)).gasUsed + " ", function (err) {
+                    fs.appendFile(outputDirectory + 'GCF' + numberOfBlockPerUpdate + '_exp.txt', (await prover.updateUntrusted(numberOfBlockPerUpdate, numberOfBlockPerUpdate)).gasUsed + " ", function (err) {
                             if (err) throw err;
                             console.log('Saved!');
                     }); 
                 } else{
-                    fs.appendFile('./data/GasCostsPaper/GCF' + numberOfBlockPerUpdate + '_semi_exp.txt', (await prover.updatePartiallyTrusted(numberOfBlockPerUpdate, numberOfBlockPerUpdate)).gasUsed + " ", function (err) {
+                    fs.appendFile(outputDirectory + 'GCF' + numberOfBlockPerUpdate + '_semi_exp.txt', (await prover.updatePartiallyTrusted(numberOfBlockPerUpdate, numberOfBlockPerUpdate)).gasUsed + " ", function (err) {
                         if (err) throw err;
                         console.log('Saved!');
                 }); 
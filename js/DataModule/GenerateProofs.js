@@ -14,6 +14,8 @@ const fs = require('fs');
     let chainLength = parseInt(args[6]);
     //number of experiments
     let expNumber = parseInt(args[7]);
+    //directory where the proof sizes are appended (optional)
+    let outputDirectory = args[8] != undefined ? args[8] : './data/ProofSizesPaper/';
 
     let prover = new Prover();
     //not needed to initialize block manger since ths proof size is
@@ -32,14 +34,14 @@ const fs = require('fs');
         proofSizeWithDuplicates = proofResponse.proofSizeWithDuplicates;
 
         console.log("Recorded proof size =" + proofSizeNoDuplicates)
-        fs.appendFileSync('./data/ProofSizesPaper/ProofSizeInteval_n=' + numberOfBlockPerUpdate +'_c='+ c +"_L="+ L + "_lamb="+ lambda + "_cl="+ chainLength+ '.txt',
+        fs.appendFileSync(outputDirectory + 'ProofSizeInteval_n=' + numberOfBlockPerUpdate +'_c='+ c +"_L="+ L + "_lamb="+ lambda + "_cl="+ chainLength+ '.txt',
           (proofSizeNoDuplicates+" ")  ,
            function (err) {
             if (err) throw err;
             console.log('Saved!');
         }); 
 
-        fs.appendFileSync('./data/ProofSizesPaper/DuplicatesProofSizeInteval_n=' + numberOfBlockPerUpdate +'_c='+ c +"_L="+ L + "_lamb="+ lambda + "_cl="+ chainLength+ '.txt',
+        fs.appendFileSync(outputDirectory + 'DuplicatesProofSizeInteval_n=' + numberOfBlockPerUpdate +'_c='+ c +"_L="+ L + "_lamb="+ lambda + "_cl="+ chainLength+ '.txt',
         (proofSizeWithDuplicates+" ")  ,
          function (err) {
           if (err) throw err;
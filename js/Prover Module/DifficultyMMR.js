@@ -20,6 +20,9 @@ class DifficultyMMRTree{
         //the information of the levels of the MMR having an
         //an odd number of DifficultyNodes
         this.levels_odd_elements = levels_odd_elements;
+        //peak level -> proof positions above the peak (bagging of the peaks): the same for all
+        //the leaves of the peak, emptied by every new leaf (not enumerable so it is not serialized)
+        Object.defineProperty(this, 'baggingPositionsCache', {value: new Map(), writable: true, enumerable: false});
     }
 
     // ********************** GET TREE INFORMATION **********************************
@@ -54,7 +57,7 @@ class DifficultyMMRTree{
      */
      getLeafIndex(hashed_value){
         for(var i = 0; i < this.tree[0].length; i++){
-            if(this.tree[0][i].getPeak() == hashed_value)
+            if(this.tree[0][i].peak == hashed_value)
                 return i;
         }
         return -1;
@@ -128,8 +131,9 @@ class DifficultyMMRTree{
             //multiplied by the relative difficulty
             var requestedDifficulty = Math.floor(totalDifficulty * relativeDifficulty);
 
-            //find the index that is closer to the requested Difficulty
-            var indexOfElement = this.binarySearchClosest(this.leafInfoArray, requestedDifficulty);
+            //find the leaf whose cumulative difficulty range contains the requested Difficulty
+            //(the rule checked by the verifier, see coversDifficulty in smartfly/verifier.py)
+            var indexOfElement = this.searchCoveringLeaf(this.leafInfoArray, requestedDifficulty);
             //return the lead index
             return indexOfElement;
         }
@@ -178,6 +182,7 @@ class DifficultyMMRTree{
         }
         // Now the levels_odd_elements can be set to empty
         this.levels_odd_elements = [];
+        this.baggingPositionsCache.clear();
     }
 
 
@@ -312,7 +317,76 @@ class DifficultyMMRTree{
      * @returns all DifficultyNodes of the proof
      */
     getLeafProof(leaf_index, level = 0){
-        //array of DifficultyNodes that will be used for MMR Proof
+        return this.getLeafProofPositions(leaf_index, level).map(
+            (position) => this.tree[position[0]][position[1]]);
+    }
+
+    /**
+     * Positions in the tree of the nodes of a leaf proof
+     * (the proofs of different leaves share the nodes with the same position).
+     * The proof of a leaf is made of:
+     *  - the siblings inside the perfect subtree of its peak: they never change
+     *    and their positions follow from the leaf index
+     *  - the nodes bagging its peak with the other peaks: the same for all the leaves
+     *    of the peak, computed once after every new leaf (baggingPositionsCache)
+     * @param {*} leaf_index - index of the leaf of which the proof is requested 
+     * @param {*} level (in future update - for now all the proof is provided)
+     * @returns array of [level, index] in the same order of getLeafProof
+     */
+    getLeafProofPositions(leaf_index, level = 0){
+        if(level != 0 || !(Number.isInteger(leaf_index) && leaf_index >= 0 && leaf_index < this.tree[0].length))
+            return this.getProofPositionsFromLevel(leaf_index, level);
+        let peakLevel = this.getLeafPeakLevel(leaf_index);
+        return this.getSubtreeProofPositions(leaf_index, 0, peakLevel).concat(this.getBaggingProofPositions(peakLevel));
+    }
+
+    /**
+     * @param {*} leaf_index - index of a leaf in the tree
+     * @returns level of the peak covering the leaf: highest bit in which the
+     * leaf index and the number of leaves differ
+     */
+    getLeafPeakLevel(leaf_index){
+        return 31 - Math.clz32(leaf_index ^ this.tree[0].length);
+    }
+
+    /**
+     * Positions of the siblings of a leaf inside the perfect subtree of its peak (they never change)
+     * @param {*} leaf_index - index of the leaf
+     * @param {*} fromLevel - first level of the siblings returned
+     * @param {*} peakLevel - level of the peak (getLeafPeakLevel)
+     * @returns array of [level, index] from fromLevel to peakLevel - 1
+     */
+    getSubtreeProofPositions(leaf_index, fromLevel, peakLevel){
+        let proof_nodes = [];
+        for(let i = fromLevel; i < peakLevel; i++){
+            proof_nodes.push([i, Math.floor(leaf_index / 2 ** i) ^ 1]);
+        }
+        return proof_nodes;
+    }
+
+    /**
+     * Positions of the nodes bagging the peak at peakLevel with the other peaks (the last part
+     * of the proof of all the leaves of the peak), computed once after every new leaf
+     * @param {*} peakLevel - level of a peak of the tree
+     * @returns array of [level, index] (not to be modified, it is shared by the proofs)
+     */
+    getBaggingProofPositions(peakLevel){
+        let baggingPositions = this.baggingPositionsCache.get(peakLevel);
+        if(baggingPositions == undefined){
+            baggingPositions = this.getProofPositionsFromLevel(Math.floor(this.tree[0].length / 2 ** peakLevel) - 1, peakLevel);
+            this.baggingPositionsCache.set(peakLevel, baggingPositions);
+        }
+        return baggingPositions;
+    }
+
+    /**
+     * Positions of the proof of a node walking the tree from its level to the root
+     * @param {*} leaf_index - index of the node in its level
+     * @param {*} level - level of the node
+     * @returns array of [level, index] (see getLeafProofPositions)
+     */
+    getProofPositionsFromLevel(leaf_index, level){
+        //array of positions of the DifficultyNodes that will be used for MMR Proof
         let proof_nodes = []
         let level_info = 0;
         //check if the leaf index exists
@@ -331,7 +405,7 @@ class DifficultyMMRTree{
                 //check if the element on its right exists 
                 if(this.tree[i][leaf_index+1]!=undefined && this.tree[i][leaf_index+1]!=null){
                     //if exists it is part of the proof
-                    proof_nodes.push(this.tree[i][leaf_index+1])
+                    proof_nodes.push([i, leaf_index+1])
                 }
                 else{
                     //if doesn't exits this node has been hashed with
@@ -346,7 +420,7 @@ class DifficultyMMRTree{
                         level_info = this.levels_odd_elements.indexOf(i) - 1;
                     
                     //push in the proof the last node of the previous/next odd level
-                    proof_nodes.push(this.tree[this.levels_odd_elements[level_info]][this.tree[this.levels_odd_elements[level_info]].length - 1])
+                    proof_nodes.push([this.levels_odd_elements[level_info], this.tree[this.levels_odd_elements[level_info]].length - 1])
                 }
             }
 
@@ -354,7 +428,7 @@ class DifficultyMMRTree{
             if(leaf_index % 2 == 1){
 
                 if(this.tree[i][leaf_index-1]!=undefined){
-                    proof_nodes.push(this.tree[i][leaf_index-1])
+                    proof_nodes.push([i, leaf_index-1])
                 }
                 //this code can be useful?
                 /*else{
@@ -371,11 +445,32 @@ class DifficultyMMRTree{
         return proof_nodes;
     }
 
+    /**
+     * The leaf i covers the cumulative difficulties [arr[i-1], arr[i]) (arr[-1] = 0)
+     * @param {*} arr cumulative difficulties of the leafs (leafInfoArray)
+     * @param {*} val requested difficulty
+     * @returns index of the first leaf with arr[i] > val (the last leaf if val >= total difficulty)
+     */
+    searchCoveringLeaf(arr, val) {
+        let start = 0;
+        let end = arr.length - 1;
+        while (start < end) {
+          let mid = Math.floor((start + end) / 2);
+          if (arr[mid] > val) {
+            end = mid;
+          } else {
+            start = mid + 1;
+          }
+        }
+        return start;
+      }
+
     /**
      * Perform a binary search on arr with val
      * @param {*} arr array to check 
      * @param {*} val value to find in array
      * @returns index of position closest to specified value
+     * (search of the proof simulations: SyntheticDifficultyMMR, smartfly/proofSimulation.py)
      */
     binarySearchClosest(arr, val) {
         let start = 0;
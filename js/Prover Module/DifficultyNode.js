@@ -5,6 +5,34 @@ const Web3 = require('web3');
 //default one provider must be set
 const web3 = new Web3('http://127.0.0.1:7100');
 
+//bits of the uint fields of the SC node encoding:
+//abi.encode(bytes32 peak, uint64 tFirstBlock, uint64 tLastBlock, uint64 dFirstBlock, uint64 dLastBlock,
+//           uint128 nodeDifficulty, uint128 numberOfBlocksCoverd)
+const NODE_UINT_BITS = [64, 64, 64, 64, 128, 128];
+
+/**
+ * ABI encoding of a static uint (one 32 bytes word, big endian)
+ * @returns hex string of 64 characters without '0x'
+ */
+function packUint(value, bits){
+    let number = BigInt(value);
+    if(number < 0n || number >= (1n << BigInt(bits))){
+        throw new Error("Value " + value + " out of range for uint" + bits);
+    }
+    return number.toString(16).padStart(64, '0');
+}
+
+/**
+ * ABI encoding of a bytes32 (hex string of 64 characters without '0x')
+ */
+function packBytes32(value){
+    let hex = value.slice(0, 2) == '0x' ? value.slice(2) : value;
+    if(hex.length > 64){
+        throw new Error("Value " + value + " longer than bytes32");
+    }
+    return hex.padEnd(64, '0');
+}
+
 class DifficultyNode {
 
     /**
@@ -28,6 +56,8 @@ class DifficultyNode {
         this.dLastBlock = JSONDNode.dLastBlock;
         this.nodeDifficulty = JSONDNode.nodeDifficulty;
         this.numberOfBlocksCoverd = JSONDNode.nodeDifficulty;
+        //digest of the node (getKeccak256), not enumerable so it is not serialized
+        Object.defineProperty(this, 'keccak256', {value: null, writable: true, enumerable: false});
     }
 
     /**
@@ -48,6 +78,7 @@ class DifficultyNode {
         this.dLastBlock = dLastBlock
         this.nodeDifficulty = nodeDifficulty
         this.numberOfBlocksCoverd = numberOfBlocksCoverd
+        this.keccak256 = null;
     }
 
     /**
@@ -59,15 +90,8 @@ class DifficultyNode {
     mergeNodes(nodeRight){
         let mergedLeaf = new DifficultyNode();
         //Tested 
-        var encoded = web3.eth.abi.encodeParameters(
-                ['bytes32', 
-                 'bytes32'],            
-                [//left node
-                 this.getKeccak256(),
-                 //right node
-                 nodeRight.getKeccak256()
-                ]
-            )
+        //abi.encode(bytes32 left, bytes32 right): the two digests one after the other
+        var encoded = this.getKeccak256() + nodeRight.getKeccak256().slice(2);
         
         //get the same hash that the SC performs 
         var hash = web3.utils.keccak256(encoded);//web3.utils.sha3(this.getKeccak256() + nodeRight.getKeccak256())
@@ -112,21 +136,21 @@ class DifficultyNode {
     }
 
     /**
-     * 
+     * The digest is computed once: the nodes are not modified after their creation
+     * (setValues and fromArrayToMMRNode reset it)
      * @returns single node hashed as the SC does
      */
     getKeccak256(){
-        //console.log(this)
-        var encoded = web3.eth.abi.encodeParameters(
-            ['bytes32', 'uint64', 'uint64', 'uint64', 'uint64', 'uint128', 'uint128' ],
-            [this.peak , this.tFirstBlock, this.tLastBlock,
-                (this.dFirstBlock == '0' ? 0 : this.dFirstBlock ),
-                (this.dLastBlock == '0'  ? 0 : this.dLastBlock ),
-                this.nodeDifficulty, this.numberOfBlocksCoverd]
-            )
-        var hash = web3.utils.keccak256(encoded)
-        //console.log(hash)
-        return hash;
+        if(this.keccak256 == null){
+            let values = [this.tFirstBlock, this.tLastBlock, this.dFirstBlock, this.dLastBlock,
+                          this.nodeDifficulty, this.numberOfBlocksCoverd];
+            let encoded = '0x' + packBytes32(this.peak);
+            for(let i = 0; i < values.length; i++){
+                encoded += packUint(values[i], NODE_UINT_BITS[i]);
+            }
+            this.keccak256 = web3.utils.keccak256(encoded);
+        }
+        return this.keccak256;
     }
 
     /**
@@ -145,6 +169,7 @@ class DifficultyNode {
         this.dLastBlock = parseInt(tuple[4]);
         this.nodeDifficulty = parseInt(tuple[5]);
         this.numberOfBlocksCoverd = parseInt(tuple[6]);
+        this.keccak256 = null;
     }
 }
 
@@ -0,0 +1,69 @@
+/**
+ * Bounded Least Recently Used cache.
+ * A Map keeps the insertion order: every hit moves the key at the end,
+ * so when the cache is full the first key is the least recently used one.
+ */
+class LRUCache{
+
+    /**
+     * @param {*} maxSize maximum number of entries kept
+     */
+    constructor(maxSize){
+        this.maxSize = maxSize;
+        this.entries = new Map();
+        //lookups of get (hit rate of the cache)
+        this.hits = 0;
+        this.misses = 0;
+    }
+
+    /**
+     * @returns the value of key or undefined if not in the cache
+     */
+    get(key){
+        if(!this.entries.has(key)){
+            this.misses++;
+            return undefined;
+        }
+        this.hits++;
+        let value = this.entries.get(key);
+        this.entries.delete(key);
+        this.entries.set(key, value);
+        return value;
+    }
+
+    /**
+     * Lookup that leaves the order of use and the hit rate unchanged
+     * @returns the value of key or undefined if not in the cache
+     */
+    peek(key){
+        return this.entries.get(key);
+    }
+
+    set(key, value){
+        if(this.maxSize <= 0)
+            return;
+        this.entries.delete(key);
+        this.entries.set(key, value);
+        if(this.entries.size > this.maxSize){
+            this.entries.delete(this.entries.keys().next().value);
+        }
+    }
+
+    has(key){
+        return this.entries.has(key);
+    }
+
+    delete(key){
+        return this.entries.delete(key);
+    }
+
+    clear(){
+        this.entries.clear();
+    }
+
+    get size(){
+        return this.entries.size;
+    }
+}
+
+module.exports = LRUCache
@@ -0,0 +1,192 @@
+/**
+ * Counters and latency histograms of the Prover hot paths (served by restServer.js on /metrics).
+ * Recording a value costs a few comparisons and additions, so the metrics are always on;
+ * the per-request stage timing (Trace) is created only for the traced requests.
+ */
+const { monitorEventLoopDelay } = require('perf_hooks');
+
+//upper bounds of the histogram buckets (milliseconds), the last bucket has no bound
+const BUCKETS_MS = [0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+
+function elapsedMs(start){
+    return Number(process.hrtime.bigint() - start) / 1e6;
+}
+
+class Histogram{
+
+    constructor(){
+        this.counts = new Array(BUCKETS_MS.length + 1).fill(0);
+        this.count = 0;
+        this.sum = 0;
+        this.max = 0;
+    }
+
+    observe(ms){
+        let bucket = 0;
+        while(bucket < BUCKETS_MS.length && ms > BUCKETS_MS[bucket])
+            bucket++;
+        this.counts[bucket]++;
+        this.count++;
+        this.sum += ms;
+        if(ms > this.max)
+            this.max = ms;
+    }
+
+    /**
+     * @returns upper bound of the bucket containing the quantile q (max for the last bucket)
+     */
+    quantile(q){
+        let rank = q * this.count;
+        let seen = 0;
+        for(let i = 0; i < BUCKETS_MS.length; i++){
+            seen += this.counts[i];
+            if(seen >= rank)
+                return Math.min(BUCKETS_MS[i], this.max);
+        }
+        return this.max;
+    }
+
+    toJSON(){
+        let buckets = {};
+        for(let i = 0; i < this.counts.length; i++){
+            buckets[i < BUCKETS_MS.length ? BUCKETS_MS[i] : '+Inf'] = this.counts[i];
+        }
+        return {count: this.count, meanMs: this.count > 0 ? this.sum / this.count : 0, maxMs: this.max,
+                p50Ms: this.quantile(0.5), p95Ms: this.quantile(0.95), p99Ms: this.quantile(0.99), buckets: buckets};
+    }
+}
+
+/**
+ * Stage timing of a single request: every mark closes the stage started by the previous one.
+ * The stages are sent back in the Server-Timing header and added to the stage histograms.
+ */
+class Trace{
+
+    constructor(){
+        this.start = process.hrtime.bigint();
+        this.last = this.start;
+        this.stages = [];
+    }
+
+    mark(stage){
+        let now = process.hrtime.bigint();
+        this.stages.push([stage, Number(now - this.last) / 1e6]);
+        this.last = now;
+    }
+
+    /**
+     * @returns value of the Server-Timing header (stages and total, milliseconds)
+     */
+    serverTiming(){
+        let timings = this.stages.map(([stage, ms]) => stage + ';dur=' + ms.toFixed(3));
+        timings.push('total;dur=' + elapsedMs(this.start).toFixed(3));
+        return timings.join(', ');
+    }
+}
+
+class Metrics{
+
+    constructor(){
+        this.startTime = Date.now();
+        //route path -> Histogram of the response times
+        this.routes = new Map();
+        //RPC method -> {latency: Histogram, errors:}
+        this.rpc = new Map();
+        //name -> Histogram of the internal operations (e.g. receipt trie builds)
+        this.operations = new Map();
+        //proof stage -> Histogram of the traced requests
+        this.stages = new Map();
+        //name -> LRUCache (hits and misses counted by the cache)
+        this.caches = new Map();
+        //name -> WorkerPool (see WorkerPool.toJSON)
+        this.workerPools = new Map();
+        this.eventLoopDelay = null;
+    }
+
+    static histogram(map, name){
+        let histogram = map.get(name);
+        if(histogram == undefined){
+            histogram = new Histogram();
+            map.set(name, histogram);
+        }
+        return histogram;
+    }
+
+    observeRoute(route, ms){
+        Metrics.histogram(this.routes, route).observe(ms);
+    }
+
+    observeOperation(name, ms){
+        Metrics.histogram(this.operations, name).observe(ms);
+    }
+
+    observeTrace(trace){
+        for(let [stage, ms] of trace.stages){
+            Metrics.histogram(this.stages, stage).observe(ms);
+        }
+    }
+
+    /**
+     * Time a JSON-RPC round trip
+     * @param {*} method name of the RPC method (e.g. eth_getTransactionReceipt)
+     * @param {*} promise promise of the call
+     * @returns the same promise
+     */
+    timeRpc(method, promise){
+        let start = process.hrtime.bigint();
+        let entry = this.rpc.get(method);
+        if(entry == undefined){
+            entry = {latency: new Histogram(), errors: 0};
+            this.rpc.set(method, entry);
+        }
+        promise.then(() => entry.latency.observe(elapsedMs(start)),
+                     () => { entry.latency.observe(elapsedMs(start)); entry.errors++; });
+        return promise;
+    }
+
+    registerCache(name, cache){
+        this.caches.set(name, cache);
+    }
+
+    registerWorkerPool(name, pool){
+        this.workerPools.set(name, pool);
+    }
+
+    /**
+     * Sample the event loop delay (a blocked loop delays every request)
+     */
+    monitorEventLoop(){
+        if(this.eventLoopDelay == null){
+            this.eventLoopDelay = monitorEventLoopDelay({resolution: 10});
+            this.eventLoopDelay.enable();
+        }
+    }
+
+    toJSON(){
+        const mapToJSON = (map, toJSON) => {
+            let object = {};
+            for(let [name, value] of map){
+                object[name] = toJSON(value);
+            }
+            return object;
+        }
+        let caches = mapToJSON(this.caches, (cache) => ({
+            size: cache.size, maxSize: cache.maxSize, hits: cache.hits, misses: cache.misses,
+            hitRate: cache.hits + cache.misses > 0 ? cache.hits / (cache.hits + cache.misses) : null}));
+        let eventLoop = null;
+        if(this.eventLoopDelay != null){
+            eventLoop = {meanMs: this.eventLoopDelay.mean / 1e6, p99Ms: this.eventLoopDelay.percentile(99) / 1e6,
+                         maxMs: this.eventLoopDelay.max / 1e6};
+        }
+        return {uptimeSeconds: (Date.now() - this.startTime) / 1000,
+                routes: mapToJSON(this.routes, (histogram) => histogram.toJSON()),
+                rpc: mapToJSON(this.rpc, (entry) => Object.assign({errors: entry.errors}, entry.latency.toJSON())),
+                operations: mapToJSON(this.operations, (histogram) => histogram.toJSON()),
+                proofStages: mapToJSON(this.stages, (histogram) => histogram.toJSON()),
+                caches: caches,
+                workerPools: mapToJSON(this.workerPools, (pool) => pool.toJSON()),
+                eventLoopDelay: eventLoop};
+    }
+}
+
+module.exports = {Metrics, Histogram, Trace, elapsedMs}
@@ -0,0 +1,98 @@
+//libraries required
+const rlp = require('rlp');
+
+/**
+ * Binary (RLP) encoding of the proofs sent by the REST API.
+ * Served instead of JSON when the client asks for MIME_TYPE in the Accept header.
+ *
+ *  node:        [peak, tFirstBlock, tLastBlock, dFirstBlock, dLastBlock, nodeDifficulty, numberOfBlocksCoverd]
+ *               (DifficultyNode.toTuple, the numbers as minimal big endian integers)
+ *  header:      the block header fields (the RLP hashed into the block hash)
+ *  txProof:     [[MPT nodes], blockContainingTx, txIndex] or [] if there is no transaction
+ *  leaf proof:  [leafIdx, lastLeafIdx, [node], [header], txProof]               (getLeafAndProof)
+ *  root proof:  [header, txProof, rootNode]                                    (getSCRootProof)
+ *  batch proof: [lastLeafIdx, [[level, index, node]],
+ *                [[leafIdx, [[level, index]], [header], txProof]]]             (getBatchLeafAndProof)
+ *               the leafs are in the order of the requested difficulties
+ *  leaf record: [leafIdx, node, firstBlockIdx, numberOfBlocks, txHash]      (getLeafRecord)
+ *               a leaf stream is a sequence of leaf records (no enclosing list)
+ *
+ * The MPT nodes are already RLP: they are sent as they are, without the
+ * JSON array of bytes of JSONProof, and no hex string is sent at all.
+ */
+const MIME_TYPE = 'application/x-smartfly-rlp';
+
+/**
+ * @param {*} value number, decimal string or hex string
+ * @returns minimal big endian Buffer of value (empty for 0)
+ */
+function intToBuffer(value){
+    let hex = BigInt(value).toString(16);
+    if(hex == '0')
+        return Buffer.alloc(0);
+    return Buffer.from(hex.length % 2 ? '0' + hex : hex, 'hex');
+}
+
+function encodeNodeFields(node){
+    let tuple = Array.isArray(node) ? node : [node.peak, node.tFirstBlock, node.tLastBlock, node.dFirstBlock,
+                                               node.dLastBlock, node.nodeDifficulty, node.numberOfBlocksCoverd];
+    return [tuple[0]].concat(tuple.slice(1).map(intToBuffer));
+}
+
+function encodeTxProofFields(txProof){
+    if(txProof == null)
+        return [];
+    let nodes = JSON.parse(txProof.JSONProof).map((node) => Buffer.from(node.data != undefined ? node.data : node));
+    return [nodes, txProof.blockContainingTx, intToBuffer(txProof.txIndex)];
+}
+
+function encodeLeafProofFields(leafProof){
+    return [intToBuffer(leafProof.leafIdx), intToBuffer(leafProof.lastLeafIdx),
+            leafProof.leafProof.map(encodeNodeFields), leafProof.leafBlocks || [],
+            encodeTxProofFields(leafProof.txDifficultyMPTProof)];
+}
+
+/**
+ * @param {*} leafProof result of Prover.getLeafAndProof
+ * @returns Buffer
+ */
+function encodeLeafProof(leafProof){
+    return rlp.encode(encodeLeafProofFields(leafProof));
+}
+
+/**
+ * @param {*} rootProof result of Prover.getSCRootProof
+ * @returns Buffer
+ */
+function encodeRootProof(rootProof){
+    return rlp.encode([rootProof.blockHeader, encodeTxProofFields(rootProof.txDifficultyMPTProof),
+                       encodeNodeFields(rootProof.rootDifficultyNode)]);
+}
+
+/**
+ * @param {*} batchProof result of Prover.getBatchLeafAndProof
+ * @returns Buffer
+ */
+function encodeBatchLeafProof(batchProof){
+    let nodes = Object.keys(batchProof.nodes).map((position) => {
+        let [level, index] = position.split(',');
+        return [intToBuffer(level), intToBuffer(index), encodeNodeFields(batchProof.nodes[position])];
+    });
+    let leafs = batchProof.leafs.map((leaf) => [
+        intToBuffer(leaf.leafIdx),
+        leaf.proofPositions.map(([level, index]) => [intToBuffer(level), intToBuffer(index)]),
+        leaf.leafBlocks || [], encodeTxProofFields(leaf.txDifficultyMPTProof)]);
+    return rlp.encode([intToBuffer(batchProof.lastLeafIdx), nodes, leafs]);
+}
+
+/**
+ * @param {*} leafRecord result of Prover.getLeafRecord
+ * @returns Buffer
+ */
+function encodeLeafRecord(leafRecord){
+    return rlp.encode([intToBuffer(leafRecord.leafIdx), encodeNodeFields(leafRecord.leaf),
+                       intToBuffer(leafRecord.firstBlockIdx), intToBuffer(leafRecord.numberOfBlocks),
+                       leafRecord.txHash != null ? leafRecord.txHash : Buffer.alloc(0)]);
+}
+
+module.exports = {MIME_TYPE, encodeLeafProof, encodeRootProof, encodeBatchLeafProof, encodeLeafRecord}
@@ -0,0 +1,58 @@
+//libraries required
+const { parentPort } = require('worker_threads');
+//To Build Patricia Merkle Tree
+const Tree = require('merkle-patricia-tree').BaseTrie
+//To format receipts
+const { Receipt } = require('eth-object')
+const { encode } = require('eth-util-lite')
+
+/**
+ * CPU-heavy parts of the proofs, run by the threads of a WorkerPool (see BlockManager)
+ * so that they do not stop the event loop serving the requests.
+ * The same functions can be called directly (no worker threads).
+ */
+
+/**
+ * Build the receipt trie of a block and the proofs of all its receipts
+ * (a trie node shared by more proofs is returned once)
+ * @param {*} receipts JSON-RPC receipts of the block in transaction order
+ * @returns {nodes: [Buffer] trie nodes, proofs: [[index in nodes]] proof of each transaction index}
+ */
+async function buildReceiptProofs(receipts){
+    let tree = new Tree();
+    //from receipt build Particia Tree
+    for(let index = 0; index < receipts.length; index++){
+        await tree.put(encode(index), Receipt.fromRpc(receipts[index]).serialize());
+    }
+    let nodes = [];
+    //hex of the node -> position in nodes
+    let nodePositions = new Map();
+    let proofs = [];
+    for(let index = 0; index < receipts.length; index++){
+        let proof = await Tree.createProof(tree, encode(index));
+        proofs.push(proof.map((node) => {
+            let key = node.toString('hex');
+            if(!nodePositions.has(key)){
+                nodePositions.set(key, nodes.length);
+                nodes.push(node);
+            }
+            return nodePositions.get(key);
+        }));
+    }
+    return {nodes: nodes, proofs: proofs};
+}
+
+const tasks = {buildReceiptProofs};
+
+//message: {name: function of tasks, args: [...]} -> {result:} or {error:}
+if(parentPort != null){
+    parentPort.on('message', async (task) => {
+        try{
+            parentPort.postMessage({result: await tasks[task.name](...task.args)});
+        } catch(err){
+            parentPort.postMessage({error: String(err && err.stack ? err.stack : err)});
+        }
+    });
+}
+
+module.exports = {buildReceiptProofs}
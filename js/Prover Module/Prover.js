@@ -1,7 +1,12 @@
 
 /* ********************* REQUIRE ************************* */
 const DifficultyMMRTree = require('./DifficultyMMR');
+const SyntheticDifficultyMMRTree = require('./SyntheticDifficultyMMR');
 const BlockManager = require('./blockManager');
+const ProverStore = require('./ProverStore');
+const ProverIndex = require('./ProverIndex');
+const LRUCache = require('./LRUCache');
+const { Metrics } = require('./Metrics');
 const fs = require('fs');
 const Web3 = require('web3');
 const rlp = require('rlp');
@@ -14,8 +19,19 @@ var seedrandom = require('seedrandom')
 
 ////// Get configuration info
 var JSONConfiguration = JSON.parse(fs.readFileSync("./configuration_smartcontract_invocation.json"));
+//the provider can be overridden (e.g. one ganache instance per gas benchmark worker)
+if(process.env.SMARTFLY_PROVIDER != undefined)
+    JSONConfiguration['provider'] = process.env.SMARTFLY_PROVIDER;
 const web3 = new Web3(JSONConfiguration['provider']);
 const scenario = JSONConfiguration['scenario'];
+//Blocks of the transactions asked to getTxProof kept in memory (only blocks covered by the MMR)
+const txBlockCacheSize = JSONConfiguration['txBlockCacheSize'] != undefined ? JSONConfiguration['txBlockCacheSize'] : 65536;
+//Immutable parts of the leaf proofs kept in memory (see getCachedLeaf)
+const leafProofCacheSize = JSONConfiguration['leafProofCacheSize'] != undefined ? JSONConfiguration['leafProofCacheSize'] : 4096;
+//Milliseconds between two synchronizations of the background sync (see startBackgroundSync)
+const syncIntervalMs = JSONConfiguration['syncIntervalMs'] != undefined ? JSONConfiguration['syncIntervalMs'] : 5000;
+//Milliseconds the synchronization can use the event loop before giving it back to the requests
+const syncSliceMs = JSONConfiguration['syncSliceMs'] != undefined ? JSONConfiguration['syncSliceMs'] : 10;
 
 ////////// USEFUL CONSTANTS ////////////
 //Blocks constants - TODO: INVERTED names but code ok
@@ -31,49 +47,188 @@ const MMRNodeSizeInBytes = 4*8 + 2*16 + 32 //96
 class Prover{
 
 /////////////////////////////// INITIALIZATION /////////////////////////////////////////
-    constructor(){  
+    /**
+     * @param {*} storePath append-only log where the MMR and the synchronization
+     * state are persisted (default: "proverStorePath" of the configuration file,
+     * if not set the MMR is kept only in memory and built again from the chain)
+     */
+    constructor(storePath = JSONConfiguration['proverStorePath']){  
         //The prover uses the blockManager class to retrieve 
         //information from the chain in the node
         this.BlockManager = null;
         this.latestConfirmedBlockIdx = 0;
-        
-        //Create or uses an existing DifficultyMMR
-        try{
-            var JSONmmr = JSON.parse(fs.readFileSync("./Memory/mmrStored.json"));
-            this.mmr = new DifficultyMMRTree(JSONmmr['tree'], JSONmmr['leafInfoArray'], JSONmmr['levels_odd_elements']);
-        }
-        catch(err){
-            this.mmr = new DifficultyMMRTree([[]]);
-        }
+        this.store = null;
 
+        //Create or uses an existing DifficultyMMR
+        this.mmr = new DifficultyMMRTree([[]]);
         //array containing the txHashes of the SC call - last element root
-        try{
-           this.txHashArray = JSON.parse(fs.readFileSync("./Memory/txHashArray.json"));
-
-        }catch(err){
-            this.txHashArray = [null];
-        }
-
+        this.txHashArray = [null];
         //array that contains the first index of the passed blocks 
-        try{
-            this.blocksIdxLeaf = JSON.parse(fs.readFileSync("./Memory/blocksIdxLeaf.json"));
-        }catch(err){
-            this.blocksIdxLeaf = []
+        this.blocksIdxLeaf = [];
+        //leaf hash, SC invocation and block range -> leaf index (see ProverIndex)
+        this.index = new ProverIndex();
+        //txHash -> block containing it, for the transactions that are not SC invocations
+        this.txBlockCache = new LRUCache(txBlockCacheSize);
+        //leaf index -> immutable part of its proof (see getCachedLeaf)
+        this.leafProofCache = new LRUCache(leafProofCacheSize);
+        //SC invocations synchronized since the last checkpoint
+        this.syncedTxHashes = [];
+        //[leaf node, blocks info, txHash, txBlockIdx] of the window being downloaded (see syncWindowCompleted)
+        this.windowLeafs = [];
+        //RPC latencies and cache hit rates of the BlockManager (see getStatus)
+        this.metrics = new Metrics();
+        this.metrics.registerCache('txBlocks', this.txBlockCache);
+        this.metrics.registerCache('leafProofs', this.leafProofCache);
+        //promise of the running synchronization (see synchronize), null if the MMR is not being updated
+        this.syncing = null;
+        this.syncRequested = false;
+        //message of the last failed synchronization, null if the last one succeeded
+        this.lastSyncError = null;
+        //timer of the background synchronization (see startBackgroundSync)
+        this.syncLoop = null;
+        this.syncSliceStart = 0;
+
+        //resume from the last checkpoint of the stored log
+        if(storePath != undefined){
+            this.store = new ProverStore(storePath);
+            let storedState = this.store.load();
+            this.mmr = storedState.mmr;
+            this.txHashArray = storedState.txHashArray;
+            this.blocksIdxLeaf = storedState.blocksIdxLeaf;
+            this.index = storedState.index;
+            this.latestConfirmedBlockIdx = storedState.latestConfirmedBlockIdx;
+            console.log("   Stored MMR loaded: " + this.blocksIdxLeaf.length + " leafs, synchronization from block " + this.latestConfirmedBlockIdx);
         }
+        //leafs up to the last completed window (see resetToCheckpoint)
+        this.checkpointLeafs = this.blocksIdxLeaf.length;
+        //MMR version seen by the requests (see publishVersion)
+        this.version = null;
+        this.publishVersion();
     }
 
     /**
      * Since the initialization of the block manager is asynchronous 
      * it can not be performed in the constructor()
      * The initial parameters are set by the prover
+     * @throws the error of the initial synchronization (the local MMR is the one of the last checkpoint)
      */
     async initializeBlockManager(){
         var id = await web3.eth.net.getId();
         var addresses = await web3.eth.getAccounts();
-        this.BlockManager = new BlockManager(id,addresses);
+        this.BlockManager = new BlockManager(id, addresses, this.metrics);
         console.log("***** Selected Scenario "+ scenario +" *****");
         console.log("[INITIALIZATION START]   Updating local MMR...")
-        //Different chain synchronization ways to recover Smart Contract invocation info for the two scenarios
+        await this.synchronize();
+        console.log("[INITIALIZATION END]   Local MMR synchronized!")
+    }
+
+    /**
+     * Keep the local MMR synchronized with the confirmed blocks of the chain: a synchronization
+     * is started every intervalMs after the end of the previous one.
+     * The requests are served while the MMR is updated (see synchronize)
+     * @param {*} intervalMs milliseconds between two synchronizations
+     */
+    startBackgroundSync(intervalMs = syncIntervalMs){
+        this.stopBackgroundSync();
+        let syncLoop = {timer: null};
+        const nextSync = async () => {
+            //a failure is logged and reported by getStatus, the next synchronization retries
+            await this.synchronize().catch(() => {});
+            //stopped (or started again) while synchronizing
+            if(this.syncLoop === syncLoop)
+                syncLoop.timer = setTimeout(nextSync, intervalMs);
+        };
+        syncLoop.timer = setTimeout(nextSync, intervalMs);
+        this.syncLoop = syncLoop;
+    }
+
+    stopBackgroundSync(){
+        if(this.syncLoop != null){
+            clearTimeout(this.syncLoop.timer);
+            this.syncLoop = null;
+        }
+    }
+
+    /**
+     * Add to the local MMR the SC invocations of the confirmed blocks not synchronized yet.
+     * Only one synchronization runs at a time: a call while the MMR is being updated
+     * is served by a new synchronization started at the end of the running one.
+     * After a failure (e.g. node not reachable) the local MMR is reset to the last completed
+     * window (see resetToCheckpoint), so the next synchronization restarts from it
+     * @returns promise resolved when the MMR is synchronized, rejected with the error of the last failed update
+     */
+    synchronize(){
+        if(this.syncing != null){
+            this.syncRequested = true;
+            return this.syncing;
+        }
+        this.syncing = (async () => {
+            let syncError = null;
+            do{
+                this.syncRequested = false;
+                try{
+                    await this.updateLocalMMR();
+                    syncError = null;
+                } catch(err){
+                    syncError = err;
+                    console.log("   [SYNC ERROR] " + (err && err.message ? err.message : err));
+                    this.resetToCheckpoint();
+                }
+            } while(this.syncRequested);
+            this.syncing = null;
+            this.lastSyncError = syncError != null ? String(syncError.message != undefined ? syncError.message : syncError) : null;
+            if(syncError != null)
+                throw syncError;
+        })();
+        return this.syncing;
+    }
+
+    /**
+     * Drop the state of a failed synchronization: the leafs of the window being downloaded and,
+     * if the failure happened while a window was being added, the leafs added after the last
+     * checkpoint (the stored log is loaded again, truncated to the checkpoint, or without a store
+     * the MMR is built again from the checkpointed leafs)
+     */
+    resetToCheckpoint(){
+        this.windowLeafs = [];
+        if(this.blocksIdxLeaf.length == this.checkpointLeafs){
+            return;
+        }
+        console.log("   Local MMR reset to the last checkpoint: " + this.checkpointLeafs + " leafs");
+        if(this.store != null){
+            let storedState = this.store.load();
+            this.mmr = storedState.mmr;
+            this.txHashArray = storedState.txHashArray;
+            this.blocksIdxLeaf = storedState.blocksIdxLeaf;
+            this.index = storedState.index;
+            this.latestConfirmedBlockIdx = storedState.latestConfirmedBlockIdx;
+        }
+        else{
+            let leafs = this.mmr.tree[0].slice(0, this.checkpointLeafs);
+            let index = new ProverIndex();
+            this.mmr = new DifficultyMMRTree([[]]);
+            this.txHashArray = this.txHashArray.slice(0, this.checkpointLeafs + 1);
+            this.blocksIdxLeaf = this.blocksIdxLeaf.slice(0, this.checkpointLeafs);
+            for(let i = 0; i < leafs.length; i++){
+                let txBlockIdx = this.index.getTxBlockIdx(i);
+                index.addLeaf(leafs[i].peak, this.blocksIdxLeaf[i], this.txHashArray[i + 1],
+                              txBlockIdx != -1 ? txBlockIdx : undefined);
+                this.mmr.addLeaf(leafs[i]);
+            }
+            this.index = index;
+        }
+        this.checkpointLeafs = this.blocksIdxLeaf.length;
+        this.syncedTxHashes = [];
+        //the cached subtree proofs of the dropped leafs are not valid anymore
+        this.leafProofCache.clear();
+        this.publishVersion();
+    }
+
+    /**
+     * Different chain synchronization ways to recover Smart Contract invocation info for the scenarios
+     */
+    async updateLocalMMR(){
+        this.syncSliceStart = Date.now();
         if(scenario == "untrusted"){
             await this.updateLocalMMRUntrustedScenario(this.latestConfirmedBlockIdx);
         } 
@@ -83,7 +238,6 @@ class Prover{
         if(scenario== "semiTrusted"){
             await this.updateLocalMMRSemiTrustedScenario(this.latestConfirmedBlockIdx);
         }
-        console.log("[INITIALIZATION END]   Local MMR synchronized!")
     }
 ////////////////////////////////////////////////////////////////////////////////////////
 
@@ -122,12 +276,9 @@ class Prover{
         //send the data to the SC
         var transactionResponse = await this.BlockManager.updateSmartContractUntrusted(RLPEncodedBlocks, lastBlockIdxSeenBySC+1);
         
-        //RX: FOR NOW HERE FOR TESTING PURPOSES :) THE MMR MUST NOT BE UPDATE SYNCHRONOUSLY 
-        //SURE THAT THE BLOCK ENDED UP IN THE CHAIN
-        //Update the MMR stored off-chain by the SmartFlies Prover
-        await this.updateLocalMMRUntrustedScenario(this.latestConfirmedBlockIdx);
-        console.log("   CURRENT MMR ROOT HASH:" + this.mmr.getRoot().getKeccak256() )
-        //////////////////////////////////////////////////////////
+        //The MMR stored off-chain by the SmartFlies Prover is updated by the background
+        //synchronization once the block is confirmed (it is started now, not awaited, a failure is logged)
+        this.synchronize().catch(() => {});
             
         return transactionResponse;
     }
@@ -162,12 +313,9 @@ class Prover{
         //Send transaction with MMR leaf 
         let transactionResponse = await this.BlockManager.updateSmartContractPartiallyTrusted(MMRLeaf, lastBlockIdxSeenBySC+ 1)
 
-        //RX: FOR NOW HERE FOR TESTING PURPOSES :) THE MMR MUST NOT BE UPDATE SYNCHRONOUSLY 
-        //SURE THAT THE BLOCK ENDED UP IN THE CHAIN
-        //Update the MMR stored offchain
-        await this.updateLocalMMRPartiallyTrustedScenario(this.latestConfirmedBlockIdx);
-        //console.log("   CURRENT MMR ROOT HASH:" + this.mmr.getRoot().getKeccak256() )
-        //////////////////////////////////////////////////////
+        //The MMR stored offchain is updated by the background synchronization
+        //once the block is confirmed (it is started now, not awaited, a failure is logged)
+        this.synchronize().catch(() => {});
 
         return transactionResponse;
     }
@@ -203,13 +351,10 @@ class Prover{
         //TODO ----
         var transactionResponse = await this.BlockManager.updateSmartContractSemiTrusted(firstBlock, lastBlock, nodeDifficulty);
         
-        //RX: FOR NOW HERE FOR TESTING PURPOSES :) THE MMR MUST NOT BE UPDATE SYNCHRONOUSLY 
-        //SURE THAT THE BLOCK ENDED UP IN THE CHAIN
-        //Update the MMR stored offchain by the SmartFlies Prover
+        //The MMR stored offchain by the SmartFlies Prover is updated by the background
+        //synchronization once the block is confirmed (it is started now, not awaited, a failure is logged)
         //TODO -----
-        await this.updateLocalMMRSemiTrustedScenario(this.latestConfirmedBlockIdx);
-        console.log("   CURRENT MMR ROOT HASH:" + this.mmr.getRoot().getKeccak256() )
-        //////////////////////////////////////////////////////////
+        this.synchronize().catch(() => {});
             
         return transactionResponse;
     }
@@ -225,90 +370,114 @@ class Prover{
      * @param {*} lastBlockWithSCInvocation the index of the last block known having a SC invocation
      */
     async updateLocalMMRUntrustedScenario(lastBlockWithSCInvocation){
-        //retrieve the missing SC invocations
-        //{arrayOfArrayOfBlocks:, txHashArray:, latestConfirmedBlockIdx:}
-        var missingInformation = await this.BlockManager.getMissingMMRBlocks(lastBlockWithSCInvocation);
-        //No update needed 
-        if(missingInformation.arrayOfArrayOfBlocks == undefined){
-            return;
-        }
-        //update the last block checked from the chain
-        this.latestConfirmedBlockIdx = missingInformation.latestConfirmedBlockIdx + 1;
-        //array containing the blocks called in every invocation 
-        //Format [[block_0, ..., block_n], [], ...., []]
-        var arrayOfArrayOfBlocks = missingInformation.arrayOfArrayOfBlocks;
-
-        //Concatenate to the local txHashArray the txHash of the new SC invocation
-        this.txHashArray = this.txHashArray.concat(missingInformation.txHashArray);
-        var arrayOfBlocks, numberOfBlocksInLeaf;
-        //information to build a Difficulty Node
-        var newLeafNode;
-
-        //For every SC invocation 
-        for(let i=0; i< arrayOfArrayOfBlocks.length; i++){
-            //create a leaf node
-            newLeafNode = new DifficultyNode()
-            //decode array blocks in invocation
-            //params[0].value contains the blocks sent to the SC rlp encoded 
-            arrayOfBlocks = rlp.decode(arrayOfArrayOfBlocks[ i ].params[0].value)
-
-            //get the number of blocks in this SC invocation 
-            numberOfBlocksInLeaf = arrayOfBlocks.length;
-
-            //Store the first block idx and number of blocks covered by the SC invocation
-             this.blocksIdxLeaf.push({firstBlockIdx: arrayOfBlocks[0][8].readUIntBE(0, arrayOfBlocks[0][8].length )  ,
-                numberOfBlocks: numberOfBlocksInLeaf})
-
-            //given the array of block create an MMR leaf
-            newLeafNode = await this.createMMRLeafFromArrayOfBlocks(arrayOfBlocks)
-
-
-            this.mmr.addLeaf(newLeafNode);
-        }
+        //the leafs of a window are built while the SC invocations are downloaded
+        //and added when the whole window is downloaded (see syncWindowCompleted)
+        this.windowLeafs = [];
+        await this.BlockManager.getMissingMMRBlocks(lastBlockWithSCInvocation,
+            async (invocation, txHash, txBlockIdx) => {
+                //decode array blocks in invocation
+                //params[0].value contains the blocks sent to the SC rlp encoded 
+                let arrayOfBlocks = rlp.decode(invocation.params[0].value);
+                //given the array of block create an MMR leaf
+                let newLeafNode = await this.createMMRLeafFromArrayOfBlocks(arrayOfBlocks);
+                //Store the first block idx and number of blocks covered by the SC invocation
+                this.windowLeafs.push([newLeafNode,
+                    {firstBlockIdx: arrayOfBlocks[0][8].readUIntBE(0, arrayOfBlocks[0][8].length ),
+                     numberOfBlocks: arrayOfBlocks.length},
+                    txHash, txBlockIdx]);
+                await this.yieldToRequests();
+            },
+            (lastBlockIdx) => this.syncWindowCompleted(lastBlockIdx));
     }
 
-
-
      /**
      * Creates or updates the local MMR using the MMR leafs retrieved from the chain.
      * In the partially-trusted scenario the transactions contain all the MMR leafs and first block index.
      * @param {*} lastBlockWithSCInvocation the index of the last block known having a SC invocation
      */
       async updateLocalMMRPartiallyTrustedScenario(lastBlockWithSCInvocation){
-        //retrieve the missing SC invocation
-        // {arrayOfMMRLeafs:, firstBlockIdx:, txHashArray:, latestConfirmedBlockIdx:};
-        var missingInformation = await this.BlockManager.getMissingMMRLeafs(lastBlockWithSCInvocation);
+        //the leafs of a window are built while the SC invocations are downloaded
+        //and added when the whole window is downloaded (see syncWindowCompleted)
+        this.windowLeafs = [];
+        await this.BlockManager.getMissingMMRLeafs(lastBlockWithSCInvocation,
+            async (MMRLeaf, firstBlockIdx, txHash, txBlockIdx) => {
+                //From array to MMR node
+                let newLeafNode = new DifficultyNode();
+                newLeafNode.fromArrayToMMRNode(MMRLeaf);
+                //Store the first block idx and number of blocks covered by the SC invocation
+                this.windowLeafs.push([newLeafNode,
+                    {firstBlockIdx: parseInt(firstBlockIdx), numberOfBlocks: parseInt(newLeafNode.numberOfBlocksCoverd)},
+                    txHash, txBlockIdx]);
+                await this.yieldToRequests();
+            },
+            (lastBlockIdx) => this.syncWindowCompleted(lastBlockIdx));
+    }
 
-        //No update needed 
-        if(missingInformation.arrayOfMMRLeafs.length == 0){
-            return;
+    /**
+     * Add to the local MMR a leaf read from the chain
+     * @param {*} newLeafNode DifficultyNode of the leaf
+     * @param {*} blocksInfoLeaf {firstBlockIdx:, numberOfBlocks:} of the leaf
+     * @param {*} txHash SC invocation that added the leaf
+     * @param {*} txBlockIdx block containing the SC invocation
+     */
+    addSyncedLeaf(newLeafNode, blocksInfoLeaf, txHash, txBlockIdx){
+        //the leaf information is stored before the leaf so it is there for every leaf of the MMR
+        this.txHashArray.push(txHash);
+        this.blocksIdxLeaf.push(blocksInfoLeaf);
+        this.index.addLeaf(newLeafNode.peak, blocksInfoLeaf, txHash, txBlockIdx);
+        this.mmr.addLeaf(newLeafNode);
+        this.storeLeaf(txHash, txBlockIdx);
+        this.syncedTxHashes.push(txHash);
+        this.publishVersion();
+    }
+
+    /**
+     * A leaf is added to the MMR, its indexes and txHashArray in the same synchronous step, so a request
+     * never sees a partially added leaf. The requests that await (e.g. a receipt proof) take at their start
+     * the version of the MMR they answer for: a new object is published after every leaf and never modified.
+     */
+    publishVersion(){
+        let lastLeafIdx = this.mmr.getLastLeafIndex();
+        this.version = Object.freeze({
+            number: this.version != null ? this.version.number + 1 : 0,
+            lastLeafIdx: lastLeafIdx,
+            root: lastLeafIdx >= 0 ? this.mmr.getRoot() : null,
+            lastTxHash: this.txHashArray[this.txHashArray.length - 1]});
+    }
+
+    /**
+     * Give the event loop back to the requests when the synchronization has used it
+     * for more than syncSliceMs (the leafs of a window are added one after the other)
+     */
+    async yieldToRequests(){
+        if(Date.now() - this.syncSliceStart >= syncSliceMs){
+            await new Promise((resolve) => setImmediate(resolve));
+            this.syncSliceStart = Date.now();
+        }
+    }
+
+    /**
+     * All the SC invocations up to lastBlockIdx have been downloaded: the leafs of the window
+     * are added to the local MMR and the synchronization restarts from the next block.
+     * A window that fails while it is downloaded adds nothing (it is downloaded again by the next synchronization)
+     */
+    async syncWindowCompleted(lastBlockIdx){
+        let windowLeafs = this.windowLeafs;
+        this.windowLeafs = [];
+        for(let i = 0; i < windowLeafs.length; i++){
+            this.addSyncedLeaf(...windowLeafs[i]);
+            await this.yieldToRequests();
         }
-        //array containing the leafs
-        var arrayOfMMRLeafs = missingInformation.arrayOfMMRLeafs;
         //update the last block checked from the chain
-        this.latestConfirmedBlockIdx = missingInformation.latestConfirmedBlockIdx + 1;
-
-        //Concatenate to the local txHashArray the txHash of the new SC invocation
-        this.txHashArray = this.txHashArray.concat(missingInformation.txHashArray);
-        //information to build a Difficulty Node
-        var newLeafNode;
-
-        //For every SC invocation 
-        for(let i=0; i< arrayOfMMRLeafs.length; i++){
-            //create a leaf node
-            newLeafNode = new DifficultyNode();
-            //From array to MMR node
-            newLeafNode.fromArrayToMMRNode(arrayOfMMRLeafs[i]);
-            //decode array blocks in invocation
-            //params[0].value contains the blocks sent to the SC rlp encoded 
-            //arrayOfBlocks = rlp.decode(arrayOfArrayOfBlocks[ i ].params[0].value)
-
-            //Store the first block idx and number of blocks covered by the SC invocation
-            this.blocksIdxLeaf.push({firstBlockIdx: parseInt(missingInformation.firstBlockIdxes[i])  ,
-                numberOfBlocks: parseInt(newLeafNode.numberOfBlocksCoverd)})
-
-            this.mmr.addLeaf(newLeafNode);
+        this.latestConfirmedBlockIdx = lastBlockIdx + 1;
+        this.checkpointLeafs = this.blocksIdxLeaf.length;
+        if(this.syncedTxHashes.length == 0){
+            return;
         }
+        this.storeCheckpoint();
+        //receipt proofs of the new SC invocations built in background
+        this.BlockManager.precomputeReceiptProofs(this.syncedTxHashes);
+        this.syncedTxHashes = [];
     }
 
     /**
@@ -388,14 +557,79 @@ class Prover{
      *           leafProof:             <Membership proof of the provided MMR leaf (list of MMR node)>,
      *           leafBlocks:            <Blockheader of the blocks composing the MMR leaf provided in input>,
      *           txDifficultyMPTProof:  <Proof that an old MMR update transaction is in one of the blocks composing the input MMR leaf>}
+     * @param trace optional Trace (Metrics.js) marked at the end of every stage, null if the request is not traced
      */
-    async getLeafAndProof(leafIndex){
+    async getLeafAndProof(leafIndex, trace = null){
        // var leafIndex  = leafValue['leafIdx']
         // 0 indicate the level from which we want the proof
         console.log("   Getting proof for leaf ... ")
-        let leafProof = this.mmr.getLeafProof(leafIndex, 0);
         let lastLeafIndex = this.mmr.getLastLeafIndex();
-    
+        let leafProof;
+        let leafData;
+        if(Number.isInteger(leafIndex) && leafIndex >= 0 && leafIndex <= lastLeafIndex){
+            let cachedLeaf = this.getCachedLeaf(leafIndex, trace);
+            //the siblings inside the subtree of the peak are kept, the bagging of the peaks
+            //is the one of the current tree (the peak level grows when the peak is merged)
+            let peakLevel = this.mmr.getLeafPeakLevel(leafIndex);
+            let newSiblings = this.mmr.getSubtreeProofPositions(leafIndex, cachedLeaf.subtreeProof.length, peakLevel);
+            for(let i = 0; i < newSiblings.length; i++){
+                cachedLeaf.subtreeProof.push(this.mmr.getNodeValue(newSiblings[i][1], newSiblings[i][0]));
+            }
+            leafProof = cachedLeaf.subtreeProof.concat(this.mmr.getBaggingProofPositions(peakLevel).map(
+                (position) => this.mmr.getNodeValue(position[1], position[0])));
+            if(trace != null) trace.mark('mmrProof');
+            leafData = await cachedLeaf.leafData;
+            if(trace != null) trace.mark('leafData');
+        }
+        else{
+            leafProof = this.mmr.getLeafProof(leafIndex, 0);
+            if(trace != null) trace.mark('mmrProof');
+            leafData = await this.getLeafBlocksAndTxProof(leafIndex, trace);
+        }
+
+        return { 
+                leafIdx: leafIndex,
+                //Maybe not needed
+                lastLeafIdx: lastLeafIndex,
+                leafProof: leafProof,
+                leafBlocks: leafData.leafBlocks,
+                txDifficultyMPTProof: leafData.txDifficultyMPTProof }
+    }
+
+    /**
+     * Immutable part of the proof of a leaf, kept in leafProofCache: the block headers of the leaf
+     * and the receipt proof of its SC invocation (confirmed blocks) and the nodes of its proof inside
+     * the perfect subtree of its peak (they never change, new levels are added when the peak
+     * is merged with a new one). A new leaf changes only the bagging of the peaks.
+     * @param {*} leafIndex index of a leaf of the MMR
+     * @param trace optional Trace (see getLeafAndProof) of the request that misses the cache
+     * @returns {subtreeProof: [DifficultyNode], leafData: promise of getLeafBlocksAndTxProof}
+     */
+    getCachedLeaf(leafIndex, trace = null){
+        let cachedLeaf = this.leafProofCache.get(leafIndex);
+        if(cachedLeaf == undefined){
+            cachedLeaf = {subtreeProof: [], leafData: this.getLeafBlocksAndTxProof(leafIndex, trace)};
+            this.leafProofCache.set(leafIndex, cachedLeaf);
+            const dropEntry = () => {
+                if(this.leafProofCache.peek(leafIndex) === cachedLeaf)
+                    this.leafProofCache.delete(leafIndex);
+            }
+            //a receipt not found is asked again by the next request
+            cachedLeaf.leafData.then((leafData) => {
+                if(leafData.txDifficultyMPTProof === null)
+                    dropEntry();
+            }, dropEntry);
+        }
+        return cachedLeaf;
+    }
+
+    /**
+     * Block headers covered by a leaf and the MPT proof of the SC invocation that added it
+     * @param {*} leafIndex index of the leaf
+     * @param trace optional Trace (see getLeafAndProof)
+     * @returns {leafBlocks:, txDifficultyMPTProof:} (see getLeafAndProof)
+     */
+    async getLeafBlocksAndTxProof(leafIndex, trace = null){
         //Only the block hash containing it
         
         //console.log("   Getting receipt of DifficultyMMR invocation in specific Block")
@@ -403,13 +637,15 @@ class Prover{
         //Obtain the SC call in the leaf
         var txHashOfLeafMMR = this.txHashArray[ leafIndex ];
         //console.log(txHashOfLeafMMR)
-        var txReceipt = null;
 
+        //Get Transaction proof (patricaTree) - cached by the BlockManager
+        //var patricaTreeProof = null//await this.BlockManager.extractMerkleProofReceipt(txHashOfLeafMMR);
+        var patricaTreeProof;
         //Check if not genesis block
         if(txHashOfLeafMMR != null){
-            txReceipt = await this.BlockManager.getTxReceipt(txHashOfLeafMMR);
-            txReceipt = { "blockHash": txReceipt.blockHash}
+            patricaTreeProof = await this.BlockManager.extractMerkleProofReceipt(txHashOfLeafMMR);
         }
+        if(trace != null) trace.mark('receiptProof');
 
         console.log("   Getting Blocks of leaf ... " )
         //blocksInfoLeaf {firstBlockIdx: firstBlockIdx, numberOfBlocks: numberOfBlocks }
@@ -422,21 +658,75 @@ class Prover{
             //console.log(blocksInfoLeaf)
             blocksHeaderForLeaf = await this.BlockManager.getBlocksData(blocksInfoLeaf['firstBlockIdx'], blocksInfoLeaf['numberOfBlocks'] )
         }
-        
-        //Get Transaction proof (patricaTree)
-        //var patricaTreeProof = null//await this.BlockManager.extractMerkleProofReceipt(txHashOfLeafMMR);
-        //var patricaTreeProof = await this.BlockManager.extractMerkleProofReceipt(txHashOfLeafMMR);
-        var patricaTreeProof;
-        if(txHashOfLeafMMR != null)
-            patricaTreeProof = await this.BlockManager.extractMerkleProofReceipt(txHashOfLeafMMR);
-        
-        return { 
-                leafIdx: leafIndex,
-                //Maybe not needed
-                lastLeafIdx: lastLeafIndex,
-                leafProof: leafProof,
-                leafBlocks: blocksHeaderForLeaf,
-                txDifficultyMPTProof: patricaTreeProof }
+        if(trace != null) trace.mark('blockHeaders');
+        return {leafBlocks: blocksHeaderForLeaf, txDifficultyMPTProof: patricaTreeProof};
+    }
+
+    /**
+     * Proofs of the leaves covering a list of relative difficulties in a single response.
+     * The MMR nodes shared by the proofs (the ones near the peaks) are sent only once:
+     * every proof is a list of positions in the "nodes" object
+     * @param {*} relativeDifficulties array of numbers from 0 to 1
+     * @returns {lastLeafIdx: <index of the last MMR leaf in the tree>,
+     *           nodes:       {"<level>,<index>": DifficultyNode} union of the nodes of all the proofs,
+     *           leafs:       [{leafIdx:, relativeDifficulties: <requested values covered by the leaf>,
+     *                          proofPositions: [[level, index], ...] in the order of getLeafAndProof leafProof,
+     *                          leafBlocks:, txDifficultyMPTProof: }] one per distinct leaf}
+     * @param trace optional Trace (see getLeafAndProof)
+     */
+    async getBatchLeafAndProof(relativeDifficulties, trace = null){
+        console.log("   Getting batch proof for " + relativeDifficulties.length + " difficulties ... ")
+        //the proofs are for the MMR of the request start (a leaf can be added while the leafs data are awaited)
+        let lastLeafIdx = this.mmr.getLastLeafIndex();
+        let nodes = {};
+        let leafs = [];
+        //leaf index -> position in leafs
+        let leafPositions = new Map();
+        for(let i = 0; i < relativeDifficulties.length; i++){
+            let leafIdx = this.mmr.getLeafFromDifficulty(relativeDifficulties[i]);
+            if(leafIdx == null){
+                return {error: "The prover has an empty MMR stored - try another prover or try later"}
+            }
+            if(leafPositions.has(leafIdx)){
+                leafs[leafPositions.get(leafIdx)].relativeDifficulties.push(relativeDifficulties[i]);
+                continue;
+            }
+            let proofPositions = this.mmr.getLeafProofPositions(leafIdx, 0);
+            for(let j = 0; j < proofPositions.length; j++){
+                nodes[proofPositions[j][0] + "," + proofPositions[j][1]] = 
+                    this.mmr.getNodeValue(proofPositions[j][1], proofPositions[j][0]);
+            }
+            leafPositions.set(leafIdx, leafs.length);
+            leafs.push({leafIdx: leafIdx, relativeDifficulties: [relativeDifficulties[i]], proofPositions: proofPositions});
+        }
+        if(trace != null) trace.mark('mmrProof');
+        //blocks and receipt proofs of the leaves requested together
+        let leafsData = await Promise.all(leafs.map((leaf) => this.getCachedLeaf(leaf.leafIdx).leafData));
+        if(trace != null) trace.mark('leafsData');
+        for(let i = 0; i < leafs.length; i++){
+            leafs[i].leafBlocks = leafsData[i].leafBlocks;
+            leafs[i].txDifficultyMPTProof = leafsData[i].txDifficultyMPTProof;
+        }
+        return {lastLeafIdx: lastLeafIdx, nodes: nodes, leafs: leafs};
+    }
+
+    /**
+     * Same as getBatchLeafAndProof with the relative difficulties drawn from the
+     * sampling distribution (randomSampler) with a seeded PRNG: the verifier can
+     * draw the same values from the seed and check them
+     * @param {*} seed seed of the PRNG
+     * @param {*} numberOfQueries number of relative difficulties to draw
+     * @param {*} weightPercentage L/n of the sampling distribution
+     * @param trace optional Trace (see getLeafAndProof)
+     */
+    async getBatchLeafAndProofFromSeed(seed, numberOfQueries, weightPercentage, trace = null){
+        let random = seedrandom(seed);
+        let relativeDifficulties = [];
+        for(let i = 0; i < numberOfQueries; i++){
+            relativeDifficulties.push(this.randomSampler(weightPercentage, random));
+        }
+        if(trace != null) trace.mark('sampling');
+        return await this.getBatchLeafAndProof(relativeDifficulties, trace);
     }
    
     /**
@@ -449,7 +739,7 @@ class Prover{
      *  [2] Proof of the leaf that has as peak the leafHash
      */ 
     getLeafOnlyMMRProof(leafHash){
-        let leafIndex = this.mmr.getLeafIndex(leafHash);
+        let leafIndex = this.index.getLeafIdxFromHash(leafHash);
         //the leaf hash doesn't exist 
         if(leafIndex == -1)
             return null;
@@ -465,13 +755,14 @@ class Prover{
      * format: {blockHeader:            <header of block containing the root> ,
      *          txDifficultyMPTProof:   <MTP proof of the receipt containing the hash of the MMR> ,
      *          rootDifficultyNode:     <local MMR root not hashed> }
+     * @param trace optional Trace (see getLeafAndProof)
      */
-    async getSCRootProof(){
-        //get last transaction
-        var lastIdxTxArray = this.txHashArray.length - 1
+    async getSCRootProof(trace = null){
+        //the root and the last transaction of the same MMR version (a leaf can be added while the receipt is awaited)
+        var version = this.version;
         
         //MMR not existing case
-        if(lastIdxTxArray == 0){
+        if(version.lastLeafIdx < 0){
             return  {error: "No data available for SC"}
         }
 
@@ -479,26 +770,61 @@ class Prover{
 
         //Given the last transaction to the SC get the last block containing the invocation (newest root)
         //{blockHeader: blockHeaderContainingTx, txDifficultyMPTProof: txProof}
-        var rootSC = await this.BlockManager.getMMRRootBlockHeaderAndProof(this.txHashArray[lastIdxTxArray]);
+        var rootSC = await this.BlockManager.getMMRRootBlockHeaderAndProof(version.lastTxHash);
+        if(trace != null) trace.mark('receiptProof');
         //adding a new field: the Difficulty node of the root
         //used since it in the block there is only the hash
         
         //STEP 2: From the local MMR tree get the full MMR root (in the receipt there is only the hash of the MMR root)
         //get the mmr root
-        var rootDifficultyLocal = this.mmr.getRoot();
+        var rootDifficultyLocal = version.root;
         rootSC.rootDifficultyNode = rootDifficultyLocal;
+        if(trace != null) trace.mark('mmrRoot');
 
         return rootSC;
     }
 
 
     /**
-     * Given the transaction hash it gives back the index of the block containing it
+     * Given the transaction hash it gives back the index of the block containing it.
+     * The node is asked only for the transactions that are not SC invocations of the MMR
+     * and are not in the cache (the blocks covered by the MMR are confirmed, so they are cached)
      * @param {*} txHash 
-     * @returns block idx containing the selected transaction
+     * @returns block idx containing the selected transaction (-1 if it does not exist)
      */
      async getBlockIdxPerTransaction(txHash){
-        return await this.BlockManager.getTxBlock(txHash)
+        let txBlockIdx = this.index.getTxBlockIdx(this.index.getLeafIdxFromTxHash(txHash));
+        if(txBlockIdx != -1)
+            return txBlockIdx;
+        let txHashKey = String(txHash).toLowerCase();
+        txBlockIdx = this.txBlockCache.get(txHashKey);
+        if(txBlockIdx != undefined)
+            return txBlockIdx;
+        txBlockIdx = await this.BlockManager.getTxBlock(txHash);
+        if(txBlockIdx >= 0 && this.findLeafIdxFromBlock(txBlockIdx) != -1)
+            this.txBlockCache.set(txHashKey, txBlockIdx);
+        return txBlockIdx;
+    }
+
+    /**
+     * Size of the local MMR and synchronization lag (used by the metrics of the REST server)
+     * @returns {leafs:, nodes:, version: number of the MMR version (see publishVersion), syncing: true if the MMR is being updated,
+     *           lastSyncError: message of the last failed synchronization (null if it succeeded),
+     *           latestConfirmedBlockIdx: next block to synchronize, lastConfirmedBlockInChain:,
+     *           syncLagBlocks: confirmed blocks not synchronized yet}
+     */
+    async getStatus(){
+        let nodes = this.mmr.getNumberOfNodesEachLevel().reduce((sum, levelNodes) => sum + levelNodes, 0);
+        let version = this.version;
+        let lastConfirmedBlockInChain = await this.BlockManager.getLastConfirmedBlockIdx();
+        return {leafs: version.lastLeafIdx + 1,
+                nodes: nodes,
+                version: version.number,
+                syncing: this.syncing != null,
+                lastSyncError: this.lastSyncError,
+                latestConfirmedBlockIdx: this.latestConfirmedBlockIdx,
+                lastConfirmedBlockInChain: lastConfirmedBlockInChain,
+                syncLagBlocks: Math.max(0, lastConfirmedBlockInChain + 1 - this.latestConfirmedBlockIdx)};
     }
 
     /**
@@ -526,62 +852,61 @@ class Prover{
      * +    the Patricia Proof of the txHash 
      * +    the proof that the leaf belongs to the Difficulty mmr tree
      * @param {*} relativeDifficulty number from 0 to 1
+     * @param trace optional Trace (see getLeafAndProof)
      * @returns proof of a leaf 
      */
-    async getLeafAndProofFromDifficulty(relativeDifficulty){
+    async getLeafAndProofFromDifficulty(relativeDifficulty, trace = null){
         console.log("   Retreiving leaf from difficulty... ")
         //leafValue = {leafHashValue: , leafDifficulty: , leafIdx: }
         var leafIdx = this.mmr.getLeafFromDifficulty(relativeDifficulty);
         //console.log(leafValue)
         console.log("Leaf associated with target difficulty value")
+        if(trace != null) trace.mark('leafLookup');
         //{leafHashValue: , leafDifficulty: , leafIdx: }
-        return await this.getLeafAndProof(leafIdx);
+        return await this.getLeafAndProof(leafIdx, trace);
     }
 
     /**
      * From blockIndex to full proof
      * @param {*} blockIdx block index of which the proof is requested 
+     * @param trace optional Trace (see getLeafAndProof)
      * @returns Proof 
      */
-    async getLeafAndProofFromBlockIdx(blockIdx){
+    async getLeafAndProofFromBlockIdx(blockIdx, trace = null){
         //find in the leaf that covers this block
         var leafIdx = this.findLeafIdxFromBlock(blockIdx);
-        if(this.blocksIdxLeaf[leafIdx]['firstBlockIdx'] > blockIdx 
-        ||
-        this.blocksIdxLeaf[leafIdx]['firstBlockIdx'] + this.blocksIdxLeaf[leafIdx]['numberOfBlocks'] <= blockIdx  )
+        if(leafIdx == -1)
             return {error: "Block is not covered by the tree"}
+        if(trace != null) trace.mark('leafLookup');
         //var leaf = this.mmr.getLeafFromIdx(leafIdx);
-        return await this.getLeafAndProof(leafIdx);
+        return await this.getLeafAndProof(leafIdx, trace);
     }
 
     //RX: this is the last step of the algorithm -> from the tx the user is interested on provide the proof
     /**
      * TODO: Here maybe an error test on browser
      * @param {*} txHash txHash of a transaction that prover wants to verify
+     * @param trace optional Trace (see getLeafAndProof)
      * @returns  Proof of leaf containing the block containing that transaction
      */
-    async getLeafAndProofFromTxHash(txHash){
+    async getLeafAndProofFromTxHash(txHash, trace = null){
         //Get block where the transaction hash is
-        var blockIdx = await this.BlockManager.getTxBlock(txHash);
+        var blockIdx = await this.getBlockIdxPerTransaction(txHash);
         if(blockIdx < 0){
             return {"error":"The transaction selected doesn't exist in the chain"}
         }
         console.log("TxFound at block " + blockIdx)
-        //Get leaf where the Block is - from this.blocksIdxLeaf
-        var leafIdx = this.findLeafIdxFromBlock(blockIdx);
-
         //check if the leaf exists
-        if(this.blocksIdxLeaf[leafIdx] == null){
+        if(this.index.numberOfLeafs == 0){
             return {"error":"the prover has an empty MMR stored - try another prover or try later"}
         }        
-        //check if the block index is covered by the tree 
-        //above first leaf
-        if(this.blocksIdxLeaf[leafIdx]['firstBlockIdx'] > blockIdx 
-            ||
-           this.blocksIdxLeaf[leafIdx]['firstBlockIdx'] + this.blocksIdxLeaf[leafIdx]['numberOfBlocks'] <= blockIdx  )
+        //Get leaf where the Block is (-1 if the block index is not covered by the tree)
+        var leafIdx = this.findLeafIdxFromBlock(blockIdx);
+        if(leafIdx == -1)
            return {error: "Block is not covered by the tree"}
+        if(trace != null) trace.mark('leafLookup');
         //var leaf = this.mmr.getLeafFromIdx(leafIdx);
-        return await this.getLeafAndProof(leafIdx);
+        return await this.getLeafAndProof(leafIdx, trace);
 
     }
 
@@ -591,40 +916,76 @@ class Prover{
 //////////////////////////////////////// UTILITIES ////////////////////////////////////////////////////
     
     /**
-     * Format Information
-     * this.blocksIdxLeaf {firstBlockIdx: firstBlockIdx, numberOfBlocks: numberOfBlocks }
+     * Binary search on the block ranges of the leafs (see ProverIndex)
      * @param {*} blockIdx Index of block to find
-     * @returns Index of leaf containing that block
+     * @returns Index of leaf containing that block, -1 if the block is not covered by the tree
      */
     findLeafIdxFromBlock(blockIdx){
-        let arr = this.blocksIdxLeaf;
-        let start=0, end= arr.length-1;
-        let mid = -1;
-        // Iterate while start not meets end
-        while (start<=end){
-            // Find the mid index
-            mid=Math.floor((start + end)/2);
-            // If element is present at mid, return True
-            if (parseInt(arr[mid]['firstBlockIdx']) == blockIdx ) return mid;
-
-            // Else look in left or right half accordingly          
-            if (parseInt( arr[mid]['firstBlockIdx'] ) < blockIdx)
-                 start = mid + 1;
-            else
-                 end = mid - 1;
-        }
-      
-        return mid;
+        return this.index.getLeafIdxFromBlock(blockIdx);
     }
     
 
 
     /**
      * 
+     * @param {*} firstLeafIdx first leaf returned (default the first leaf of the MMR)
+     * @param {*} lastLeafIdx last leaf returned (default the last leaf of the MMR)
      * @returns leaves of local mmr
      */
-    getLocalMMRLeafs(){
-        return {leafs: this.mmr.getLeafArray()};
+    getLocalMMRLeafs(firstLeafIdx = 0, lastLeafIdx = this.mmr.getLastLeafIndex()){
+        return {leafs: this.mmr.getLeafArray().slice(firstLeafIdx, lastLeafIdx + 1)};
+    }
+
+    /**
+     * A leaf with the blocks it covers and the SC invocation that added it
+     * (element of the leaf pages and streams of the REST API)
+     * @param {*} leafIdx index of the leaf
+     * @returns {leafIdx:, leaf: DifficultyNode, firstBlockIdx:, numberOfBlocks:, txHash: SC invocation}
+     */
+    getLeafRecord(leafIdx){
+        return {leafIdx: leafIdx,
+                leaf: this.mmr.getNodeValue(leafIdx, 0),
+                firstBlockIdx: this.index.firstBlocks[leafIdx],
+                numberOfBlocks: this.index.numberOfBlocks[leafIdx],
+                txHash: this.txHashArray[leafIdx + 1]};
+    }
+
+    /**
+     * Leafs selected by a range query, all the bounds are optional and included:
+     * @param {*} range {fromLeaf:, toLeaf:   leaf indexes
+     *                   fromBlock:, toBlock: the leafs covering at least one of the blocks
+     *                   cursor:              first leaf not received yet (nextCursor of getLeafsPage)}
+     * @returns [first leaf index, last leaf index] (first > last if no leaf is selected)
+     */
+    getLeafIdxRange(range){
+        let lastLeafIdx = this.mmr.getLastLeafIndex();
+        let first = Math.max(range.fromLeaf || 0, range.cursor || 0);
+        let last = range.toLeaf != undefined ? Math.min(range.toLeaf, lastLeafIdx) : lastLeafIdx;
+        if(range.fromBlock != undefined || range.toBlock != undefined){
+            let blocksRange = this.index.getLeafIdxRangeFromBlocks(range.fromBlock || 0,
+                                  range.toBlock != undefined ? range.toBlock : Infinity);
+            first = Math.max(first, blocksRange[0]);
+            last = Math.min(last, blocksRange[1]);
+        }
+        return [first, last];
+    }
+
+    /**
+     * Page of a range query. The leafs are never removed or moved, so the cursor
+     * (index of the next leaf) stays valid while the MMR grows
+     * @param {*} range see getLeafIdxRange
+     * @param {*} limit maximum number of leafs in the page
+     * @returns {lastLeafIdx: last leaf of the MMR, leafs: [getLeafRecord],
+     *           nextCursor: cursor of the next page (null if this is the last page)}
+     */
+    getLeafsPage(range, limit){
+        let [first, last] = this.getLeafIdxRange(range);
+        let end = Math.min(last + 1, first + limit);
+        let leafs = [];
+        for(let leafIdx = first; leafIdx < end; leafIdx++){
+            leafs.push(this.getLeafRecord(leafIdx));
+        }
+        return {lastLeafIdx: this.mmr.getLastLeafIndex(), leafs: leafs, nextCursor: end <= last ? end : null};
     }
 
 
@@ -637,22 +998,22 @@ class Prover{
     }
 
     ///////////////////////////////////// SERIALIZATIONS /////////////////////////////////////////
-    serializeMMR(){
-        fs.writeFile('./Memory/mmrStored.json', JSON.stringify(this.mmr), { flag: 'w' }, function(err) {
-            console.log(err);
-        })
-        
-    }
-    serializeTxHashArray(){
-        fs.writeFile('./Memory/txHashArray.json', JSON.stringify(this.txHashArray), { flag: 'w' }, function(err) {
-            console.log(err);
-        })
+    /**
+     * Append the last leaf of the MMR (and its block indexes and txHash) to the stored log
+     * @param {*} txHash hash of the SC invocation containing the leaf
+     * @param {*} txBlockIdx block containing the SC invocation
+     */
+    storeLeaf(txHash, txBlockIdx){
+        if(this.store != null)
+            this.store.appendLeaf(this.mmr, this.blocksIdxLeaf[this.blocksIdxLeaf.length - 1], txHash, txBlockIdx);
     }
 
-    serializeBlocksIdxLeaf(){
-        fs.writeFile('./Memory/blocksIdxLeaf.json', JSON.stringify(this.blocksIdxLeaf), { flag: 'w' }, function(err) {
-            console.log(err);
-        })
+    /**
+     * Record in the stored log the block from which the next synchronization starts
+     */
+    storeCheckpoint(){
+        if(this.store != null)
+            this.store.checkpoint(this.latestConfirmedBlockIdx, this.blocksIdxLeaf.length);
     }
     ///////////////////////////////////////////////////////////////////////////////////////////////
 ///////////////////////////////////////////////////////////////////////////////////////////////////
@@ -667,27 +1028,24 @@ class Prover{
      */
     fillDummyMMR(numberOfBlocksPerLeaf, chainLength){
         console.log("--- FILLING DUMMY TREE");
-        //reset the MMR
-        this.mmr = new DifficultyMMRTree([[]]);
         // let numberOfBlocksSimulation = chainLength
         let numberOfLeafs = Math.ceil(chainLength/numberOfBlocksPerLeaf)
-        //fill a dummy mmr tree
-        for(let i = 0; i < numberOfLeafs; i++){
-            //dummy leaf to be added
-            let dummyLeaf = new DifficultyNode(
-                {
-                    peak: "0xf6a1b2e3501f269e6acbd476ab5a1702679cdd29be4bc7cc9bc9031f90105ad5",
-                    tFirstBlock: 1,
-                    tLastBlock: 1,
-                    dFirstBlock: 1,
-                    dLastBlock: 1,
-                    nodeDifficulty: numberOfBlocksPerLeaf,
-                    numberOfBlocksCoverd: numberOfBlocksPerLeaf
-                }
-            );  
-            //console.log(dummyLeaf)
-            this.mmr.addLeaf(dummyLeaf)
-        }
+        //dummy leaf repeated in all the tree
+        let dummyLeaf = new DifficultyNode(
+            {
+                peak: "0xf6a1b2e3501f269e6acbd476ab5a1702679cdd29be4bc7cc9bc9031f90105ad5",
+                tFirstBlock: 1,
+                tLastBlock: 1,
+                dFirstBlock: 1,
+                dLastBlock: 1,
+                nodeDifficulty: numberOfBlocksPerLeaf,
+                numberOfBlocksCoverd: numberOfBlocksPerLeaf
+            }
+        );
+        //reset the MMR - all the subtrees with the same height are equal
+        //so they are shared (O(log n) hashes, same root and proofs)
+        this.mmr = new SyntheticDifficultyMMRTree(dummyLeaf, numberOfLeafs);
+        this.publishVersion();
     }
 
     /**
@@ -926,13 +1284,14 @@ class Prover{
 
     /**
      * @param {*} L_n difficulty already checked with L
+     * @param {*} random PRNG returning numbers in [0, 1) (default: global Math.random)
      * @returns random number from 0 to 1 to sample
      */
-    randomSampler(L_n){
+    randomSampler(L_n, random = Math.random){
         //generate a random number from 0 to 1 
         // using the current time as seed (From documentation)
         // generate random number between [0, 1-L_n)
-        var y = Math.random();
+        var y = random();
         //CDF from g(x)
         var fraction_of_difficulty = 1 - L_n**y;
         //console.log(fraction_of_difficulty)
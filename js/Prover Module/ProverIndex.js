@@ -0,0 +1,119 @@
+/**
+ * In-memory indexes of the leafs of the Prover MMR, filled while the leafs are synchronized
+ * (or loaded from the ProverStore log) so that no lookup scans the leafs or asks the node:
+ *  leaf hash (peak) -> leaf index                         Map, O(1)
+ *  txHash of the SC invocation -> leaf index it added     Map, O(1)
+ *  block index -> leaf index covering it                  binary search on typed arrays, O(log n)
+ * The leafs cover consecutive block ranges, so the first blocks are sorted.
+ */
+class ProverIndex{
+
+    constructor(initialCapacity = 1024){
+        this.numberOfLeafs = 0;
+        //first block and number of blocks covered by each leaf (block numbers are below 2^53)
+        this.firstBlocks = new Float64Array(initialCapacity);
+        this.numberOfBlocks = new Float64Array(initialCapacity);
+        //block containing the SC invocation that added each leaf (NaN if unknown)
+        this.txBlocks = new Float64Array(initialCapacity);
+        this.leafIdxByHash = new Map();
+        this.leafIdxByTxHash = new Map();
+    }
+
+    /**
+     * Index the next leaf of the MMR
+     * @param {*} leafHash peak of the leaf
+     * @param {*} blocksInfo {firstBlockIdx:, numberOfBlocks:} of the leaf
+     * @param {*} txHash hash of the SC invocation that added the leaf
+     * @param {*} txBlockIdx block containing the SC invocation (undefined if unknown)
+     * @returns index of the leaf
+     */
+    addLeaf(leafHash, blocksInfo, txHash, txBlockIdx){
+        if(this.numberOfLeafs == this.firstBlocks.length)
+            this.grow();
+        let leafIdx = this.numberOfLeafs++;
+        this.firstBlocks[leafIdx] = Number(blocksInfo.firstBlockIdx);
+        this.numberOfBlocks[leafIdx] = Number(blocksInfo.numberOfBlocks);
+        this.txBlocks[leafIdx] = txBlockIdx != undefined ? Number(txBlockIdx) : NaN;
+        //the same leaf can be added more than once: the first one is returned (as a scan would)
+        let hashKey = String(leafHash).toLowerCase();
+        if(!this.leafIdxByHash.has(hashKey))
+            this.leafIdxByHash.set(hashKey, leafIdx);
+        if(txHash != null)
+            this.leafIdxByTxHash.set(txHash.toLowerCase(), leafIdx);
+        return leafIdx;
+    }
+
+    grow(){
+        for(let name of ['firstBlocks', 'numberOfBlocks', 'txBlocks']){
+            let grown = new Float64Array(this[name].length * 2);
+            grown.set(this[name]);
+            this[name] = grown;
+        }
+    }
+
+    /**
+     * @returns index of the leaf with peak leafHash, -1 if not in the MMR
+     */
+    getLeafIdxFromHash(leafHash){
+        let leafIdx = this.leafIdxByHash.get(String(leafHash).toLowerCase());
+        return leafIdx != undefined ? leafIdx : -1;
+    }
+
+    /**
+     * @returns index of the leaf added by the SC invocation txHash, -1 if it is not an invocation of the MMR
+     */
+    getLeafIdxFromTxHash(txHash){
+        let leafIdx = this.leafIdxByTxHash.get(String(txHash).toLowerCase());
+        return leafIdx != undefined ? leafIdx : -1;
+    }
+
+    /**
+     * @returns block containing the SC invocation that added the leaf, -1 if unknown
+     */
+    getTxBlockIdx(leafIdx){
+        if(leafIdx < 0 || leafIdx >= this.numberOfLeafs || Number.isNaN(this.txBlocks[leafIdx]))
+            return -1;
+        return this.txBlocks[leafIdx];
+    }
+
+    /**
+     * @param {*} blockIdx index of a block
+     * @returns index of the leaf covering the block, -1 if the block is not covered by the MMR
+     */
+    getLeafIdxFromBlock(blockIdx){
+        //last leaf with firstBlock <= blockIdx
+        let leafIdx = this.countLeafsFromBlock(blockIdx) - 1;
+        if(leafIdx < 0 || blockIdx >= this.firstBlocks[leafIdx] + this.numberOfBlocks[leafIdx])
+            return -1;
+        return leafIdx;
+    }
+
+    /**
+     * Leafs covering at least one block of [fromBlock, toBlock]
+     * @returns [first leaf index, last leaf index] (first > last if there are none)
+     */
+    getLeafIdxRangeFromBlocks(fromBlock, toBlock){
+        let firstLeafIdx = Math.max(this.countLeafsFromBlock(fromBlock) - 1, 0);
+        if(firstLeafIdx < this.numberOfLeafs &&
+           fromBlock >= this.firstBlocks[firstLeafIdx] + this.numberOfBlocks[firstLeafIdx])
+            firstLeafIdx++;
+        return [firstLeafIdx, this.countLeafsFromBlock(toBlock) - 1];
+    }
+
+    /**
+     * @returns number of leafs with first block <= blockIdx (binary search)
+     */
+    countLeafsFromBlock(blockIdx){
+        let start = 0, end = this.numberOfLeafs;
+        while(start < end){
+            let mid = (start + end) >>> 1;
+            if(this.firstBlocks[mid] <= blockIdx)
+                start = mid + 1;
+            else
+                end = mid;
+        }
+        return start;
+    }
+}
+
+module.exports = ProverIndex
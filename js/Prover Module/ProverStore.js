@@ -0,0 +1,151 @@
+//libraries required
+const fs = require('fs');
+const path = require('path');
+const DifficultyNode = require('./DifficultyNode');
+const DifficultyMMRTree = require('./DifficultyMMR');
+const ProverIndex = require('./ProverIndex');
+
+/**
+ * Append-only log of the Prover state (one JSON record per line):
+ *  {"leaf": idx, "nodes": [...], "blocks": [firstBlockIdx, numberOfBlocks], "txHash": ..., "txBlock": ...}
+ *      "nodes" are the permanent DifficultyNodes (tuple format) created by the leaf:
+ *      nodes[i] is the node at level i (the leaf itself and its completed parents),
+ *      so a record is O(log n) bytes and the provisory nodes are never written
+ *      "txBlock" is the block containing the SC invocation (missing in older logs)
+ *  {"checkpoint": latestConfirmedBlockIdx, "leafs": number of leafs}
+ *      written at the end of every chain synchronization
+ * On load the records after the last checkpoint (an interrupted synchronization)
+ * are dropped: the Prover resumes the synchronization from the checkpoint block.
+ */
+class ProverStore{
+
+    /**
+     * @param {*} logPath file of the log (created with its directory if missing)
+     */
+    constructor(logPath){
+        this.logPath = logPath;
+        this.fd = null;
+    }
+
+    /**
+     * Rebuild the Prover state from the log
+     * @returns {mmr: DifficultyMMRTree, txHashArray:, blocksIdxLeaf:, index: ProverIndex of the leafs,
+     *           latestConfirmedBlockIdx:}
+     */
+    load(){
+        let levels = [[]];
+        let leafRecords = [];
+        let blocksIdxLeaf = [];
+        let txHashArray = [null];
+        let index = new ProverIndex();
+        let latestConfirmedBlockIdx = 0;
+
+        let data = fs.existsSync(this.logPath) ? fs.readFileSync(this.logPath) : Buffer.alloc(0);
+        //records not yet covered by a checkpoint
+        let pending = [];
+        let checkpointOffset = 0;
+        let lineStart = 0;
+        let lineEnd;
+        //the last line of an interrupted append has no '\n'
+        while((lineEnd = data.indexOf(10, lineStart)) != -1){
+            let record = JSON.parse(data.toString('utf8', lineStart, lineEnd));
+            lineStart = lineEnd + 1;
+            if(record.checkpoint == undefined){
+                pending.push(record);
+                continue;
+            }
+            for(let i = 0; i < pending.length; i++){
+                let nodes = pending[i].nodes;
+                for(let level = 0; level < nodes.length; level++){
+                    if(levels[level] == undefined)
+                        levels.push([]);
+                    levels[level].push(this.fromTuple(nodes[level]));
+                }
+                leafRecords.push(pending[i]);
+                blocksIdxLeaf.push({firstBlockIdx: pending[i].blocks[0], numberOfBlocks: pending[i].blocks[1]});
+                txHashArray.push(pending[i].txHash);
+                //nodes[0] is the leaf, its peak is the leaf hash
+                index.addLeaf(nodes[0][0], blocksIdxLeaf[blocksIdxLeaf.length - 1], pending[i].txHash, pending[i].txBlock);
+            }
+            pending = [];
+            latestConfirmedBlockIdx = record.checkpoint;
+            checkpointOffset = lineStart;
+        }
+        if(checkpointOffset != data.length){
+            fs.mkdirSync(path.dirname(this.logPath), {recursive: true});
+            fs.truncateSync(this.logPath, checkpointOffset);
+        }
+        return {mmr: this.buildMMR(levels, leafRecords), txHashArray: txHashArray,
+                blocksIdxLeaf: blocksIdxLeaf, index: index, latestConfirmedBlockIdx: latestConfirmedBlockIdx};
+    }
+
+    /**
+     * The permanent nodes are the tree without the provisory nodes: the last leaf
+     * is removed and added again to compute the provisory nodes (O(log n) hashes)
+     */
+    buildMMR(levels, leafRecords){
+        if(leafRecords.length == 0)
+            return new DifficultyMMRTree([[]]);
+        let lastLeafNodes = leafRecords[leafRecords.length - 1].nodes;
+        for(let level = 0; level < lastLeafNodes.length; level++){
+            levels[level].pop();
+        }
+        while(levels.length > 1 && levels[levels.length - 1].length == 0){
+            levels.pop();
+        }
+        let leafInfoArray = [];
+        let totalDifficulty = 0;
+        for(let i = 0; i < levels[0].length; i++){
+            totalDifficulty += levels[0][i].getNodeDifficulty();
+            leafInfoArray.push(totalDifficulty);
+        }
+        let mmr = new DifficultyMMRTree(levels, leafInfoArray);
+        mmr.addLeaf(this.fromTuple(lastLeafNodes[0]));
+        return mmr;
+    }
+
+    fromTuple(tuple){
+        let node = new DifficultyNode();
+        node.fromArrayToMMRNode(tuple);
+        return node;
+    }
+
+    /**
+     * Append the last leaf added to mmr
+     * @param {*} mmr DifficultyMMRTree the leaf has been added to
+     * @param {*} blocksInfo {firstBlockIdx:, numberOfBlocks:} of the leaf
+     * @param {*} txHash hash of the SC invocation containing the leaf
+     * @param {*} txBlockIdx block containing the SC invocation (not written if undefined)
+     */
+    appendLeaf(mmr, blocksInfo, txHash, txBlockIdx){
+        let numberOfLeafs = mmr.getLastLeafIndex() + 1;
+        let nodes = [];
+        //the node at level i is completed when the number of leafs is a multiple of 2^i
+        for(let level = 0; level < mmr.tree.length && numberOfLeafs % (2 ** level) == 0; level++){
+            nodes.push(mmr.getNodeValue(numberOfLeafs / (2 ** level) - 1, level).toTuple());
+        }
+        this.write({leaf: numberOfLeafs - 1, nodes: nodes,
+                    blocks: [blocksInfo.firstBlockIdx, blocksInfo.numberOfBlocks], txHash: txHash,
+                    txBlock: txBlockIdx});
+    }
+
+    /**
+     * Make the leafs appended since the last checkpoint permanent
+     * @param {*} latestConfirmedBlockIdx block from which the synchronization restarts
+     * @param {*} numberOfLeafs leafs in the MMR
+     */
+    checkpoint(latestConfirmedBlockIdx, numberOfLeafs){
+        this.write({checkpoint: latestConfirmedBlockIdx, leafs: numberOfLeafs});
+        fs.fsyncSync(this.fd);
+    }
+
+    write(record){
+        if(this.fd == null){
+            fs.mkdirSync(path.dirname(this.logPath), {recursive: true});
+            this.fd = fs.openSync(this.logPath, 'a');
+        }
+        fs.writeSync(this.fd, JSON.stringify(record) + "\n");
+    }
+}
+
+module.exports = ProverStore
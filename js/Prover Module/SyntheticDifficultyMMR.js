@@ -0,0 +1,214 @@
+//Difficulty MMR made of identical leaves (the dummy MMR used by the proof simulations)
+//All the perfect subtrees of the same height are identical, so only one node
+//per height is stored and merged: filling a tree of n leaves costs O(log n)
+//hashes and O(log n) memory instead of n DifficultyNodes and n merges.
+//Roots and proofs are the same of a DifficultyMMRTree filled leaf by leaf.
+//NOTE: the tree is not stored level by level, so it cannot be serialized
+//and loaded back as a DifficultyMMRTree
+
+//libraries required
+const DifficultyMMRTree = require('./DifficultyMMR')
+
+
+class SyntheticDifficultyMMRTree extends DifficultyMMRTree{
+    /**
+     * @param {*} leaf DifficultyNode repeated in every leaf
+     * @param {*} numberOfLeafs number of leaves of the tree
+     */
+    constructor(leaf, numberOfLeafs = 0){
+        super(null);
+        this.leaf = leaf;
+        //subtrees[h] is the root of a perfect subtree of 2^h leaves
+        this.subtrees = [leaf];
+        this.numberOfLeafs = 0;
+        //provisory nodes: level -> DifficultyNode (root included)
+        this.provisoryNodes = {};
+        this.addLeafs(numberOfLeafs);
+    }
+
+    // ********************** GET TREE INFORMATION **********************************
+
+    getLastLeafIndex(){
+        return this.numberOfLeafs - 1;
+    }
+
+    getLevelOddElements(){
+        return this.levels_odd_elements;
+    }
+
+    getLeafIndex(hashed_value){
+        if(this.numberOfLeafs > 0 && this.leaf.peak == hashed_value)
+            return 0;
+        return -1;
+    }
+
+    getNodeValue(index, level = 0){
+        if(index >= 0 && index < Math.floor(this.numberOfLeafs / 2**level))
+            return this.subtrees[level];
+        if(index == Math.floor(this.numberOfLeafs / 2**level))
+            return this.provisoryNodes[level];
+        return undefined;
+    }
+
+    getRoot(){
+        if(this.levels_odd_elements.length == 1)
+            return this.subtrees[this.levels_odd_elements[0]];
+        return this.provisoryNodes[this.levels_odd_elements[this.levels_odd_elements.length - 1] + 1];
+    }
+
+    getNumberOfNodesEachLevel(){
+        let number_of_nodes_each_level = []
+        for(let i = 0; i < this.subtrees.length; i++){
+            number_of_nodes_each_level.push(Math.floor(this.numberOfLeafs / 2**i))
+        }
+        for(let level in this.provisoryNodes){
+            if(level < number_of_nodes_each_level.length)
+                number_of_nodes_each_level[level] += 1;
+            else
+                number_of_nodes_each_level.push(1);
+        }
+        return number_of_nodes_each_level;
+    }
+
+    getLeafArray(){
+        return new Array(this.numberOfLeafs).fill(this.leaf);
+    }
+
+    /**
+     * Same as DifficultyMMRTree.getLeafFromDifficulty, the cumulative difficulty
+     * of leaf i is computed as (i+1)*leafDifficulty instead of being stored
+     * @param {*} relativeDifficulty value that goes from 0 to 1
+     * @returns index of the leaf
+     */
+    getLeafFromDifficulty(relativeDifficulty){
+        if(this.numberOfLeafs == 0)
+            return null;
+        let leafDifficulty = this.leaf.getNodeDifficulty();
+        let requestedDifficulty = Math.floor(leafDifficulty * this.numberOfLeafs * relativeDifficulty);
+        //same search of binarySearchClosest
+        let start = 0;
+        let end = this.numberOfLeafs - 1;
+        let mid = 0;
+        while (start <= end) {
+            mid = Math.floor((start + end) / 2);
+            let midDifficulty = leafDifficulty * (mid + 1);
+            if (midDifficulty == requestedDifficulty) {
+                return mid;
+            }
+            if (requestedDifficulty < midDifficulty) {
+                end = mid - 1;
+            } else {
+                start = mid + 1;
+            }
+        }
+        return mid;
+    }
+
+    getLeafFromIdx(indexOfElement){
+        if(indexOfElement >= 0 && indexOfElement < this.numberOfLeafs){
+            return {leafHashValue: this.leaf, leafDifficulty: this.leaf.getNodeDifficulty() * (indexOfElement + 1), leafIdx: indexOfElement}
+        }
+        return {leafHashValue: null, leafDifficulty: null, leafIdx: null};
+    }
+
+    // ********************************* INSERTION ROUTINE *******************************
+
+    /**
+     * Append numberOfLeafs copies of the leaf
+     * @param {*} numberOfLeafs number of leaves to add
+     */
+    addLeafs(numberOfLeafs){
+        this.numberOfLeafs += numberOfLeafs;
+        //levels with an odd number of nodes: bits set in the number of leaves
+        this.levels_odd_elements = [];
+        for(let level = 0; 2**level <= this.numberOfLeafs; level++){
+            if(Math.floor(this.numberOfLeafs / 2**level) % 2 == 1)
+                this.levels_odd_elements.push(level);
+        }
+        //a subtree for every height up to the highest peak
+        let height = this.levels_odd_elements[this.levels_odd_elements.length - 1];
+        while(this.subtrees.length <= height){
+            let lastSubtree = this.subtrees[this.subtrees.length - 1];
+            this.subtrees.push(lastSubtree.mergeNodes(lastSubtree));
+        }
+        //provisory nodes: same merges of DifficultyMMRTree.addLeaf
+        this.provisoryNodes = {};
+        let levels = this.levels_odd_elements;
+        if(levels.length > 1){
+            let hash_odd_leaf = this.subtrees[levels[1]].mergeNodes(this.subtrees[levels[0]]);
+            for(let i = 2; i < levels.length; i++){
+                this.provisoryNodes[levels[i]] = hash_odd_leaf;
+                hash_odd_leaf = this.subtrees[levels[i]].mergeNodes(hash_odd_leaf);
+            }
+            this.provisoryNodes[levels[levels.length - 1] + 1] = hash_odd_leaf;
+        }
+    }
+
+    /**
+     * @param {*} newDifficultyNode must be equal to the leaf of the tree
+     */
+    addLeaf(newDifficultyNode){
+        if(newDifficultyNode.getKeccak256() != this.leaf.getKeccak256())
+            throw new Error("SyntheticDifficultyMMRTree only accepts copies of its leaf");
+        this.addLeafs(1);
+    }
+
+    /**
+     * Same proof of DifficultyMMRTree.getLeafProof computed from the leaf index
+     * @param {*} leaf_index - index of the leaf of which the proof is requested
+     * @returns all DifficultyNodes of the proof
+     */
+    getLeafProof(leaf_index, level = 0){
+        return this.getLeafProofPositions(leaf_index, level).map(
+            (position) => this.getNodeValue(position[1], position[0]));
+    }
+
+    /**
+     * Same positions of DifficultyMMRTree.getLeafProofPositions (resolved by getNodeValue)
+     * @param {*} leaf_index - index of the leaf of which the proof is requested
+     * @param {*} level - first level of the siblings returned
+     * @returns array of [level, index] in the same order of getLeafProof
+     */
+    getLeafProofPositions(leaf_index, level = 0){
+        if(!(Number.isInteger(leaf_index) && leaf_index >= 0 && leaf_index < this.numberOfLeafs))
+            return [];
+        let peakLevel = this.getLeafPeakLevel(leaf_index);
+        return this.getSubtreeProofPositions(leaf_index, level, peakLevel).concat(this.getBaggingProofPositions(peakLevel));
+    }
+
+    /**
+     * @param {*} leaf_index - index of a leaf in the tree
+     * @returns level of the peak covering the leaf: highest bit in which the
+     * leaf index and the number of leaves differ
+     */
+    getLeafPeakLevel(leaf_index){
+        return Math.floor(Math.log2(leaf_index ^ this.numberOfLeafs));
+    }
+
+    /**
+     * Positions of the nodes bagging the peak at peakLevel with the other peaks
+     * (the siblings inside the subtree are the ones of DifficultyMMRTree.getSubtreeProofPositions)
+     * @param {*} peakLevel - level of a peak of the tree
+     * @returns array of [level, index]
+     */
+    getBaggingProofPositions(peakLevel){
+        let proof_nodes = [];
+        let levels = this.levels_odd_elements;
+        if(levels.length > 1){
+            let peakIdx = levels.indexOf(peakLevel);
+            if(peakIdx == 0)
+                proof_nodes.push([levels[1], Math.floor(this.numberOfLeafs / 2**levels[1]) - 1]);
+            else if(peakIdx == 1)
+                proof_nodes.push([levels[0], Math.floor(this.numberOfLeafs / 2**levels[0]) - 1]);
+            else
+                //provisory node merging all the peaks on the right of the peak
+                proof_nodes.push([peakLevel, Math.floor(this.numberOfLeafs / 2**peakLevel)]);
+            for(let j = Math.max(peakIdx, 1) + 1; j < levels.length; j++){
+                proof_nodes.push([levels[j], Math.floor(this.numberOfLeafs / 2**levels[j]) - 1]);
+            }
+        }
+        return proof_nodes;
+    }
+}
+
+module.exports = SyntheticDifficultyMMRTree;
@@ -0,0 +1,95 @@
+//libraries required
+const { Worker } = require('worker_threads');
+
+/**
+ * Fixed size pool of worker threads running the tasks of a worker script (e.g. ProofWorker.js).
+ * The tasks wait in a FIFO queue while all the workers are busy. The workers are created
+ * by the first tasks and keep the process alive only while they are running a task.
+ */
+class WorkerPool{
+
+    /**
+     * @param {*} scriptPath worker script (answers {name:, args:} with {result:} or {error:})
+     * @param {*} size maximum number of workers
+     */
+    constructor(scriptPath, size){
+        this.scriptPath = scriptPath;
+        this.size = size;
+        this.numberOfWorkers = 0;
+        this.idleWorkers = [];
+        //{task:, resolve:, reject:} waiting for a worker
+        this.queue = [];
+        this.busy = 0;
+        this.completed = 0;
+        this.failed = 0;
+    }
+
+    /**
+     * @param {*} name function of the worker script
+     * @param {*} args arguments of the function (copied to the worker)
+     * @returns promise of the result of the function
+     */
+    run(name, args){
+        return new Promise((resolve, reject) => {
+            this.queue.push({task: {name: name, args: args}, resolve: resolve, reject: reject});
+            this.schedule();
+        });
+    }
+
+    schedule(){
+        while(this.queue.length > 0){
+            let worker = this.idleWorkers.pop();
+            if(worker == undefined){
+                if(this.numberOfWorkers >= this.size)
+                    return;
+                worker = this.newWorker();
+            }
+            worker.job = this.queue.shift();
+            this.busy++;
+            worker.ref();
+            worker.postMessage(worker.job.task);
+        }
+    }
+
+    newWorker(){
+        let worker = new Worker(this.scriptPath);
+        worker.job = null;
+        this.numberOfWorkers++;
+        worker.on('message', (message) => {
+            let job = worker.job;
+            worker.job = null;
+            this.busy--;
+            worker.unref();
+            this.idleWorkers.push(worker);
+            if(message.error != undefined){
+                this.failed++;
+                job.reject(new Error(message.error));
+            } else{
+                this.completed++;
+                job.resolve(message.result);
+            }
+            this.schedule();
+        });
+        //a worker that stops is replaced by the next task
+        worker.on('exit', () => {
+            this.numberOfWorkers--;
+            this.idleWorkers = this.idleWorkers.filter((idleWorker) => idleWorker !== worker);
+            if(worker.job != null){
+                this.busy--;
+                this.failed++;
+                worker.job.reject(new Error("worker stopped"));
+                worker.job = null;
+            }
+            this.schedule();
+        });
+        worker.on('error', (err) => console.log("   [WORKER ERROR]", err));
+        return worker;
+    }
+
+    toJSON(){
+        return {size: this.size, workers: this.numberOfWorkers, busy: this.busy, queued: this.queue.length,
+                completed: this.completed, failed: this.failed};
+    }
+}
+
+module.exports = WorkerPool
@@ -1,22 +1,23 @@
 // ************ INITIALIZATION AND REQUIREMENTS ***************
 const Web3 = require('web3');
 
-//import merkle-patricia-tree
-const Tree = require('merkle-patricia-tree').BaseTrie
-
 // FOR LEGACY MERKLE-PATRICIA-TREE
 //Rpc import
 const Rpc  = require('isomorphic-rpc')
-//For ethereum structure
-const { Receipt } = require('eth-object')
 // Recursive Length Prefix - for data encoding and encoding
 const rlp = require('rlp')
-// Ethereum Encoder
-const { encode } = require('eth-util-lite')
 //////
+// Receipt tries and proofs (built by the worker threads)
+const path = require('path');
+const ProofWorker = require('./ProofWorker');
+const WorkerPool = require('./WorkerPool');
 
 // For File System management
 const fs = require('fs');
+// Cache of the formatted block headers
+const LRUCache = require('./LRUCache');
+// RPC latencies and cache hit rates
+const { Metrics, elapsedMs } = require('./Metrics');
 
 const abiDecoder = require('abi-decoder');
 // ************************************************************** 
@@ -25,6 +26,9 @@ const abiDecoder = require('abi-decoder');
 
 //Configuration file
 var JSONConfiguration = JSON.parse(fs.readFileSync("./configuration_smartcontract_invocation.json"));
+//the provider can be overridden (e.g. one ganache instance per gas benchmark worker)
+if(process.env.SMARTFLY_PROVIDER != undefined)
+    JSONConfiguration['provider'] = process.env.SMARTFLY_PROVIDER;
 
 //Since every prover is a full node the provider 
 const provider  = JSONConfiguration['provider'];
@@ -34,6 +38,22 @@ const confirmationBlocks = JSONConfiguration['confirmationBlocks'];
 const web3 = new Web3(JSONConfiguration['provider']);
 //Gas limit for each block
 const gasLimitAppend = JSONConfiguration['gasLimit'];
+//Blocks requested in a single JSON-RPC batch request
+const blocksPerBatch = JSONConfiguration['blocksPerBatch'] || 128;
+//Batch requests in flight at the same time
+const maxConcurrentBatches = JSONConfiguration['maxConcurrentBatches'] || 4;
+//Formatted block headers kept in memory (only confirmed blocks, they never change)
+const headerCacheSize = JSONConfiguration['headerCacheSize'] != undefined ? JSONConfiguration['headerCacheSize'] : 16384;
+//Receipt proofs kept in memory (by txHash, only confirmed transactions)
+const receiptProofCacheSize = JSONConfiguration['receiptProofCacheSize'] != undefined ? JSONConfiguration['receiptProofCacheSize'] : 8192;
+//Receipt tries kept in memory (by block hash)
+const receiptTrieCacheSize = JSONConfiguration['receiptTrieCacheSize'] != undefined ? JSONConfiguration['receiptTrieCacheSize'] : 64;
+//Worker threads building the receipt tries (0: built in the main thread)
+const proofWorkers = JSONConfiguration['proofWorkers'] != undefined ? JSONConfiguration['proofWorkers'] : 2;
+//Blocks of a getPastEvents request during the synchronization
+const eventsWindowBlocks = JSONConfiguration['eventsWindowBlocks'] || 2000;
+//getTransaction requests in flight at the same time during the synchronization
+const maxConcurrentTransactions = JSONConfiguration['maxConcurrentTransactions'] || 16;
 //Set BlockManger in untrusted mode or partially-trusted mode
 const scenario = JSONConfiguration['scenario'];
 //Initialize where .json of smart contract can be found - smart contract structure
@@ -48,7 +68,10 @@ if(scenario == "untrusted"){
 
 class BlockManager{
 
-    constructor(id, address){
+    /**
+     * @param {*} metrics Metrics where the RPC calls and the caches are recorded (see Metrics.js)
+     */
+    constructor(id, address, metrics = new Metrics()){
         //get all the network information
         this.id = id;
         this.deployedNetwork = SmartFliesJson.networks[id];
@@ -64,6 +87,21 @@ class BlockManager{
         //to format back tx data from data extracted from the chain
         abiDecoder.addABI(SmartFliesJson.abi);
         this.rpc = new Rpc(provider);
+        //block index -> Block2_formatted of the confirmed blocks
+        this.headerCache = new LRUCache(headerCacheSize);
+        //txHash -> promise of {proof:, blockNumber:, confirmed:} (see getReceiptProofEntry)
+        this.receiptProofCache = new LRUCache(receiptProofCacheSize);
+        //block hash -> promise of the receipt proofs of the block (see buildBlockReceiptProofs)
+        this.receiptTrieCache = new LRUCache(receiptTrieCacheSize);
+        //the tries are built out of the event loop serving the requests
+        this.proofWorkerPool = proofWorkers > 0 ? new WorkerPool(path.join(__dirname, 'ProofWorker.js'), proofWorkers) : null;
+
+        this.metrics = metrics;
+        this.metrics.registerCache('headers', this.headerCache);
+        this.metrics.registerCache('receiptProofs', this.receiptProofCache);
+        this.metrics.registerCache('receiptTries', this.receiptTrieCache);
+        if(this.proofWorkerPool != null)
+            this.metrics.registerWorkerPool('proofWorkers', this.proofWorkerPool);
     }
 
     /**
@@ -303,25 +341,89 @@ class BlockManager{
      * Invocate MMR Smart Contract to know the last seen block
      */
     async getLastBlockIndex(){
-        return await this.MMRContract.methods.getLastBlockNumber().call();
+        return await this.metrics.timeRpc('eth_call', this.MMRContract.methods.getLastBlockNumber().call());
+    }
+
+
+    /**
+     * @returns index of the last block of the chain considered confirmed
+     */
+    async getLastConfirmedBlockIdx(){
+        return await this.metrics.timeRpc('eth_blockNumber', web3.eth.getBlockNumber()) - confirmationBlocks;
     }
 
 
     /**
-     * Get array of blocks from the Blockchain 
+     * Get array of blocks from the Blockchain.
+     * The blocks not in the header cache are requested with JSON-RPC batch requests
+     * (blocksPerBatch blocks per request, at most maxConcurrentBatches requests at the same time)
      * @param {*} startingBlockIdx Index of first block to get
      * @param {*} numberOfBlocks Number of blocks to get starting from startingBlockIndex
      * @returns Array with blocks from this.getLastBlockNumber to this.getLastBlockNumber + 1 + numberOfBlocks
      */
     async getBlocksData(startingBlockIdx, numberOfBlocks){
-        var blocksArray = [];
-        var updatedLastBlockNumber = startingBlockIdx + numberOfBlocks;
-        for(var i= startingBlockIdx ; i< updatedLastBlockNumber ; i++){
-            blocksArray.push( await this.getSingleBlock(i));
+        var blocksArray = new Array(numberOfBlocks);
+        var missingBlockIdxs = [];
+        for(let i = 0; i < numberOfBlocks; i++){
+            let cachedBlock = this.headerCache.get(startingBlockIdx + i);
+            if(cachedBlock != undefined)
+                blocksArray[i] = cachedBlock;
+            else
+                missingBlockIdxs.push(startingBlockIdx + i);
+        }
+
+        let batches = [];
+        for(let i = 0; i < missingBlockIdxs.length; i += blocksPerBatch){
+            batches.push(missingBlockIdxs.slice(i, i + blocksPerBatch));
+        }
+        //every worker sends its next batch when the previous one is answered
+        let nextBatch = 0;
+        const worker = async () => {
+            while(nextBatch < batches.length){
+                let batch = batches[nextBatch++];
+                let blocks = await this.getBlocksBatch(batch);
+                for(let j = 0; j < batch.length; j++){
+                    blocksArray[batch[j] - startingBlockIdx] = blocks[j];
+                }
+            }
         }
+        let workers = [];
+        for(let i = 0; i < Math.min(maxConcurrentBatches, batches.length); i++){
+            workers.push(worker());
+        }
+        await Promise.all(workers);
         return blocksArray;
     } 
 
+    /**
+     * Get blocks with a single JSON-RPC batch request (one round trip).
+     * The latest block number is requested in the same batch: only the confirmed blocks are cached
+     * @param {*} blockIdxs indexes of the blocks
+     * @returns Array with the blocks formatted as in getSingleBlock
+     */
+    async getBlocksBatch(blockIdxs){
+        let batch = new web3.BatchRequest();
+        const addRequest = (method, params) => new Promise((resolve, reject) => {
+            batch.add(method.request(...params, (err, res) => err ? reject(err) : resolve(res)));
+        });
+        let requests = [addRequest(web3.eth.getBlockNumber, [])];
+        for(let i = 0; i < blockIdxs.length; i++){
+            requests.push(addRequest(web3.eth.getBlock, [blockIdxs[i]]));
+        }
+        batch.execute();
+        let results = await this.metrics.timeRpc('batch(eth_getBlockByNumber)', Promise.all(requests));
+
+        let lastConfirmedBlockIdx = results[0] - confirmationBlocks;
+        let blocksArray = [];
+        for(let i = 0; i < blockIdxs.length; i++){
+            let Block2_formatted = this.formatBlock(results[i + 1], blockIdxs[i]);
+            if(blockIdxs[i] <= lastConfirmedBlockIdx)
+                this.headerCache.set(blockIdxs[i], Block2_formatted);
+            blocksArray.push(Block2_formatted);
+        }
+        return blocksArray;
+    }
+
 
     /**
      * This function order and formats the block information needed to recalculate 
@@ -330,8 +432,18 @@ class BlockManager{
      * @returns Blocks information in array format 
      */
     async getSingleBlock(blockIndex){
-        //access the blockchain block 
-        var Block2 = await web3.eth.getBlock(blockIndex);
+        let cachedBlock = this.headerCache.get(blockIndex);
+        if(cachedBlock != undefined)
+            return cachedBlock;
+        return (await this.getBlocksBatch([blockIndex]))[0];
+    }
+
+    /**
+     * @param {*} Block2 - block as returned by web3.eth.getBlock
+     * @param {*} blockIndex - Index of the requested block
+     * @returns Blocks information in array format 
+     */
+    formatBlock(Block2, blockIndex){
         if(Block2 == null){
             throw "[NON EXISTING BLOCK] Last block seen by SC " + this.lastBlockNumber +
              "| Blocks requested to append: " + blockIndex + " [Please decrease the number of blocks to append]"
@@ -405,7 +517,7 @@ class BlockManager{
      * @returns the block number containing the transaction 
      */
     async getTxBlock(txHash){
-        let transactionReceipt = await web3.eth.getTransactionReceipt(txHash);
+        let transactionReceipt = await this.metrics.timeRpc('eth_getTransactionReceipt', web3.eth.getTransactionReceipt(txHash));
         if(transactionReceipt == null){
             return -1;
         }
@@ -422,17 +534,19 @@ class BlockManager{
      */
     async getMMRRootBlockHeaderAndProof(txHash) {
         //STEP 1 - Find the the block containing the actual root
-        //find receipt containing transaction
-        var txReceipt = await web3.eth.getTransactionReceipt(txHash);
+        //find receipt containing transaction and its proof
+        var receiptProof = await this.getReceiptProofEntry(txHash);
+        if(receiptProof == null){
+            throw "[NON EXISTING TRANSACTION] " + txHash
+        }
         //Get block containing the receipt from the its blocknumber
-        var blockHeaderContainingTx = await this.getSingleBlock( txReceipt['blockNumber'])
+        var blockHeaderContainingTx = await this.getSingleBlock(receiptProof.blockNumber)
         
         //STEP 2 - Return block header, and receipt 
-        var txProof = await this.extractMerkleProofReceipt(txHash);
         return {blockHeader: blockHeaderContainingTx,
                 //NOT NEEDED - provided in txProof
                 //RootReceipt: txReceipt,
-                txDifficultyMPTProof: txProof}
+                txDifficultyMPTProof: receiptProof.proof}
     }
 
     /* ************************** END GET BLOCKS INFORMATION ********************************* */
@@ -451,137 +565,201 @@ class BlockManager{
      * {JSONProof: JSONProof, blockContainingTx: targetReceipt.blockHash, txIndex: targetIdx}
      */
     async extractMerkleProofReceipt(txHash){
+        let receiptProof = await this.getReceiptProofEntry(txHash);
+        if(receiptProof == null){
+            return null;
+        }
+        return receiptProof.proof;
+    }
+
+    /**
+     * Proof of a receipt from the cache or built (once, also with concurrent requests).
+     * Only the proofs of confirmed transactions stay in the cache
+     * @param {*} txHash hash of the transaction
+     * @returns promise of {proof: see extractMerkleProofReceipt, blockNumber: block containing tx,
+     *  confirmed: true if the block is confirmed} or null if the transaction does not exist
+     */
+    getReceiptProofEntry(txHash){
+        let cachedEntry = this.receiptProofCache.get(txHash);
+        if(cachedEntry != undefined){
+            return cachedEntry;
+        }
+        let entry = this.buildReceiptProof(txHash);
+        this.receiptProofCache.set(txHash, entry);
+        const dropEntry = () => {
+            if(this.receiptProofCache.peek(txHash) === entry)
+                this.receiptProofCache.delete(txHash);
+        }
+        entry.then((receiptProof) => {
+            if(receiptProof == null || !receiptProof.confirmed)
+                dropEntry();
+        }, dropEntry);
+        return entry;
+    }
+
+    async buildReceiptProof(txHash){
         //console.log(txHash)
-        let targetReceipt = await this.rpc.eth_getTransactionReceipt(txHash)
+        let [targetReceipt, lastBlockIdxInChain] = await Promise.all([
+            this.metrics.timeRpc('eth_getTransactionReceipt', this.rpc.eth_getTransactionReceipt(txHash)),
+            this.metrics.timeRpc('eth_blockNumber', web3.eth.getBlockNumber())])
         if(!targetReceipt){ //throw new Error("txhash/targetReceipt not found. (use Archive node)" + targetReceipt)}
             return null;
         }
         var targetIdx = parseInt(targetReceipt.transactionIndex)
+        var blockNumber = parseInt(targetReceipt.blockNumber)
 
-        let rpcBlock = await this.rpc.eth_getBlockByHash(targetReceipt.blockHash, false)
-    
-        let receipts = await Promise.all(rpcBlock.transactions.map((siblingTxHash) => {
-          return this.rpc.eth_getTransactionReceipt(siblingTxHash)
-        }))
+        let blockProofs = await this.getBlockReceiptProofs(targetReceipt.blockHash);
     
-        let tree = new Tree();
-    
-        //from receipt build Particia Tree
-        for(let index = 0; index < receipts.length; index ++){
-            let siblingPath = encode(index);
-            let serializedReceipt = Receipt.fromRpc(receipts[index]).serialize()
-            //console.log(serializedReceipt[0])
-            await tree.put(siblingPath, serializedReceipt)
-        }
-    
-        let proof = await Tree.createProof(tree, encode(targetIdx) );
+        let proof = blockProofs.proofs[targetIdx].map((nodeIdx) => Buffer.from(blockProofs.nodes[nodeIdx]));
         //console.log( proof)
         let JSONProof = JSON.stringify(proof)
         //console.log(JSONProof)
-        return {JSONProof: JSONProof, blockContainingTx: targetReceipt.blockHash, txIndex: targetIdx}
-      }
+        return {proof: {JSONProof: JSONProof, blockContainingTx: targetReceipt.blockHash, txIndex: targetIdx},
+                blockNumber: blockNumber,
+                confirmed: blockNumber <= lastBlockIdxInChain - confirmationBlocks};
+    }
 
+    /**
+     * The receipt trie of a block never changes for the same block hash:
+     * it is built once and the proofs of all the transactions of the block are kept
+     * @param {*} blockHash hash of the block
+     * @returns promise of the receipt proofs of the block (see ProofWorker.buildReceiptProofs)
+     */
+    getBlockReceiptProofs(blockHash){
+        let cachedTrie = this.receiptTrieCache.get(blockHash);
+        if(cachedTrie != undefined){
+            return cachedTrie;
+        }
+        let trie = this.buildBlockReceiptProofs(blockHash);
+        this.receiptTrieCache.set(blockHash, trie);
+        trie.catch(() => {
+            if(this.receiptTrieCache.peek(blockHash) === trie)
+                this.receiptTrieCache.delete(blockHash);
+        });
+        return trie;
+    }
 
+    async buildBlockReceiptProofs(blockHash){
+        let rpcBlock = await this.metrics.timeRpc('eth_getBlockByHash', this.rpc.eth_getBlockByHash(blockHash, false))
+    
+        let receipts = await Promise.all(rpcBlock.transactions.map((siblingTxHash) => {
+          return this.metrics.timeRpc('eth_getTransactionReceipt', this.rpc.eth_getTransactionReceipt(siblingTxHash))
+        }))
+    
+        let start = process.hrtime.bigint();
+        //from receipt build Particia Tree (and the proofs of all the receipts)
+        let blockProofs = this.proofWorkerPool != null ?
+            await this.proofWorkerPool.run('buildReceiptProofs', [receipts]) :
+            await ProofWorker.buildReceiptProofs(receipts);
+        this.metrics.observeOperation('receiptTrieBuild', elapsedMs(start));
+        return blockProofs;
+    }
 
     /**
-     * Retrieve all the missing SC calls to update local MMR tree.
-     * A SmartFlies invocation emits an event in the chain that can be used to retrieve all 
-     * the missed events starting from one block (the last block seen by the Prover in this case) 
-     * @param {*} lastLeafInformation index of the last block seen by the Prover
-     * @returns arrayOfArrayOfBlocks: array of blocks given as input rlp.encoded,
-     *          txHashArray: array of transactions hash containing SC invocation,
-     *          latestConfirmedBlockIdx: latest block that has been checked and considered confirmed
+     * Build in background the receipt proofs of the new SC invocations
+     * (one at a time, so the node is not flooded while the Prover is serving requests)
+     * @param {*} txHashArray hashes of the SC invocations
      */
-      async getMissingMMRBlocks( lastBlockIdxCheckedForUpdate ){
-        let singleEvent, txHash, transactionData; 
-        // array containing the txHash of the SC invocation 
-        let txHashArray = [];
-        //SC inputs
-        let arrayOfBlocksAsInput = [];
-
-        let lastBlockIdxInChain = await web3.eth.getBlockNumber();
-        
+    async precomputeReceiptProofs(txHashArray){
+        for(let i = 0; i < txHashArray.length; i++){
+            try{
+                await this.getReceiptProofEntry(txHashArray[i]);
+            } catch(err){
+                console.log("   [RECEIPT PROOF ERROR] " + txHashArray[i], err)
+            }
+        }
+    }
+
+
+    /**
+     * Stream the SC invocations (EventLogRootHash events) of the confirmed blocks, in chain order.
+     * The block range is read in windows of eventsWindowBlocks blocks (the events of the next
+     * window are requested while the current one is processed) and the transactions of a window
+     * are requested with at most maxConcurrentTransactions requests in flight: every invocation
+     * is given to onInvocation as soon as it and the previous ones are available, so the memory
+     * used does not depend on the number of invocations to synchronize.
+     * @param {*} fromBlock first block to check
+     * @param {*} onInvocation async callback(input, txHash, txBlockIdx) for every invocation
+     *        (input is the decoded SC input, see abiDecoder.decodeMethod, txBlockIdx the block containing it)
+     * @param {*} onWindow async callback(lastBlockIdx) called when all the invocations
+     *        up to block lastBlockIdx have been given to onInvocation
+     * @returns latest block checked and considered confirmed, null if there are no new confirmed blocks
+     */
+    async forEachSCInvocation(fromBlock, onInvocation, onWindow){
+        let lastBlockIdxInChain = await this.metrics.timeRpc('eth_blockNumber', web3.eth.getBlockNumber());
+        //Check only for blocks that are considered permanent
+        let latestConfirmedBlockIdx = lastBlockIdxInChain - confirmationBlocks;
+
         //No blocks to check 
-        if( lastBlockIdxCheckedForUpdate > (lastBlockIdxInChain - confirmationBlocks ) ){
-            return {};
+        if(fromBlock > latestConfirmedBlockIdx){
+            return null;
         }
-        
-        //get Events from Smart Contract
-        let rootEventsArray = await this.MMRContract.getPastEvents('EventLogRootHash',{
-            filter: {},
-            fromBlock: lastBlockIdxCheckedForUpdate,
-            //Check only for blocks that are considered permanent
-            toBlock: (lastBlockIdxInChain - confirmationBlocks )
-        })
-        
-        //from all the events extract the input data
-        for(let i=0; i<rootEventsArray.length; i ++){
-            //get a single event data
-            singleEvent = rootEventsArray[i];   
-            // get the transaction hash associated with that data
-            txHash = singleEvent.transactionHash;
-            // Store the txHash in array of transaction 
-            // This array make easier to retrieve the peaks of the MMR
-            txHashArray.push( txHash );
-
-            //Get the actual transaction that generated the Event
-            transactionData = await web3.eth.getTransaction(txHash);
-            //Decoding SC input from Transaction (blocks given as input)
-            arrayOfBlocksAsInput.push(abiDecoder.decodeMethod(transactionData.input));      
+
+        let getWindowEvents = (windowStart) => {
+            let events = this.metrics.timeRpc('eth_getLogs', this.MMRContract.getPastEvents('EventLogRootHash', {
+                filter: {},
+                fromBlock: windowStart,
+                toBlock: Math.min(windowStart + eventsWindowBlocks - 1, latestConfirmedBlockIdx)
+            }));
+            //a failure is thrown when the window is awaited
+            events.catch(() => {});
+            return events;
+        };
+
+        let nextWindowEvents = getWindowEvents(fromBlock);
+        for(let windowStart = fromBlock; windowStart <= latestConfirmedBlockIdx; windowStart += eventsWindowBlocks){
+            let rootEventsArray = await nextWindowEvents;
+            if(windowStart + eventsWindowBlocks <= latestConfirmedBlockIdx){
+                nextWindowEvents = getWindowEvents(windowStart + eventsWindowBlocks);
+            }
+            //transactions requested ahead of the one being processed
+            let pendingTransactions = [];
+            let nextRequested = 0;
+            for(let i = 0; i < rootEventsArray.length; i++){
+                while(nextRequested < rootEventsArray.length && nextRequested - i < maxConcurrentTransactions){
+                    let transactionData = this.metrics.timeRpc('eth_getTransaction',
+                        web3.eth.getTransaction(rootEventsArray[nextRequested].transactionHash));
+                    transactionData.catch(() => {});
+                    pendingTransactions.push(transactionData);
+                    nextRequested++;
+                }
+                //Get the actual transaction that generated the Event
+                let transactionData = await pendingTransactions.shift();
+                //Decoding SC input from Transaction
+                await onInvocation(abiDecoder.decodeMethod(transactionData.input), rootEventsArray[i].transactionHash,
+                                   rootEventsArray[i].blockNumber);
+            }
+            await onWindow(Math.min(windowStart + eventsWindowBlocks - 1, latestConfirmedBlockIdx));
         }
-        return {arrayOfArrayOfBlocks: arrayOfBlocksAsInput, txHashArray: txHashArray, latestConfirmedBlockIdx: (lastBlockIdxInChain - confirmationBlocks)}; 
+        return latestConfirmedBlockIdx;
+    }
+
+    /**
+     * Retrieve all the missing SC calls to update local MMR tree (untrusted scenario).
+     * A SmartFlies invocation emits an event in the chain that can be used to retrieve all 
+     * the missed events starting from one block (the last block seen by the Prover in this case) 
+     * @param {*} lastBlockIdxCheckedForUpdate index of the last block seen by the Prover
+     * @param {*} onBlocks async callback(arrayOfBlocksAsInput, txHash, txBlockIdx) for every SC invocation, in order:
+     *        arrayOfBlocksAsInput.params[0].value contains the blocks given as input rlp.encoded
+     * @param {*} onWindow async callback(lastBlockIdx) (see forEachSCInvocation)
+     * @returns latestConfirmedBlockIdx: latest block that has been checked and considered confirmed
+     *          (null if there were no new confirmed blocks)
+     */
+      async getMissingMMRBlocks(lastBlockIdxCheckedForUpdate, onBlocks, onWindow){
+        return await this.forEachSCInvocation(lastBlockIdxCheckedForUpdate, onBlocks, onWindow);
       }
 
-     
-      
     /**
-     * Get MMRLeaf and last indexes from the chain
+     * Get MMRLeaf and last indexes from the chain (partially trusted scenario)
      * @param {*} lastBlockIdxCheckedForUpdate index of the last block seen by the Prover
-     * @returns 
-     *  arrayOfMMRLeafs:  Array containing the MMR leaf missed 
-     *  firstBlockIdxes: For each leaf the starting block index that covers
-     *  txHashArray: Array containing the update transaction hash 
-     *  latestConfirmedBlockIdx: Last block checked on-chain
+     * @param {*} onLeaf async callback(MMRLeaf, firstBlockIdx, txHash, txBlockIdx) for every SC invocation, in order:
+     *        the MMR leaf in tuple format and the starting block index it covers
+     * @param {*} onWindow async callback(lastBlockIdx) (see forEachSCInvocation)
+     * @returns latestConfirmedBlockIdx: Last block checked on-chain (null if there were no new confirmed blocks)
      */
-    async getMissingMMRLeafs(lastBlockIdxCheckedForUpdate){
-        let singleEvent, txHash, transactionData; 
-        // array containing the txHash of the SC invocation 
-        let txHashArray = [];
-        //SC inputs
-        //Array of MMR leafs
-        let arrayOfMMRLeafsAsInput = [];
-        //Array of first block index covered in each invocation
-        let firstBlockIdxes = [];
-
-        let lastBlockIdxInChain = await web3.eth.getBlockNumber();
-        
-        //No blocks to check 
-        if( lastBlockIdxCheckedForUpdate > (lastBlockIdxInChain - confirmationBlocks ) ){
-            return {};
-        }
-        
-        //get Events from Smart Contract
-        let rootEventsArray = await this.MMRContract.getPastEvents('EventLogRootHash',{
-            filter: {},
-            fromBlock: lastBlockIdxCheckedForUpdate,
-            //Check only for blocks that are considered permanent
-            toBlock: (lastBlockIdxInChain - confirmationBlocks )
-        })
-        
-        //from all the events extract the input data
-        for(let i=0; i<rootEventsArray.length; i ++){
-            //get a single event data
-            singleEvent = rootEventsArray[i];   
-            // get the transaction hash associated with that data
-            txHash = singleEvent.transactionHash;
-            // Store the txHash in array of transaction 
-            // This array make easier to retrieve the peaks of the MMR
-            txHashArray.push( txHash );
-
-            //Get the actual transaction that generated the Event
-            transactionData = await web3.eth.getTransaction(txHash);
-            //In the untrusted updater scenario the data input are the MMR leaf and the first block coverd
-            let input = abiDecoder.decodeMethod(transactionData.input);
+    async getMissingMMRLeafs(lastBlockIdxCheckedForUpdate, onLeaf, onWindow){
+        return await this.forEachSCInvocation(lastBlockIdxCheckedForUpdate, (input, txHash, txBlockIdx) => {
+            //In the partially trusted scenario the data input are the MMR leaf and the first block coverd
             //INPUT STRUCTURE: {
             // name: 'store',
             // params: [
@@ -589,13 +767,8 @@ class BlockManager{
             //     { name: 'first_block_number', value: '11', type: 'uint64' }
             // ]
             // }
-            //the leaf_information
-            arrayOfMMRLeafsAsInput.push( input.params[0].value );
-            //the first_block_number covered by the leaf
-            firstBlockIdxes.push(input.params[1].value);
-
-        }
-        return {arrayOfMMRLeafs: arrayOfMMRLeafsAsInput, firstBlockIdxes:firstBlockIdxes , txHashArray: txHashArray, latestConfirmedBlockIdx: (lastBlockIdxInChain - confirmationBlocks)};
+            return onLeaf(input.params[0].value, input.params[1].value, txHash, txBlockIdx);
+        }, onWindow);
       }
 
 
@@ -1,10 +1,114 @@
 var express = require('express');
 const Prover = require('./Prover');
+const ProofCodec = require('./ProofCodec');
+const { Trace, elapsedMs } = require('./Metrics');
 const fs = require('fs');
 var app = express();
 //port of the web server - API interface - to connect type on browser localhost:port
 var JSONConfiguration = JSON.parse(fs.readFileSync("./configuration_smartcontract_invocation.json"));
 const port = JSONConfiguration['http_service_port'];
+//maximum number of leaf proofs in a batch request
+const maxBatchQueries = JSONConfiguration['maxBatchQueries'] || 1024;
+//stage timing of every proof request (otherwise only of the requests with ?trace)
+const traceRequests = JSONConfiguration['traceRequests'] || false;
+//maximum number of leafs in a page of /MMR/leafs
+const maxLeafsPerPage = JSONConfiguration['maxLeafsPerPage'] || 1000;
+//leafs serialized between two writes of a leaf stream (the other requests are served in between)
+const leafsPerChunk = 256;
+const NDJSON_TYPE = 'application/x-ndjson';
+
+//response time of every route (by route path, not by parameters)
+app.use((req, res, next) => {
+    let start = process.hrtime.bigint();
+    res.on('finish', () => {
+        MyProver.metrics.observeRoute(req.route != undefined ? req.route.path : 'unmatched', elapsedMs(start));
+    });
+    next();
+});
+
+/**
+ * @returns a Trace for the stage timing of the request or null if it is not traced
+ */
+function newTrace(req){
+    return traceRequests || req.query.trace != undefined ? new Trace() : null;
+}
+
+/**
+ * Send a proof as JSON or, if the client accepts it, in the binary format of ProofCodec
+ * (errors are always sent as JSON)
+ * @param {*} encode ProofCodec function encoding the proof
+ * @param {*} trace Trace of the request (stages sent in the Server-Timing header) or null
+ */
+function sendProof(req, res, proof, encode, trace = null){
+    res.vary('Accept');
+    let binary = proof != null && proof.error == undefined &&
+                 req.accepts(['application/json', ProofCodec.MIME_TYPE]) == ProofCodec.MIME_TYPE;
+    let body = binary ? ProofCodec[encode](proof) : JSON.stringify(proof);
+    if(trace != null){
+        trace.mark('encode');
+        MyProver.metrics.observeTrace(trace);
+        res.set('Server-Timing', trace.serverTiming());
+    }
+    res.type(binary ? ProofCodec.MIME_TYPE : 'json').send(body);
+}
+
+/**
+ * Range of the leaf paths (?fromLeaf=&toLeaf=&fromBlock=&toBlock=&cursor=, see Prover.getLeafIdxRange)
+ * @returns the range or null if a bound is not a non negative integer
+ */
+function parseLeafRange(query){
+    let range = {};
+    for(let bound of ['fromLeaf', 'toLeaf', 'fromBlock', 'toBlock', 'cursor']){
+        if(query[bound] == undefined)
+            continue;
+        if(!/^[0-9]+$/.test(query[bound]))
+            return null;
+        range[bound] = parseInt(query[bound]);
+    }
+    return range;
+}
+
+/**
+ * Write the leafs from firstLeafIdx to lastLeafIdx leafsPerChunk at a time and end the response.
+ * After every chunk the event loop serves the other requests and, when the client reads slower
+ * than the prover writes (the socket buffer is full), the next chunk waits for 'drain':
+ * the memory used does not depend on the number of leafs. A closed connection stops the stream.
+ * @param {*} formatChunk callback(first, last) -> string or Buffer of the leafs from first to last
+ * @param {*} end written after the last leaf
+ */
+async function streamLeafs(res, firstLeafIdx, lastLeafIdx, formatChunk, end = ''){
+    let closed = false;
+    let wakeUp = null;
+    const resume = () => {
+        if(wakeUp != null){
+            let resolve = wakeUp;
+            wakeUp = null;
+            resolve();
+        }
+    };
+    const close = () => {
+        closed = true;
+        resume();
+    };
+    res.on('drain', resume);
+    res.on('close', close);
+    try{
+        for(let first = firstLeafIdx; first <= lastLeafIdx && !closed; first += leafsPerChunk){
+            if(!res.write(formatChunk(first, Math.min(first + leafsPerChunk - 1, lastLeafIdx))))
+                await new Promise((resolve) => { wakeUp = resolve; });
+            else
+                await new Promise((resolve) => setImmediate(resolve));
+        }
+        if(!closed)
+            res.end(end);
+    } catch(err){
+        console.log("   [LEAF STREAM ERROR]", err);
+        res.destroy();
+    } finally{
+        res.removeListener('drain', resume);
+        res.removeListener('close', close);
+    }
+}
 
 //Home page showing options - accessible through localhost:port
 app.get('/', (req, res) => {
@@ -13,12 +117,19 @@ app.get('/', (req, res) => {
                          "SEND DEFAULT TRANSACTION      [TESTING ONLY]: /MMR/sendDefault/",
                          "GET LEAF AND PROOF FROM RELATIVE DIFFICULTY:  /MMR/getLeafProof/<relativeDifficulty>",
                          "GET LEAF AND PROOF FROM BLOCK INDEX:          /MMR/getLeafProofByIndex/<blockIndex>",
+                         "GET LEAFS AND PROOFS (BATCH):                 /MMR/getLeafProofs/<relativeDifficulty>,<relativeDifficulty>,...",
+                         "GET LEAFS AND PROOFS FROM SEED (BATCH):       /MMR/getLeafProofsFromSeed/<seed>/<numberOfQueries>/<weightPercentage>",
                          "GET PROOF:                                    /MMR/getProof/<leafHashValue>",
                          "GET TX PROOF:                                 /MMR/getTxProof/<txHash>",
                          "GET ROOT:                                     /MMR/root",
-                         "GET ALL LEAFS:                                /MMR/getAllLeafs"]
+                         "GET ALL LEAFS:                                /MMR/getAllLeafs",
+                         "GET LEAFS (PAGE):                             /MMR/leafs?fromLeaf=&toLeaf=&fromBlock=&toBlock=&cursor=&limit=",
+                         "GET LEAFS (NDJSON OR BINARY STREAM):          /MMR/leafs/stream?fromLeaf=&toLeaf=&fromBlock=&toBlock=&cursor=",
+                         "GET METRICS:                                  /metrics"]
     res.json({msg: "Welcome to the SMARTFLY API",
-                options: arrayInstructions})
+                options: arrayInstructions,
+                proofFormats: ["application/json", ProofCodec.MIME_TYPE + " (Accept header)"],
+                tracing: "add ?trace to a proof path to get the time of its stages in the Server-Timing header"})
 });
 
 //Add a leaf composed of numberBlocks in the MMR stored in the SC
@@ -80,7 +191,46 @@ app.get('/MMR/getLeafProof/:relativeDifficulty', (req, res)=> {
     else{
     // leaf info format: {leafInfo: , blocksCoveredByLeaf: ,patricaProofTxMMR: }
         (async () => {
-            res.json( await MyProver.getLeafAndProofFromDifficulty(relativeLeafDifficulty) );
+            let trace = newTrace(req);
+            sendProof(req, res, await MyProver.getLeafAndProofFromDifficulty(relativeLeafDifficulty, trace), 'encodeLeafProof', trace);
+        })();
+    }
+});
+
+//get leafs and proofs for a list of relative difficulties in a single response
+//the MMR nodes shared by the proofs are sent once (indexed by position)
+app.get('/MMR/getLeafProofs/:relativeDifficulties', (req, res) => {
+    let relativeDifficulties = req.params.relativeDifficulties.split(",").map(parseFloat);
+    if(relativeDifficulties.length > maxBatchQueries){
+        res.json( { error : "At most " + maxBatchQueries + " difficulties per request" } )
+    }
+    else if(relativeDifficulties.some((value) => !(value >= 0 && value <= 1))){
+        res.json( { error : "Only a range from 0 to 1 is admitted" } )
+    }
+    else{
+        (async () => {
+            let trace = newTrace(req);
+            sendProof(req, res, await MyProver.getBatchLeafAndProof(relativeDifficulties, trace), 'encodeBatchLeafProof', trace);
+        })();
+    }
+});
+
+//get leafs and proofs for numberOfQueries relative difficulties drawn from seed
+//(same sampling distribution of the verifier, weightPercentage = L/n)
+app.get('/MMR/getLeafProofsFromSeed/:seed/:numberOfQueries/:weightPercentage', (req, res) => {
+    let numberOfQueries = parseInt(req.params.numberOfQueries);
+    let weightPercentage = parseFloat(req.params.weightPercentage);
+    if(!(numberOfQueries > 0 && numberOfQueries <= maxBatchQueries)){
+        res.json( { error : "The number of queries must be from 1 to " + maxBatchQueries } )
+    }
+    else if(!(weightPercentage > 0 && weightPercentage < 1)){
+        res.json( { error : "The weight percentage must be in (0, 1)" } )
+    }
+    else{
+        (async () => {
+            let trace = newTrace(req);
+            sendProof(req, res, await MyProver.getBatchLeafAndProofFromSeed(req.params.seed, numberOfQueries, weightPercentage, trace),
+                      'encodeBatchLeafProof', trace);
         })();
     }
 });
@@ -95,7 +245,8 @@ app.get('/MMR/getLeafProofByIndex/:index', (req, res) => {
     //this check also it is covered by the tree
     else{
         ( async() => {
-            res.json( await MyProver.getLeafAndProofFromBlockIdx( blockIdx));
+            let trace = newTrace(req);
+            sendProof(req, res, await MyProver.getLeafAndProofFromBlockIdx( blockIdx, trace), 'encodeLeafProof', trace);
         })();
     }
 });
@@ -106,13 +257,58 @@ app.get('/MMR/getTxProof/:txHash',  (req, res)=> {
     let txHash = req.params.txHash;
     //check if it has the format of a txHash
     (async () => {
-        res.json( await MyProver.getLeafAndProofFromTxHash(txHash));
+        let trace = newTrace(req);
+        sendProof(req, res, await MyProver.getLeafAndProofFromTxHash(txHash, trace), 'encodeLeafProof', trace);
     })();
 });
 
-//get all the leafs composing the MMR
+//get all the leafs composing the MMR (same document of getLocalMMRLeafs, written a chunk at a time)
 app.get('/MMR/getAllLeafs', (req, res) => {
-    res.json( MyProver.getLocalMMRLeafs())
+    let [firstLeafIdx, lastLeafIdx] = MyProver.getLeafIdxRange({});
+    res.type('json');
+    res.write('{"leafs":[');
+    streamLeafs(res, firstLeafIdx, lastLeafIdx, (first, last) =>
+        (first > firstLeafIdx ? ',' : '') + JSON.stringify(MyProver.getLocalMMRLeafs(first, last).leafs).slice(1, -1),
+        ']}');
+});
+
+//get a page of leafs (with the blocks they cover and their SC invocation) of a range of leafs or blocks:
+//the next page is requested with the same range and cursor=<nextCursor>
+app.get('/MMR/leafs', (req, res) => {
+    let range = parseLeafRange(req.query);
+    let limit = req.query.limit != undefined ? parseInt(req.query.limit) : maxLeafsPerPage;
+    if(range == null){
+        res.json( { error : "The range bounds must be non negative integers" } )
+    }
+    else if(!(limit > 0 && limit <= maxLeafsPerPage)){
+        res.json( { error : "The limit must be from 1 to " + maxLeafsPerPage } )
+    }
+    else{
+        res.json(MyProver.getLeafsPage(range, limit));
+    }
+});
+
+//stream all the leafs of a range: one JSON leaf record per line (NDJSON) or,
+//with Accept: application/x-smartfly-rlp, the RLP leaf records one after the other
+app.get('/MMR/leafs/stream', (req, res) => {
+    let range = parseLeafRange(req.query);
+    if(range == null){
+        res.json( { error : "The range bounds must be non negative integers" } )
+        return;
+    }
+    //the leafs appended during the stream are not sent
+    let [firstLeafIdx, lastLeafIdx] = MyProver.getLeafIdxRange(range);
+    res.vary('Accept');
+    let binary = req.accepts([NDJSON_TYPE, ProofCodec.MIME_TYPE]) == ProofCodec.MIME_TYPE;
+    res.type(binary ? ProofCodec.MIME_TYPE : NDJSON_TYPE);
+    streamLeafs(res, firstLeafIdx, lastLeafIdx, (first, last) => {
+        let records = [];
+        for(let leafIdx = first; leafIdx <= last; leafIdx++){
+            let leafRecord = MyProver.getLeafRecord(leafIdx);
+            records.push(binary ? ProofCodec.encodeLeafRecord(leafRecord) : JSON.stringify(leafRecord) + '\n');
+        }
+        return binary ? Buffer.concat(records) : records.join('');
+    });
 });
 
 //Get the root of the MMR
@@ -121,7 +317,22 @@ app.get('/MMR/root', (req, res) => {
         res.json({rootSmartContract: await MyProver.getSCRoot(), rootMMR: MyProver.getMMRRoot()});
     })();*/
     (async() => {
-        res.json(await MyProver.getSCRootProof());
+        let trace = newTrace(req);
+        sendProof(req, res, await MyProver.getSCRootProof(trace), 'encodeRootProof', trace);
+    })();
+});
+
+//Route latencies, RPC calls, cache hit rates, MMR size and synchronization lag
+app.get('/metrics', (req, res) => {
+    (async () => {
+        let status;
+        try{
+            status = await MyProver.getStatus();
+        } catch(err){
+            //the node is not reachable: the local metrics are still sent
+            status = {error: String(err)};
+        }
+        res.json(Object.assign({mmr: status}, MyProver.metrics.toJSON()));
     })();
 });
 
@@ -163,8 +374,17 @@ app.get('/MMR/getProof/:leaf_value', (req, res) => {
 
 //Initialize all the system and start server
 var MyProver = new Prover();
+MyProver.metrics.monitorEventLoop();
 (async () => {
-    await MyProver.initializeBlockManager();
+    try{
+        await MyProver.initializeBlockManager();
+    } catch(err){
+        //the service does not start with an MMR that is not synchronized with the chain
+        console.log("[INITIALIZATION FAILED]   Local MMR not synchronized: " + (err && err.message ? err.message : err));
+        process.exit(1);
+    }
+    //the new SC invocations are added to the MMR while the requests are served
+    MyProver.startBackgroundSync();
     console.log("Proving service active...")
     app.listen(port, () => console.log(`MMR service is listening on port ${port}!`))
 })();
@@ -0,0 +1,105 @@
+'''
+Cross-check of the Python Difficulty MMR (smartfly package) against the
+JS DifficultyMMRTree used by the prover.
+
+The same fixtures (lists of leaves) are given to both implementations and
+for every fixture the root, the number of nodes of each level and the proof
+of every leaf must be equal node by node and hash by hash.
+
+NOTE: the JS dependencies of the prover must be installed
+(npm install in "./js/Prover Module"). Execute from this directory:
+python mmrCrossCheck.py
+'''
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from smartfly.difficultyMMR import DifficultyMMRTree
+from smartfly.difficultyNode import DifficultyNode, DUMMY_PEAK, keccak256, toHex
+
+#number of leaves of the fixtures - every shape up to 70 leaves plus
+#some bigger trees around powers of two
+numberOfLeafsArray = list(range(1, 71)) + [127, 128, 129, 255, 256, 257, 511, 1000]
+
+
+def buildFixtureLeafs(numberOfLeafs):
+    '''
+    Deterministic leaves with different values in every field
+    '''
+    leafs = []
+    for i in range(numberOfLeafs):
+        leafs.append([toHex(keccak256(i.to_bytes(8, "big"))),
+                      1600000000 + 15*i, 1600000000 + 15*i + 14,
+                      (i*7919) % 100000 + 1, (i*104729) % 100000 + 1,
+                      (i*31) % 997 + 1, i % 16 + 1])
+    return leafs
+
+
+def buildFixtures():
+    fixtures = []
+    for numberOfLeafs in numberOfLeafsArray:
+        fixtures.append({"name": "leafs=" + str(numberOfLeafs), "leafs": buildFixtureLeafs(numberOfLeafs)})
+    #same leaves of Prover.fillDummyMMR
+    fixtures.append({"name": "dummy-128", "leafs": [[DUMMY_PEAK, 1, 1, 1, 1, 128, 128]]*300})
+    return fixtures
+
+
+def nodeToJSON(node):
+    return {"node": node.toTuple(), "hash": node.getKeccak256()}
+
+
+def dumpPython(fixture):
+    mmr = DifficultyMMRTree()
+    for leafTuple in fixture["leafs"]:
+        mmr.addLeaf(DifficultyNode.fromTuple(leafTuple))
+    return {"name": fixture["name"],
+            "root": nodeToJSON(mmr.getRoot()),
+            "numberOfNodesEachLevel": mmr.getNumberOfNodesEachLevel(),
+            "proofs": [[nodeToJSON(node) for node in mmr.getLeafProof(i)] for i in range(mmr.numberOfLeafs)]}
+
+
+def dumpJS(fixtures):
+    with tempfile.TemporaryDirectory() as tmpDir:
+        fixtureFile = os.path.join(tmpDir, "fixtures.json")
+        outputFile = os.path.join(tmpDir, "output.json")
+        with open(fixtureFile, "w") as f:
+            json.dump({"fixtures": fixtures}, f)
+        subprocess.run(["node", "./js/DataModule/DumpMMR.js", fixtureFile, outputFile], check=True)
+        with open(outputFile) as f:
+            return json.load(f)["results"]
+
+
+def compare(pythonResult, jsResult):
+    '''
+    Returns the list of differences between the two dumps of a fixture
+    '''
+    errors = []
+    if pythonResult["root"] != jsResult["root"]:
+        errors.append("root " + str(pythonResult["root"]) + " != " + str(jsResult["root"]))
+    if pythonResult["numberOfNodesEachLevel"] != jsResult["numberOfNodesEachLevel"]:
+        errors.append("levels " + str(pythonResult["numberOfNodesEachLevel"]) + " != " +
+                      str(jsResult["numberOfNodesEachLevel"]))
+    if len(pythonResult["proofs"]) != len(jsResult["proofs"]):
+        errors.append("number of proofs differs")
+    for i, (pythonProof, jsProof) in enumerate(zip(pythonResult["proofs"], jsResult["proofs"])):
+        if pythonProof != jsProof:
+            errors.append("proof of leaf " + str(i) + " differs")
+    return errors
+
+
+if __name__ == "__main__":
+    fixtures = buildFixtures()
+    jsResults = dumpJS(fixtures)
+    failed = 0
+    for fixture, jsResult in zip(fixtures, jsResults):
+        errors = compare(dumpPython(fixture), jsResult)
+        if errors:
+            failed += 1
+            print("[FAIL] " + fixture["name"])
+            for error in errors:
+                print("    " + error)
+    print(str(len(fixtures) - failed) + "/" + str(len(fixtures)) + " fixtures equal")
+    sys.exit(1 if failed else 0)
@@ -4,6 +4,13 @@ order to see the proof size and perform benchmarks on it
 '''
 
 import os
+import subprocess
+import sys
+import tempfile
+
+from smartfly.gridRunner import atomicWrite, expandGrid, moveResults, runGrid
+from smartfly.proofSimulation import generateProofSimulations
+from smartfly.resultStore import ResultStore
 
 #adversary fraction of power - cs and chain lengths
 #########################################
@@ -30,21 +37,59 @@ numberOfBlocksPerUpdateArray = [1,8,16,64,128]
 # be able to calculate CI
 expNumber = 30
 
+#True: use the JS simulation (one node process per point)
+#False: use the vectorized Python simulation (smartfly/proofSimulation.py)
+useNode = False
+
+#where the proof sizes are stored and file with the points already simulated
+outputDirectory = "./data/ProofSizesPaper/"
+manifestPath = outputDirectory + "manifest.txt"
+#binary store with the same samples (tables ProofSizeInteval and DuplicatesProofSizeInteval)
+resultStore = ResultStore(outputDirectory)
+
+def getFileSuffix(point):
+    return "ProofSizeInteval_n=" + str(point["n"]) + "_c=" + point["c"] + "_L=" + str(point["L"]) + \
+        "_lamb=" + str(point["lamb"]) + "_cl=" + str(point["cl"]) + ".txt"
+
+def getStoreKey(point):
+    return {name: point[name] for name in ("n", "c", "L", "lamb", "cl")}
+
+def simulatePoint(point):
+    '''
+    Simulate point["exp"] proofs and write the sizes in the same files
+    (and format) of ./js/DataModule/GenerateProofs.js and in the result store
+    '''
+    if useNode:
+        tmpDirectory = tempfile.mkdtemp(dir=outputDirectory)
+        subprocess.run(["node", "./js/DataModule/GenerateProofs.js", str(point["n"]), point["c"],
+                        str(point["L"]), str(point["lamb"]), str(point["cl"]), str(point["exp"]),
+                        tmpDirectory + "/"], check=True, stdout=subprocess.DEVNULL)
+        for fileName in os.listdir(tmpDirectory):
+            resultStore.appendTextFile(os.path.join(tmpDirectory, fileName))
+        moveResults(tmpDirectory, outputDirectory)
+        os.rmdir(tmpDirectory)
+        return
+    proofResponse = generateProofSimulations(point["n"], point["c"], point["L"], point["lamb"],
+                                             point["cl"], point["exp"])
+    resultStore.append("ProofSizeInteval", getStoreKey(point), proofResponse["proofSizeNoDuplicates"],
+                       replace=True)
+    resultStore.append("DuplicatesProofSizeInteval", getStoreKey(point),
+                       proofResponse["proofSizeWithDuplicates"], replace=True)
+    atomicWrite(outputDirectory + getFileSuffix(point),
+                "".join(str(size) + " " for size in proofResponse["proofSizeNoDuplicates"]))
+    atomicWrite(outputDirectory + "Duplicates" + getFileSuffix(point),
+                "".join(str(size) + " " for size in proofResponse["proofSizeWithDuplicates"]))
+
 #generate all experiments - this generates a dummy MMR -
 # please check the code invoked by ./js/DataModule/GenerateProofs.js
 # - for every lambda
 # - for every adversary assumption 
 # - for every chain length to test 
 # - for every number of blocks per leaf
-for c in cs:
-    for chainLength in chainLengths:
-        for numberOfBlocksPerUpdate in numberOfBlocksPerUpdateArray:
-            for lamb in lambs:
-                os.system(" node ./js/DataModule/GenerateProofs.js" +
-                            " " + str(numberOfBlocksPerUpdate) + 
-                            " " + c +
-                            " " + str(Lblocks) +
-                            " " + str(lamb) +
-                            " " + str(chainLength) +
-                            " " + str(expNumber)
-                        )
\ No newline at end of file
+# The points already in the manifest are skipped: delete it to simulate again everything
+if __name__ == "__main__":
+    points = expandGrid([("c", cs), ("cl", chainLengths), ("n", numberOfBlocksPerUpdateArray),
+                         ("lamb", lambs), ("L", [Lblocks]), ("exp", [expNumber])])
+    failed = runGrid(points, simulatePoint, manifestPath, label="proof sizes")
+    if failed:
+        sys.exit(1)
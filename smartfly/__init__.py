@@ -0,0 +1,8 @@
+'''
+Python side of SmartFly: in-process Difficulty MMR and the tools
+used to run the proof-size and gas-cost experiments without
+starting a node process for every simulated point.
+'''
+
+from .difficultyNode import DifficultyNode
+from .difficultyMMR import DifficultyMMRTree
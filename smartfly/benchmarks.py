@@ -0,0 +1,226 @@
+'''
+Benchmarks of the prover hot paths with regression baselines.
+
+    mmrAppend[n]        DifficultyMMRTree.addLeaf throughput filling a tree of n leafs (leafs/s)
+    leafProof[n]        getLeafProof latency on the tree of n leafs (us)
+    proofSimulation[p]  generateProofSimulations runtime of a grid point of proofOnly.py (ms)
+    js.*                the same for the JS prover (--js, needs node and the prover dependencies)
+    rest.*              latency of /MMR/root and /MMR/getLeafProof of a running prover
+                        (--prover, e.g. a prover synchronized with a local ganache) (ms)
+
+Every benchmark is repeated and the best run is kept. The results are written
+to a JSON baseline file with --update; without it they are compared with the
+baseline and every result worse than the baseline by more than --threshold
+(relative) is reported as a regression (exit code 1).
+
+usage:
+python -m smartfly.benchmarks [--sizes 1e3,1e4,1e5] [--js] [--prover URL] [--baseline FILE] [--update]
+'''
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from .difficultyMMR import DifficultyMMRTree
+from .difficultyNode import DifficultyNode
+from .proofSimulation import generateProofSimulations
+
+DEFAULT_BASELINE = "./data/Benchmarks/baseline.json"
+DEFAULT_SIZES = [10**3, 10**4, 10**5]
+#numberOfBlocksPerLeaf:c:L:lambda:chainLength (grid of proofOnly.py)
+DEFAULT_SIMULATION_POINTS = ["1:0.5:30:50:230400", "16:0.5:30:50:230400", "128:0.5:30:100:230400"]
+#experiments of a proofOnly.py grid point
+SIMULATION_EXPERIMENTS = 30
+
+
+def result(value, unit, higherIsBetter):
+    return {"value": value, "unit": unit, "higherIsBetter": higherIsBetter}
+
+
+def best(results):
+    '''
+    Best of the repetitions of a benchmark
+    '''
+    if results[0]["higherIsBetter"]:
+        return max(results, key=lambda entry: entry["value"])
+    return min(results, key=lambda entry: entry["value"])
+
+
+def repeat(benchmark, repetitions):
+    '''
+    Run benchmark (returning {name: result}) repetitions times and keep the best value of every result
+    '''
+    runs = [benchmark() for _ in range(repetitions)]
+    return {name: best([run[name] for run in runs]) for name in runs[0]}
+
+
+def newLeaf(i):
+    return DifficultyNode("0x" + format(i + 1, "064x"), 1600000000 + 13 * i, 1600000000 + 13 * i + 26, 1, 1, 3, 3)
+
+
+def benchmarkMMR(sizes, proofSamples):
+    results = {}
+    for size in sizes:
+        mmr = DifficultyMMRTree()
+        start = time.perf_counter()
+        for i in range(size):
+            mmr.addLeaf(newLeaf(i))
+        mmr.getRoot()
+        results["mmrAppend[n=" + str(size) + "]"] = result(size / (time.perf_counter() - start), "leafs/s", True)
+
+        leafs = [random.randrange(size) for _ in range(proofSamples)]
+        start = time.perf_counter()
+        for leaf in leafs:
+            mmr.getLeafProof(leaf)
+        results["leafProof[n=" + str(size) + "]"] = result((time.perf_counter() - start) / proofSamples * 1e6,
+                                                           "us", False)
+    return results
+
+
+def benchmarkProofSimulation(points):
+    results = {}
+    for point in points:
+        numberOfBlocksPerLeaf, c, L, lamb, chainLength = point.split(":")
+        start = time.perf_counter()
+        generateProofSimulations(int(numberOfBlocksPerLeaf), c, int(L), int(lamb), int(chainLength),
+                                 SIMULATION_EXPERIMENTS)
+        results["proofSimulation[" + point + "]"] = result((time.perf_counter() - start) * 1e3, "ms", False)
+    return results
+
+
+def benchmarkJS(sizes, proofSamples, points):
+    '''
+    @returns the results of js/DataModule/Benchmark.js
+    @throws RuntimeError if the JS benchmark cannot run
+    '''
+    try:
+        process = subprocess.run(["node", "./js/DataModule/Benchmark.js", ",".join(str(size) for size in sizes),
+                                  str(proofSamples), ",".join(points), str(SIMULATION_EXPERIMENTS)],
+                                 capture_output=True, text=True)
+    except OSError as err:
+        raise RuntimeError("node not available: " + str(err))
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "node failed")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def benchmarkREST(prover, requests):
+    '''
+    Latency (median and 95th percentile) of the proof requests to a running prover, one request at a time
+    '''
+    from .verifier import httpGet
+
+    async def latencies(path):
+        values = []
+        for i in range(requests):
+            start = time.perf_counter()
+            await httpGet(prover.rstrip("/") + path(i), 60)
+            values.append((time.perf_counter() - start) * 1e3)
+        return values
+
+    results = {}
+    for name, path in (("root", lambda i: "/MMR/root"),
+                       ("leafProof", lambda i: "/MMR/getLeafProof/" + repr(random.random()))):
+        values = asyncio.run(latencies(path))
+        results["rest." + name + ".p50"] = result(percentile(values, 0.5), "ms", False)
+        results["rest." + name + ".p95"] = result(percentile(values, 0.95), "ms", False)
+    return results
+
+
+def compare(results, baseline, threshold):
+    '''
+    @returns list of (name, baseline value, value, relative change, regression)
+    '''
+    comparison = []
+    for name, entry in results.items():
+        if name not in baseline:
+            continue
+        baseValue = baseline[name]["value"]
+        change = (entry["value"] - baseValue) / baseValue if baseValue else 0.0
+        worse = -change if entry["higherIsBetter"] else change
+        comparison.append((name, baseValue, entry["value"], change, worse > threshold))
+    return comparison
+
+
+def runSuite(sizes=DEFAULT_SIZES, proofSamples=1000, simulationPoints=DEFAULT_SIMULATION_POINTS, js=False,
+             prover=None, restRequests=50, repetitions=3):
+    '''
+    @returns {name: {value:, unit:, higherIsBetter:}}
+    '''
+    results = {}
+    results.update(repeat(lambda: benchmarkMMR(sizes, proofSamples), repetitions))
+    results.update(repeat(lambda: benchmarkProofSimulation(simulationPoints), repetitions))
+    if js:
+        try:
+            results.update(repeat(lambda: benchmarkJS(sizes, proofSamples, simulationPoints), repetitions))
+        except RuntimeError as err:
+            print("JS benchmarks skipped: " + str(err), file=sys.stderr)
+    if prover is not None:
+        results.update(repeat(lambda: benchmarkREST(prover, restRequests), repetitions))
+    return results
+
+
+def writeBaseline(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    baseline = {"machine": platform.platform() + " " + platform.processor(), "python": platform.python_version(),
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}
+    temporaryPath = path + ".tmp"
+    with open(temporaryPath, "w") as baselineFile:
+        json.dump(baseline, baselineFile, indent=1, sort_keys=True)
+    os.replace(temporaryPath, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SmartFly prover benchmarks")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="MMR sizes (leafs), e.g. 1e3,1e4,1e5,1e6,1e7")
+    parser.add_argument("--proof-samples", type=int, default=1000, help="proofs timed per MMR size")
+    parser.add_argument("--points", default=",".join(DEFAULT_SIMULATION_POINTS),
+                        help="proof simulation points numberOfBlocksPerLeaf:c:L:lambda:chainLength,...")
+    parser.add_argument("--js", action="store_true", help="benchmark the JS prover too")
+    parser.add_argument("--prover", default=None, help="URL of a running prover to benchmark")
+    parser.add_argument("--rest-requests", type=int, default=50, help="requests per REST benchmark")
+    parser.add_argument("--repetitions", type=int, default=3, help="runs of every benchmark (best kept)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change flagged as regression")
+    args = parser.parse_args()
+
+    results = runSuite([int(float(size)) for size in args.sizes.split(",")], args.proof_samples,
+                       [point for point in args.points.split(",") if point], args.js, args.prover,
+                       args.rest_requests, args.repetitions)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baselineFile:
+            baseline = json.load(baselineFile)["results"]
+
+    regressions = 0
+    print("%-48s %14s %14s %9s" % ("benchmark", "baseline", "value", "change"))
+    comparison = {name: (baseValue, change, regression)
+                  for name, baseValue, _, change, regression in compare(results, baseline, args.threshold)}
+    for name, entry in results.items():
+        if name in comparison:
+            baseValue, change, regression = comparison[name]
+            regressions += regression
+            print("%-48s %14.2f %14.2f %+8.1f%% %s %s" % (name, baseValue, entry["value"], change * 100, entry["unit"],
+                                                          "REGRESSION" if regression else ""))
+        else:
+            print("%-48s %14s %14.2f %9s %s" % (name, "-", entry["value"], "", entry["unit"]))
+
+    if args.update:
+        writeBaseline(args.baseline, results)
+        print("Baseline written to " + args.baseline)
+    elif regressions:
+        print(str(regressions) + " regression(s) beyond " + str(args.threshold * 100) + "%")
+        sys.exit(1)
@@ -0,0 +1,234 @@
+'''
+Python port of js/Prover Module/DifficultyMMR.js
+
+The JS DifficultyMMRTree keeps one array per level and, on every addLeaf,
+deletes and rebuilds the provisory nodes (the ones that bag the odd peaks
+into the root). Here the permanent nodes are stored flat, indexed by their
+MMR position (post-order), so:
+    - addLeaf only merges the perfect subtrees closed by the new leaf
+      (O(log n), no provisory node is touched)
+    - the provisory nodes are rebuilt lazily, only when the root or a proof
+      is requested after an append (O(log n) merges)
+    - a proof is computed from the leaf index without walking the levels
+
+Roots and proofs are the same, node for node, of the JS implementation.
+Node coordinates (level, index) are the ones of the JS tree[level][index]:
+the provisory node that merges the peaks below level l is stored by the JS
+tree as the last element of level l (the next odd level) and the root on a
+new level above the highest peak.
+'''
+
+import bisect
+import math
+
+
+def nodePosition(level, index):
+    '''
+    MMR position (post-order, starting from 0) of the permanent node
+    number "index" of level "level"
+    '''
+    return ((index + 1) << (level + 1)) - bin(index).count("1") - 2
+
+
+def oddLevels(numberOfLeafs):
+    '''
+    Levels having an odd number of permanent nodes (levels_odd_elements in JS):
+    they are the set bits of the number of leafs and each one holds a peak
+    '''
+    return [level for level in range(numberOfLeafs.bit_length()) if (numberOfLeafs >> level) & 1]
+
+
+def leafProofCoordinates(leafIndex, numberOfLeafs):
+    '''
+    Coordinates (level, index) of the nodes composing the proof of a leaf,
+    in the same order DifficultyMMRTree.getLeafProof returns them.
+    '''
+    if leafIndex < 0 or leafIndex >= numberOfLeafs:
+        return []
+    levels = oddLevels(numberOfLeafs)
+    #level of the peak covering the leaf: highest bit in which the leaf index and
+    #the number of leafs differ
+    peakLevel = (leafIndex ^ numberOfLeafs).bit_length() - 1
+    #siblings inside the perfect subtree of the peak
+    coordinates = [(level, (leafIndex >> level) ^ 1) for level in range(peakLevel)]
+    #bagging of the peaks
+    if len(levels) > 1:
+        peakIdx = levels.index(peakLevel)
+        if peakIdx == 0:
+            coordinates.append((levels[1], (numberOfLeafs >> levels[1]) - 1))
+        elif peakIdx == 1:
+            coordinates.append((levels[0], (numberOfLeafs >> levels[0]) - 1))
+        else:
+            #provisory node merging all the peaks on the right of the leaf peak
+            coordinates.append((peakLevel, numberOfLeafs >> peakLevel))
+        for level in levels[max(peakIdx, 1) + 1:]:
+            coordinates.append((level, (numberOfLeafs >> level) - 1))
+    return coordinates
+
+
+class DifficultyMMRTree:
+
+    def __init__(self):
+        #permanent nodes indexed by MMR position
+        self.nodes = []
+        #cumulative difficulty of all the leaves until each leaf (as in JS)
+        self.leafInfoArray = []
+        self.numberOfLeafs = 0
+        #provisory nodes {level: node} (root included) - None when an append invalidated them
+        self._provisoryNodes = {}
+
+    # ********************** GET TREE INFORMATION **********************************
+
+    def getLastLeafIndex(self):
+        return self.numberOfLeafs - 1
+
+    def getLevelOddElements(self):
+        return oddLevels(self.numberOfLeafs)
+
+    def getLeafIndex(self, hashed_value):
+        '''
+        Index of the leaf having hashed_value as peak (-1 if not present)
+        '''
+        for i in range(self.numberOfLeafs):
+            if self.nodes[nodePosition(0, i)].peak == hashed_value:
+                return i
+        return -1
+
+    def getNodeValue(self, index, level=0):
+        '''
+        Node with index "index" at level "level" (provisory nodes included)
+        '''
+        if 0 <= index < (self.numberOfLeafs >> level):
+            return self.nodes[nodePosition(level, index)]
+        if index == self.numberOfLeafs >> level:
+            return self._getProvisoryNodes().get(level)
+        return None
+
+    def getRoot(self):
+        levels = oddLevels(self.numberOfLeafs)
+        if len(levels) == 0:
+            return None
+        if len(levels) == 1:
+            return self._getPeak(levels[0])
+        return self._getProvisoryNodes()[levels[-1] + 1]
+
+    def _getPeak(self, level):
+        '''
+        Peak of the odd level "level" (last permanent node of the level)
+        '''
+        return self.nodes[nodePosition(level, (self.numberOfLeafs >> level) - 1)]
+
+    def getNumberOfNodesEachLevel(self):
+        '''
+        Number of nodes at each level as the JS tree stores them
+        '''
+        if self.numberOfLeafs == 0:
+            return [0]
+        levels = oddLevels(self.numberOfLeafs)
+        numberOfNodes = [self.numberOfLeafs >> level for level in range(levels[-1] + 1)]
+        for level in self._getProvisoryNodes():
+            if level < len(numberOfNodes):
+                numberOfNodes[level] += 1
+            else:
+                numberOfNodes.append(1)
+        return numberOfNodes
+
+    def getLeafArray(self):
+        return [self.nodes[nodePosition(0, i)] for i in range(self.numberOfLeafs)]
+
+    def getLeafFromDifficulty(self, relativeDifficulty):
+        '''
+        Index of the leaf at relativeDifficulty (0 to 1) of the total difficulty
+        '''
+        if len(self.leafInfoArray) == 0:
+            return None
+        totalDifficulty = self.leafInfoArray[-1]
+        requestedDifficulty = math.floor(totalDifficulty * relativeDifficulty)
+        return self.searchCoveringLeaf(self.leafInfoArray, requestedDifficulty)
+
+    def getLeafFromIdx(self, indexOfElement):
+        if 0 <= indexOfElement < self.numberOfLeafs:
+            return {"leafHashValue": self.getNodeValue(indexOfElement, 0),
+                    "leafDifficulty": self.leafInfoArray[indexOfElement],
+                    "leafIdx": indexOfElement}
+        return {"leafHashValue": None, "leafDifficulty": None, "leafIdx": None}
+
+    # ********************************* INSERTION ROUTINE *******************************
+
+    def addLeaf(self, newDifficultyNode):
+        '''
+        Append a leaf: only the perfect subtrees closed by the new leaf are merged
+        '''
+        leafIndex = self.numberOfLeafs
+        self.nodes.append(newDifficultyNode)
+        newTotalDifficulty = newDifficultyNode.getNodeDifficulty()
+        if leafIndex > 0:
+            newTotalDifficulty += self.leafInfoArray[-1]
+        self.leafInfoArray.append(newTotalDifficulty)
+
+        level = 0
+        #every trailing one of the old leaf count is a pair of subtrees to merge
+        while (leafIndex >> level) & 1:
+            right = self.nodes[-1]
+            left = self.nodes[-1 - ((2 << level) - 1)]
+            self.nodes.append(left.mergeNodes(right))
+            level += 1
+        self.numberOfLeafs += 1
+        self._provisoryNodes = None
+
+    def _getProvisoryNodes(self):
+        '''
+        Rebuild (if needed) the nodes that bag the peaks: the peak of the second
+        odd level is merged with the one of the first, then every following peak
+        is merged with the result. Each result goes on the next odd level, the last
+        one is the root.
+        '''
+        if self._provisoryNodes is None:
+            self._provisoryNodes = {}
+            levels = oddLevels(self.numberOfLeafs)
+            peaks = [self._getPeak(level) for level in levels]
+            if len(levels) > 1:
+                hash_odd_leaf = peaks[1].mergeNodes(peaks[0])
+                for i in range(2, len(levels)):
+                    self._provisoryNodes[levels[i]] = hash_odd_leaf
+                    hash_odd_leaf = peaks[i].mergeNodes(hash_odd_leaf)
+                self._provisoryNodes[levels[-1] + 1] = hash_odd_leaf
+        return self._provisoryNodes
+
+    def getLeafProofCoordinates(self, leaf_index):
+        return leafProofCoordinates(leaf_index, self.numberOfLeafs)
+
+    def getLeafProof(self, leaf_index, level=0):
+        '''
+        All the DifficultyNodes of the proof of the leaf (same order of the JS tree).
+        Only proofs from the leaves are supported (level must be 0).
+        '''
+        if level != 0:
+            raise ValueError("Only proofs starting from the leaves (level 0) are supported")
+        return [self.getNodeValue(index, nodeLevel)
+                for nodeLevel, index in leafProofCoordinates(leaf_index, self.numberOfLeafs)]
+
+    def searchCoveringLeaf(self, arr, val):
+        '''
+        Same search of the JS tree: the leaf i covers the cumulative difficulties
+        [arr[i-1], arr[i]), the last leaf is returned if val >= total difficulty
+        '''
+        return min(bisect.bisect_right(arr, val), len(arr) - 1)
+
+    def binarySearchClosest(self, arr, val):
+        '''
+        Same binary search of the JS tree: index of val in arr or, if not present,
+        the last middle point explored
+        '''
+        start = 0
+        end = len(arr) - 1
+        mid = 0
+        while start <= end:
+            mid = (start + end) // 2
+            if arr[mid] == val:
+                return mid
+            if val < arr[mid]:
+                end = mid - 1
+            else:
+                start = mid + 1
+        return mid
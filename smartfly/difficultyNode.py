@@ -0,0 +1,129 @@
+'''
+Python port of js/Prover Module/DifficultyNode.js
+
+A DifficultyNode is hashed exactly as the Smart Contract (and the JS
+prover) does:
+    getKeccak256() = keccak256(abi.encode(bytes32, uint64, uint64, uint64,
+                                          uint64, uint128, uint128))
+    mergeNodes()   = keccak256(abi.encode(bytes32, bytes32)) of the two
+                     children digests
+so roots and proofs built here are interchangeable with the JS ones.
+Nodes are never modified after creation, so the digest is computed
+once and cached on the node.
+'''
+
+from Crypto.Hash import keccak
+
+#peak of the default (dummy) DifficultyNode in DifficultyNode.js
+DUMMY_PEAK = "0xf6a1b2e3501f269e6acbd476ab5a1702679cdd29be4bc7cc9bc9031f90105ad5"
+
+
+def keccak256(data):
+    '''
+    keccak256 of a bytes object (same as web3.utils.keccak256)
+    '''
+    return keccak.new(digest_bits=256, data=data).digest()
+
+
+def toHex(data):
+    return "0x" + data.hex()
+
+
+def toBytes32(value):
+    '''
+    ABI encoding of a bytes32: hex strings are right padded to 32 bytes
+    '''
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return bytes(value).ljust(32, b"\0")
+
+
+def toUint(value):
+    '''
+    ABI encoding of an unsigned integer (one 32 bytes word)
+    '''
+    if isinstance(value, str):
+        value = int(value, 16) if value.startswith("0x") else int(value)
+    return int(value).to_bytes(32, "big")
+
+
+class DifficultyNode:
+
+    __slots__ = ("peak", "tFirstBlock", "tLastBlock", "dFirstBlock", "dLastBlock",
+                 "nodeDifficulty", "numberOfBlocksCoverd", "_digest")
+
+    def __init__(self, peak=DUMMY_PEAK, tFirstBlock=1, tLastBlock=1, dFirstBlock=1,
+                 dLastBlock=1, nodeDifficulty=1, numberOfBlocksCoverd=1):
+        self.peak = peak
+        self.tFirstBlock = tFirstBlock
+        self.tLastBlock = tLastBlock
+        self.dFirstBlock = dFirstBlock
+        self.dLastBlock = dLastBlock
+        self.nodeDifficulty = nodeDifficulty
+        self.numberOfBlocksCoverd = numberOfBlocksCoverd
+        #keccak of the node, filled the first time it is requested
+        self._digest = None
+
+    @classmethod
+    def fromJSON(cls, JSONDNode):
+        '''
+        Build a node from the JSON format of a JS DifficultyNode
+        '''
+        return cls(JSONDNode["peak"], int(JSONDNode["tFirstBlock"]), int(JSONDNode["tLastBlock"]),
+                   int(JSONDNode["dFirstBlock"]), int(JSONDNode["dLastBlock"]),
+                   int(JSONDNode["nodeDifficulty"]), int(JSONDNode["numberOfBlocksCoverd"]))
+
+    @classmethod
+    def fromTuple(cls, nodeTuple):
+        '''
+        Same as DifficultyNode.fromArrayToMMRNode - tuple format of toTuple()
+        '''
+        return cls(nodeTuple[0], *[int(value) for value in nodeTuple[1:7]])
+
+    def toTuple(self):
+        return [self.peak, self.tFirstBlock, self.tLastBlock, self.dFirstBlock,
+                self.dLastBlock, self.nodeDifficulty, self.numberOfBlocksCoverd]
+
+    def toJSON(self):
+        return {"peak": self.peak, "tFirstBlock": self.tFirstBlock, "tLastBlock": self.tLastBlock,
+                "dFirstBlock": self.dFirstBlock, "dLastBlock": self.dLastBlock,
+                "nodeDifficulty": self.nodeDifficulty, "numberOfBlocksCoverd": self.numberOfBlocksCoverd}
+
+    def getNodeDifficulty(self):
+        return self.nodeDifficulty
+
+    def getNumberOfBlocksCoverd(self):
+        return self.numberOfBlocksCoverd
+
+    def getDigest(self):
+        '''
+        Returns the raw 32 bytes keccak of the node (hashed as the SC does)
+        '''
+        if self._digest is None:
+            encoded = b"".join((toBytes32(self.peak),
+                                toUint(self.tFirstBlock), toUint(self.tLastBlock),
+                                toUint(self.dFirstBlock), toUint(self.dLastBlock),
+                                toUint(self.nodeDifficulty), toUint(self.numberOfBlocksCoverd)))
+            self._digest = keccak256(encoded)
+        return self._digest
+
+    def getKeccak256(self):
+        '''
+        Returns the keccak of the node as hex string (as DifficultyNode.getKeccak256)
+        '''
+        return toHex(self.getDigest())
+
+    def mergeNodes(self, nodeRight):
+        '''
+        Merge the current node (left) with nodeRight in a new parent node
+        '''
+        #abi.encode(bytes32, bytes32) is the concatenation of the two digests
+        peak = toHex(keccak256(self.getDigest() + nodeRight.getDigest()))
+        return DifficultyNode(peak,
+                              self.tFirstBlock, nodeRight.tLastBlock,
+                              self.dFirstBlock, nodeRight.dLastBlock,
+                              self.nodeDifficulty + nodeRight.nodeDifficulty,
+                              self.numberOfBlocksCoverd + nodeRight.numberOfBlocksCoverd)
+
+    def __repr__(self):
+        return "DifficultyNode(" + ", ".join(str(value) for value in self.toTuple()) + ")"
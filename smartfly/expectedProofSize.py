@@ -0,0 +1,275 @@
+'''
+Analytic version of the proof-size simulation (smartfly/proofSimulation.py):
+instead of running expNumber Monte-Carlo experiments, the probability that
+a query of the Bunz sampler (Prover.randomSampler + getLeafFromDifficulty)
+lands on every leaf is computed exactly and the expected proof sizes and
+their variances are derived from it.
+
+With p_i the probability of leaf i and m the number of queries:
+    proofSizeWithDuplicates is a sum of m independent proof sizes
+    proofSizeNoDuplicates   is root + sum over the "items" (leaves and MMR
+                            nodes) of weight_item * [item obtained at least once]
+An item is obtained when a query lands in its set of leaves (the leaf
+itself, or all the leaves whose proof contains the node): with a the mass
+of the set, P(obtained) = 1 - (1 - a)**m.
+
+The sets of all the items form a laminar family (two sets are nested or
+disjoint) of leaf intervals:
+    - dyadic blocks inside the perfect subtree of every peak (a node is in
+      the proof of the leaves under its sibling)
+    - the subtree of every peak (bagging node needed only by that peak)
+    - the union of the peaks on the right of a peak (the peak itself)
+Means and the variance terms of nested pairs are exact. The covariance of
+two disjoint sets, g_u*g_v*((1 - alpha_u*alpha_v)**m - 1) with
+g = (1-a)**m and alpha = a/(1-a), is not separable: it is taken at first
+order (-m*alpha_u*alpha_v*g_u*g_v, summed in O(n)) and computed exactly for
+the pairs of the exactPairs items with the biggest contribution.
+Everything costs O(n) so chains of tens of millions of blocks can be used.
+'''
+
+import numpy as np
+
+from .difficultyMMR import oddLevels
+from .proofSimulation import (BlockHeaderSizeInBytes, MMRNodeSizeInBytes, MTPAndReciptSizeInBytes,
+                              binarySearchClosest, dummyLeafInfoArray, getSimulatedProofLengthInByte,
+                              getSimulationParameters, leafProofLength)
+
+#values searched at the same time by binarySearchClosest (memory bound)
+SEARCH_CHUNK = 1 << 20
+
+
+def samplerCDF(x, wightPercentage):
+    '''
+    P(randomSampler(wightPercentage) < x)
+    '''
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cdf = np.log1p(-np.minimum(x, 1.0)) / np.log(wightPercentage)
+    return np.clip(np.nan_to_num(cdf, nan=1.0, posinf=1.0), 0.0, 1.0)
+
+
+def getLeafProbabilities(leafInfoArray, wightPercentage):
+    '''
+    Probability that a query lands on each leaf.
+    The requested difficulty floor(total*relativeDifficulty) is either equal to
+    a cumulative difficulty (the leaf is found) or in the gap between two of
+    them (the leaf is the last middle point of binarySearchClosest)
+    '''
+    cum = np.asarray(leafInfoArray, dtype=np.int64)
+    total = float(cum[-1])
+    numberOfLeafs = len(cum)
+    previous = np.concatenate(([-1], cum[:-1]))
+
+    #requested difficulty equal to the cumulative difficulty of leaf k
+    probabilities = samplerCDF((cum + 1)/total, wightPercentage) - samplerCDF(cum/total, wightPercentage)
+
+    #requested difficulty strictly between the cumulative difficulties of leaf k-1 and k
+    gapMass = samplerCDF(cum/total, wightPercentage) - samplerCDF((previous + 1)/total, wightPercentage)
+    gaps = np.nonzero(cum - previous > 1)[0]
+    for start in range(0, len(gaps), SEARCH_CHUNK):
+        chunk = gaps[start:start + SEARCH_CHUNK]
+        leafs = binarySearchClosest(cum, cum[chunk] - 0.5)
+        probabilities += np.bincount(leafs, weights=gapMass[chunk], minlength=numberOfLeafs)
+    return probabilities
+
+
+def complementPower(mass, exponent):
+    '''
+    (1 - mass)**exponent, accurate for small masses
+    '''
+    with np.errstate(divide="ignore"):
+        return np.exp(exponent*np.log1p(-np.minimum(mass, 1.0)))
+
+
+def obtainedProbability(mass, mQueries):
+    '''
+    P(at least one of mQueries queries lands in a set with probability mass)
+    '''
+    with np.errstate(divide="ignore"):
+        return -np.expm1(mQueries*np.log1p(-np.minimum(mass, 1.0)))
+
+
+class ItemSums:
+    '''
+    Sums over the items of the no-duplicates proof size, accumulated one piece
+    of items at a time so that no array of all the items is kept, and the
+    exactPairs items with the biggest first order covariance (ties broken by
+    the order of the items) with what the exact covariance needs
+    '''
+
+    def __init__(self, mQueries, exactPairs):
+        self.mQueries = mQueries
+        self.exactPairs = exactPairs
+        #sum of weight*obtained, weight**2*obtained*(1-obtained), weight*obtained*ancestorsWeightNotObtained
+        self.mean = 0.0
+        self.variance = 0.0
+        self.nested = 0.0
+        #sum of beta, beta**2 and beta*ancestorsBeta
+        self.beta = 0.0
+        self.betaSquares = 0.0
+        self.nestedBeta = 0.0
+        self.numberOfItems = 0
+        self.top = {name: np.zeros(0) for name in
+                    ("beta", "weight", "mass", "obtained", "unweightedBeta", "start", "end", "order")}
+
+    def add(self, weight, mass, start, setSize, ancestorsWeightNotObtained, ancestorsBeta):
+        '''
+        A piece of items, the set of the item i being the leaves from
+        start + i*setSize to start + (i+1)*setSize
+        '''
+        mass = np.atleast_1d(np.asarray(mass, dtype=np.float64))
+        weight = np.broadcast_to(np.asarray(weight, dtype=np.float64), mass.shape)
+        obtained = obtainedProbability(mass, self.mQueries)
+        weightObtained = weight*obtained
+        self.mean += weightObtained.sum()
+        self.variance += np.dot(weight*weightObtained, 1 - obtained)
+        self.nested += np.dot(weightObtained, np.broadcast_to(ancestorsWeightNotObtained, mass.shape))
+        del weightObtained
+        unweightedBeta = mass*complementPower(mass, self.mQueries - 1)
+        beta = weight*unweightedBeta
+        self.beta += beta.sum()
+        self.betaSquares += np.dot(beta, beta)
+        self.nestedBeta += np.dot(beta, np.broadcast_to(ancestorsBeta, mass.shape))
+
+        #candidates of the piece for the top items: the biggest exactPairs, the first ones when equal
+        if len(beta) > self.exactPairs:
+            threshold = np.partition(beta, len(beta) - self.exactPairs)[len(beta) - self.exactPairs]
+            bigger = np.nonzero(beta > threshold)[0]
+            equal = np.nonzero(beta == threshold)[0][:self.exactPairs - len(bigger)]
+            candidates = np.concatenate((bigger, equal))
+        else:
+            candidates = np.arange(len(beta))
+        pieceTop = {"beta": beta[candidates], "weight": weight[candidates], "mass": mass[candidates],
+                    "obtained": obtained[candidates], "unweightedBeta": unweightedBeta[candidates],
+                    "start": start + candidates*setSize, "end": start + (candidates + 1)*setSize,
+                    "order": self.numberOfItems + candidates}
+        self.numberOfItems += len(mass)
+        merged = {name: np.concatenate((self.top[name], pieceTop[name])) for name in self.top}
+        keep = np.lexsort((merged["order"], -merged["beta"]))[:self.exactPairs]
+        self.top = {name: values[keep] for name, values in merged.items()}
+
+
+def buildItemSets(probabilities, leafWeight, mQueries, exactPairs):
+    '''
+    Sums over all the items (merged when they share the same set) of an MMR
+    with the given leaf probabilities
+    '''
+    numberOfLeafs = len(probabilities)
+    levels = oddLevels(numberOfLeafs)
+    items = ItemSums(mQueries, exactPairs)
+
+    def notObtained(mass, weight):
+        return weight*(1 - obtainedProbability(mass, mQueries))
+
+    def beta(mass, weight):
+        #first order covariance of two disjoint sets: -m*beta_u*beta_v
+        return weight*mass*complementPower(mass, mQueries - 1)
+
+    #union of the peaks j < t (peak t): from the biggest, the top of the hierarchy
+    unionMass = {}
+    unionStart = {}
+    for t in range(len(levels) - 1, 1, -1):
+        start = (numberOfLeafs >> (levels[t - 1] + 1)) << (levels[t - 1] + 1)
+        unionStart[t] = start
+        unionMass[t] = probabilities[start:].sum()
+    ancestorsWeightNotObtained = 0.0
+    ancestorsBeta = 0.0
+    unionAncestors = {}
+    for t in range(len(levels) - 1, 1, -1):
+        unionAncestors[t] = (ancestorsWeightNotObtained, ancestorsBeta)
+        items.add(weight=MMRNodeSizeInBytes, mass=unionMass[t], start=unionStart[t],
+                  setSize=numberOfLeafs - unionStart[t], ancestorsWeightNotObtained=ancestorsWeightNotObtained, ancestorsBeta=ancestorsBeta)
+        ancestorsWeightNotObtained += notObtained(unionMass[t], MMRNodeSizeInBytes)
+        ancestorsBeta += beta(unionMass[t], MMRNodeSizeInBytes)
+
+    for j, peakLevel in enumerate(levels):
+        #leaves covered by the peak
+        start = (numberOfLeafs >> (peakLevel + 1)) << (peakLevel + 1)
+        regionMass = [probabilities[start:start + (1 << peakLevel)]]
+        for level in range(peakLevel):
+            regionMass.append(regionMass[-1][0::2] + regionMass[-1][1::2])
+        #the smallest union containing the peak subtree
+        parent = max(j, 1) + 1
+        if parent in unionAncestors:
+            ancestorsWeight, ancestorsB = unionAncestors[parent]
+            ancestorsWeight += notObtained(unionMass[parent], MMRNodeSizeInBytes)
+            ancestorsB += beta(unionMass[parent], MMRNodeSizeInBytes)
+        else:
+            ancestorsWeight, ancestorsB = 0.0, 0.0
+        ancestorsWeight = np.array([ancestorsWeight])
+        ancestorsB = np.array([ancestorsB])
+        #from the peak to the leaves
+        for level in range(peakLevel, -1, -1):
+            mass = regionMass[level]
+            if level == peakLevel:
+                #bagging node needed only by this peak (none with a single peak)
+                weight = MMRNodeSizeInBytes if len(levels) > 1 else 0
+            else:
+                #sibling node
+                weight = MMRNodeSizeInBytes
+            if level == 0:
+                weight = weight + leafWeight
+            items.add(weight=weight, mass=mass, start=start, setSize=1 << level,
+                      ancestorsWeightNotObtained=ancestorsWeight, ancestorsBeta=ancestorsB)
+            if level > 0:
+                ancestorsWeight = np.repeat(ancestorsWeight + notObtained(mass, weight), 2)
+                ancestorsB = np.repeat(ancestorsB + beta(mass, weight), 2)
+    return items
+
+
+def getExpectedProofSize(numberOfBlocksPerLeaf, c, L, lamb, chainLength, leafInfoArray=None, exactPairs=2048):
+    '''
+    Expected proof sizes (and variances) of generateProofSimulation
+    @param numberOfBlocksPerLeaf Number of blocks per leaf
+    @param c Adversary fraction of power
+    @param L Blocks to always check
+    @param lamb Security coefficient
+    @param chainLength length of the chain (blocks)
+    @param leafInfoArray cumulative difficulty of the MMR leaves (default: fillDummyMMR MMR)
+    @param exactPairs number of items whose disjoint covariances are computed exactly
+    @returns {proofSizeNoDuplicates:, varianceNoDuplicates:,
+              proofSizeWithDuplicates:, varianceWithDuplicates:, mQueries:}
+    '''
+    if leafInfoArray is None:
+        leafInfoArray = dummyLeafInfoArray(numberOfBlocksPerLeaf, chainLength)
+    numberOfLeafs, wightPercentage, kFraction, mQueries = getSimulationParameters(
+        numberOfBlocksPerLeaf, c, L, lamb, chainLength)
+    numberOfLeafs = len(leafInfoArray)
+    probabilities = getLeafProbabilities(leafInfoArray, wightPercentage)
+    rootSize = BlockHeaderSizeInBytes + MTPAndReciptSizeInBytes
+
+    #WITH DUPLICATES: sum of mQueries independent leaf proofs
+    leafProofSize = getSimulatedProofLengthInByte(
+        leafProofLength(np.arange(numberOfLeafs), numberOfLeafs), numberOfBlocksPerLeaf)
+    meanLeafProofSize = np.dot(probabilities, leafProofSize)
+    varianceLeafProofSize = np.dot(probabilities, leafProofSize**2.0) - meanLeafProofSize**2
+
+    #NO DUPLICATES: every item is paid once if obtained
+    leafWeight = getSimulatedProofLengthInByte(0, numberOfBlocksPerLeaf)
+    items = buildItemSets(probabilities, leafWeight, mQueries, exactPairs)
+    meanNoDuplicates = rootSize + items.mean
+
+    #variance of every item + nested pairs (exact)
+    variance = items.variance + 2*items.nested
+    #disjoint pairs at first order: -m * sum over unordered disjoint pairs of beta_u*beta_v
+    variance -= 2*mQueries*((items.beta**2 - items.betaSquares)/2 - items.nestedBeta)
+
+    #exact covariance for the disjoint pairs of the most relevant items
+    top = items.top
+    start = top["start"]
+    end = top["end"]
+    disjoint = (end[:, None] <= start[None, :]) | (end[None, :] <= start[:, None])
+    massTop = np.minimum(top["mass"], 1.0)
+    notObtainedTop = 1 - top["obtained"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha = massTop/(1 - massTop)
+        product = np.minimum(alpha[:, None]*alpha[None, :], 1.0)
+        exactCov = np.outer(notObtainedTop, notObtainedTop)*np.expm1(mQueries*np.log1p(-product))
+    firstOrderCov = -mQueries*np.outer(top["unweightedBeta"], top["unweightedBeta"])
+    correction = np.where(disjoint, np.nan_to_num(exactCov) - firstOrderCov, 0.0)
+    variance += np.dot(top["weight"], correction.dot(top["weight"]))
+
+    return {"proofSizeNoDuplicates": float(meanNoDuplicates),
+            "varianceNoDuplicates": max(float(variance), 0.0),
+            "proofSizeWithDuplicates": float(rootSize + mQueries*meanLeafProofSize),
+            "varianceWithDuplicates": max(float(mQueries*varianceLeafProofSize), 0.0),
+            "mQueries": mQueries}
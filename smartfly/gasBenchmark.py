@@ -0,0 +1,145 @@
+'''
+Local ganache instances for the gas cost benchmarks (startingSimulation.py).
+
+The contracts are deployed once per instance, then an evm_snapshot of the
+chain right after the deployment is taken: before every configuration the
+instance is reverted to it (evm_revert) instead of running
+`truffle migrate --reset` again, so every configuration starts from the
+same chain state in a few milliseconds.
+
+The configurations can be executed on several instances at the same time
+(one per port, see gridRunner.runGridOn). All the instances use the same
+mnemonic and the same deployment, so the contract addresses written by
+truffle in ./build/contracts/ are the same on all of them.
+The JS scripts connect to an instance through the SMARTFLY_PROVIDER
+environment variable (it overrides the provider of the configuration file)
+and truffle deploys on it through GANACHE_PORT (see truffle-config.js).
+'''
+
+import json
+import os
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+
+GANACHE_HOST = "127.0.0.1"
+#same parameters of the README (and of truffle-config.js)
+GANACHE_MNEMONIC = "DifficultyMMR? Why not?"
+GANACHE_NETWORK_ID = 7200
+GANACHE_GAS_LIMIT = 30000000
+
+#truffle writes the same build files for every instance: one deployment at a time
+_deployLock = threading.Lock()
+
+
+class RpcError(Exception):
+    pass
+
+
+def rpcCall(url, method, params=None, timeout=60):
+    '''
+    JSON-RPC call to a node
+    @throws RpcError if the node returns an error
+    '''
+    request = urllib.request.Request(url, data=json.dumps({"jsonrpc": "2.0", "id": 1, "method": method,
+                                                           "params": params or []}).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        reply = json.loads(response.read())
+    if "error" in reply:
+        raise RpcError(method + ": " + str(reply["error"]))
+    return reply["result"]
+
+
+class GanacheInstance:
+
+    def __init__(self, port, spawn=False):
+        '''
+        @param port port of the instance
+        @param spawn if True a new ganache-cli process is started on the port
+            (otherwise the instance must be already running)
+        '''
+        self.port = port
+        self.url = "http://" + GANACHE_HOST + ":" + str(port)
+        self.spawn = spawn
+        self.process = None
+        self.snapshotId = None
+
+    def __repr__(self):
+        return "GanacheInstance(" + self.url + ")"
+
+    def start(self, timeout=60):
+        if self.spawn and self.process is None:
+            self.process = subprocess.Popen(["ganache-cli", "-a", "100", "-e", "10000", "-m", GANACHE_MNEMONIC,
+                                             "-p", str(self.port), "-l", str(GANACHE_GAS_LIMIT),
+                                             "-i", str(GANACHE_NETWORK_ID)],
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.waitForNode(timeout)
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+    def waitForNode(self, timeout):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                return rpcCall(self.url, "net_version", timeout=5)
+            except (urllib.error.URLError, ConnectionError):
+                if self.process is not None and self.process.poll() is not None:
+                    raise RuntimeError("ganache-cli on port " + str(self.port) + " exited")
+                if time.time() > deadline:
+                    raise RuntimeError("no node on " + self.url)
+                time.sleep(0.5)
+
+    def deploy(self):
+        '''
+        Compile and deploy the contracts on this instance and take the snapshot
+        every configuration starts from
+        '''
+        with _deployLock:
+            subprocess.run(["truffle", "migrate", "--reset"], check=True,
+                           env=dict(os.environ, GANACHE_PORT=str(self.port)))
+        self.snapshotId = rpcCall(self.url, "evm_snapshot")
+
+    def revert(self):
+        '''
+        Bring the chain back to the state after the deployment
+        '''
+        if self.snapshotId is None:
+            raise RuntimeError("contracts not deployed on " + self.url)
+        if not rpcCall(self.url, "evm_revert", [self.snapshotId]):
+            raise RpcError("evm_revert " + str(self.snapshotId) + " failed on " + self.url)
+        #a snapshot is consumed by the revert: take it again for the next configuration
+        self.snapshotId = rpcCall(self.url, "evm_snapshot")
+
+    def env(self):
+        '''
+        Environment of the JS scripts using this instance
+        '''
+        return dict(os.environ, SMARTFLY_PROVIDER=self.url, GANACHE_PORT=str(self.port))
+
+
+def startInstances(ports, spawn=False):
+    '''
+    Start (if spawn) the instances on ports and deploy the contracts on all of them
+    @returns list of GanacheInstance
+    '''
+    instances = [GanacheInstance(port, spawn) for port in ports]
+    try:
+        for instance in instances:
+            instance.start()
+            instance.deploy()
+    except BaseException:
+        stopInstances(instances)
+        raise
+    return instances
+
+
+def stopInstances(instances):
+    for instance in instances:
+        instance.stop()
@@ -0,0 +1,209 @@
+'''
+Surrogate model of the gas cost of the SmartFlies MMR updates, fitted on the
+costs measured by startingSimulation.py (table GCF of the result store) and
+used to predict the per-call and cumulative gas of any (blocksPerLeaf,
+chainLength) without running ganache.
+
+The cost of the k-th call (k leaves already in the MMR) follows the code of
+calculatePeaksAndRoot:
+    merges        countBitsSetToOne(k) peaks merged to compute the root
+    hashes        calculateNumbOfHash(k) merges giving the new peak (and the
+                  iterations of the loop in countBitsSetToOne counting them)
+    bitLength     iterations of countBitsSetToOne(k)
+    newPeakSlot   the new peak is stored in a peaks slot never written
+                  before (k + 1 is 2^h - 1): zero to non-zero SSTORE
+    firstCall     the tree data is written for the first time
+plus, in the untrusted scenario, blocksPerLeaf headers sent as calldata,
+hashed and decoded by store. The gas is a linear function of these features
+(one set of coefficients per contract, least squares).
+
+The error bars are measured on held-out data: the model is fitted without
+the costs of one blocksPerLeaf at a time and tested on them.
+
+usage:
+python -m smartfly.gasModel [--store ./data/GasCostsPaper/] [--trustHp 0] [--predict 16:2048,64:230400] [--output model.json]
+'''
+
+import argparse
+import json
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from .resultStore import ResultStore
+
+#trustHp of startingSimulation.py -> contract of the measured costs
+CONTRACTS = {0: "SmartFliesEndPaper.store (untrusted)", 1: "SmartFliesPartiallyTrusted.store (partially trusted)"}
+FEATURES = ["base", "blocksPerLeaf", "merges", "hashes", "bitLength", "newPeakSlot", "firstCall"]
+
+#held-out results of one blocksPerLeaf: mean and 95th percentile of the relative error of a call,
+#relative error of the cumulative cost of the series
+HeldOut = namedtuple("HeldOut", ["blocksPerLeaf", "calls", "callError", "callErrorP95", "cumulativeError"])
+
+
+def countBitsSetToOne(values):
+    '''
+    Number of bits set to one of every value (as the SC function of the same name)
+    '''
+    values = np.asarray(values, dtype=np.uint64)
+    values = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    values = (values & np.uint64(0x3333333333333333)) + ((values >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    values = (values + (values >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+    return ((values * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+def calculateNumbOfHash(numberOfLeafs):
+    '''
+    Bits changed from one to zero adding a leaf to an MMR of numberOfLeafs leaves (as the SC function)
+    '''
+    numberOfLeafs = np.asarray(numberOfLeafs, dtype=np.uint64)
+    return countBitsSetToOne(numberOfLeafs & ~(numberOfLeafs + np.uint64(1)))
+
+
+def bitLength(values):
+    #exact for values below 2^53
+    return np.frexp(np.asarray(values, dtype=np.float64))[1].astype(np.int64)
+
+
+def callFeatures(blocksPerLeaf, numberOfCalls):
+    '''
+    Feature matrix of the first numberOfCalls calls (one row per call, columns as FEATURES)
+    '''
+    leafs = np.arange(numberOfCalls, dtype=np.uint64)
+    nextLeafs = leafs + np.uint64(1)
+    features = np.empty((numberOfCalls, len(FEATURES)), dtype=np.float64)
+    features[:, 0] = 1
+    features[:, 1] = blocksPerLeaf
+    features[:, 2] = countBitsSetToOne(leafs)
+    features[:, 3] = calculateNumbOfHash(leafs)
+    features[:, 4] = bitLength(leafs)
+    features[:, 5] = (nextLeafs & (nextLeafs + np.uint64(1))) == 0
+    features[:, 6] = leafs == 0
+    return features
+
+
+def featureSums(blocksPerLeaf, numberOfCalls):
+    '''
+    Sum of the rows of callFeatures(blocksPerLeaf, numberOfCalls), counted bit by bit (O(log numberOfCalls))
+    '''
+    sums = [numberOfCalls, blocksPerLeaf * numberOfCalls, 0, 0, 0, 0, min(numberOfCalls, 1)]
+    for bit in range(max(numberOfCalls, 1).bit_length()):
+        period = 2 << bit
+        #leaves with the bit set
+        sums[2] += numberOfCalls // period * (period >> 1) + max(0, numberOfCalls % period - (period >> 1))
+        #leaves ending with bit + 1 ones (k + 1 multiple of period)
+        sums[3] += numberOfCalls // period
+        #leaves not below 2^bit
+        sums[4] += max(0, numberOfCalls - (1 << bit))
+        #k + 2 = 2^(bit + 1)
+        sums[5] += period - 2 < numberOfCalls
+    return np.array(sums, dtype=np.float64)
+
+
+class GasCostModel:
+
+    def __init__(self, coefficients, trustHp=0):
+        self.coefficients = np.asarray(coefficients, dtype=np.float64)
+        self.trustHp = trustHp
+
+    @classmethod
+    def fit(cls, series, trustHp=0):
+        '''
+        @param series {blocksPerLeaf: gas of the calls in order}
+        '''
+        features = np.concatenate([callFeatures(int(blocksPerLeaf), len(samples))
+                                   for blocksPerLeaf, samples in series.items()])
+        gas = np.concatenate([np.asarray(samples, dtype=np.float64) for samples in series.values()])
+        if len(gas) == 0:
+            raise ValueError("no gas costs to fit")
+        coefficients = np.linalg.lstsq(features, gas, rcond=None)[0]
+        return cls(coefficients, trustHp)
+
+    def predictCalls(self, blocksPerLeaf, numberOfCalls):
+        '''
+        @returns gas of each of the first numberOfCalls calls
+        '''
+        return callFeatures(blocksPerLeaf, numberOfCalls) @ self.coefficients
+
+    def predictCumulative(self, blocksPerLeaf, chainLength):
+        '''
+        Gas to add a chain of chainLength blocks (one call every blocksPerLeaf blocks)
+        @returns (cumulative gas, mean gas per call, mean gas per block)
+        '''
+        numberOfCalls = math.ceil(chainLength / blocksPerLeaf)
+        cumulative = float(featureSums(blocksPerLeaf, numberOfCalls) @ self.coefficients)
+        return cumulative, cumulative / numberOfCalls, cumulative / (numberOfCalls * blocksPerLeaf)
+
+    def toJSON(self):
+        return {"contract": CONTRACTS.get(self.trustHp), "trustHp": self.trustHp,
+                "coefficients": dict(zip(FEATURES, self.coefficients.tolist()))}
+
+    @classmethod
+    def fromJSON(cls, JSONModel):
+        return cls([JSONModel["coefficients"][feature] for feature in FEATURES], JSONModel["trustHp"])
+
+
+def crossValidate(series, trustHp=0):
+    '''
+    Fit without the costs of one blocksPerLeaf at a time and test the model on them
+    @returns list of HeldOut (one per blocksPerLeaf)
+    '''
+    results = []
+    for heldOut, samples in series.items():
+        training = {blocksPerLeaf: values for blocksPerLeaf, values in series.items() if blocksPerLeaf != heldOut}
+        if not training:
+            break
+        model = GasCostModel.fit(training, trustHp)
+        gas = np.asarray(samples, dtype=np.float64)
+        predicted = model.predictCalls(int(heldOut), len(gas))
+        callErrors = np.abs(predicted - gas) / gas
+        results.append(HeldOut(int(heldOut), len(gas), float(callErrors.mean()),
+                               float(np.percentile(callErrors, 95)),
+                               float(abs(predicted.sum() - gas.sum()) / gas.sum())))
+    return results
+
+
+def loadSeries(store, trustHp=0):
+    '''
+    @returns {blocksPerLeaf: gas of the calls} of the GCF table of a result store
+    '''
+    series = {int(key["n"]): samples for key, samples in store.select("GCF", trustHp=trustHp)}
+    return dict(sorted(series.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Surrogate gas cost model of the SmartFlies updates")
+    parser.add_argument("--store", default="./data/GasCostsPaper/", help="result store with the GCF table")
+    parser.add_argument("--trustHp", type=int, default=0, help="0) untrusted 1) partially trusted")
+    parser.add_argument("--predict", default="", help="points blocksPerLeaf:chainLength,... to predict")
+    parser.add_argument("--output", default=None, help="file where the fitted model is written (JSON)")
+    args = parser.parse_args()
+
+    series = loadSeries(ResultStore(args.store), args.trustHp)
+    if not series:
+        parser.error("no GCF costs for trustHp " + str(args.trustHp) + " in " + args.store +
+                     " (run startingSimulation.py or import the GCF*_exp.txt files with smartfly.resultStore)")
+    model = GasCostModel.fit(series, args.trustHp)
+    print("Contract: " + CONTRACTS.get(args.trustHp, str(args.trustHp)))
+    for feature, coefficient in zip(FEATURES, model.coefficients):
+        print("%-14s %14.1f" % (feature, coefficient))
+
+    heldOut = crossValidate(series, args.trustHp)
+    if heldOut:
+        print("%-14s %8s %12s %12s %14s" % ("held out n", "calls", "call err", "call p95", "cumulative err"))
+        for result in heldOut:
+            print("%-14d %8d %11.2f%% %11.2f%% %13.2f%%" % (result.blocksPerLeaf, result.calls, result.callError * 100,
+                                                          result.callErrorP95 * 100, result.cumulativeError * 100))
+    #error bar of the predictions: worst held-out error of the cumulative cost
+    errorBar = max((result.cumulativeError for result in heldOut), default=float("nan"))
+
+    for point in [point for point in args.predict.split(",") if point]:
+        blocksPerLeaf, chainLength = (int(float(value)) for value in point.split(":"))
+        cumulative, perCall, perBlock = model.predictCumulative(blocksPerLeaf, chainLength)
+        print("n=%d chainLength=%d: cumulative %.0f gas (+-%.1f%%), %.0f per call, %.0f per block" %
+              (blocksPerLeaf, chainLength, cumulative, errorBar * 100, perCall, perBlock))
+
+    if args.output is not None:
+        with open(args.output, "w") as modelFile:
+            json.dump(dict(model.toJSON(), heldOut=[result._asdict() for result in heldOut]), modelFile, indent=1)
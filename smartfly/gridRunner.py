@@ -0,0 +1,184 @@
+'''
+Parallel and resumable runner for the experiment grids
+(proofOnly.py and startingSimulation.py).
+
+- the grid is expanded in a list of points (one dict per parameter combination)
+- the points are executed on a process pool (one worker per core by default)
+- every finished point is appended to a manifest file, so a rerun skips the
+  points already done instead of appending their samples a second time
+- a progress line with the ETA is printed every time a point ends
+- runGridOn executes the points on a list of shared resources instead
+  (e.g. ganache instances): every resource runs one point at a time
+
+The tasks are module level functions taking a point and writing their own
+results (with atomicWrite or moveResults, so an interrupted point never
+leaves a half written file).
+'''
+
+import itertools
+import os
+import queue
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+
+def expandGrid(axes):
+    '''
+    @param axes list of (name, values) - the first axis is the outermost loop
+    @returns list of points {name: value}
+    '''
+    names = [name for name, _ in axes]
+    return [dict(zip(names, values)) for values in itertools.product(*[values for _, values in axes])]
+
+
+def pointKey(point):
+    '''
+    Identifier of a point in the manifest
+    '''
+    return "_".join(name + "=" + str(value) for name, value in point.items())
+
+
+def atomicWrite(path, text):
+    '''
+    Write text in path: the file is either the old one or the complete new one
+    '''
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmpPath = tempfile.mkstemp(dir=directory, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpPath, path)
+    except BaseException:
+        os.unlink(tmpPath)
+        raise
+
+
+def moveResults(tmpDirectory, outputDirectory):
+    '''
+    Move (atomically, one by one) all the files written by a task in a temporary
+    directory to the output directory, replacing the old ones
+    '''
+    for fileName in os.listdir(tmpDirectory):
+        os.replace(os.path.join(tmpDirectory, fileName), os.path.join(outputDirectory, fileName))
+
+
+class Manifest:
+    '''
+    Append-only list of the points already executed (one key per line)
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = set(line.strip() for line in f if line.strip())
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def markDone(self, key):
+        with open(self.path, "a") as f:
+            f.write(key + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.add(key)
+
+
+class Progress:
+
+    def __init__(self, total, label=""):
+        self.total = total
+        self.done = 0
+        self.label = label
+        self.startTime = time.time()
+
+    def update(self, key):
+        self.done += 1
+        elapsed = time.time() - self.startTime
+        eta = elapsed / self.done * (self.total - self.done)
+        sys.stderr.write("[" + self.label + " " + str(self.done) + "/" + str(self.total) + "] " + key +
+                         " - elapsed " + formatSeconds(elapsed) + " ETA " + formatSeconds(eta) + "\n")
+
+
+def formatSeconds(seconds):
+    seconds = int(seconds)
+    return "%d:%02d:%02d" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def runGrid(points, task, manifestPath, workers=None, label="grid"):
+    '''
+    Execute task(point) for every point not in the manifest
+    @param points list of points (see expandGrid)
+    @param task module level function writing the results of a point
+    @param manifestPath file with the keys of the points already executed
+    @param workers number of processes (default: number of cores)
+    @returns list of the keys of the points that failed
+    '''
+    manifest = Manifest(manifestPath)
+    todo = [point for point in points if pointKey(point) not in manifest]
+    print(label + ": " + str(len(points) - len(todo)) + " points already done, " + str(len(todo)) + " to run")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    progress = Progress(len(todo), label)
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(task, point): pointKey(point) for point in todo}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                future.result()
+            except Exception as err:
+                sys.stderr.write("[FAILED] " + key + ": " + repr(err) + "\n")
+                failed.append(key)
+                continue
+            manifest.markDone(key)
+            progress.update(key)
+    return failed
+
+
+def runGridOn(points, task, manifestPath, resources, label="grid"):
+    '''
+    Execute task(point, resource) for every point not in the manifest, with
+    at most one point at a time on every resource. The tasks run on threads
+    of this process (they are expected to wait on other processes or nodes)
+    @param points list of points (see expandGrid)
+    @param task function writing the results of a point on a resource
+    @param manifestPath file with the keys of the points already executed
+    @param resources list of resources (e.g. gasBenchmark.GanacheInstance)
+    @returns list of the keys of the points that failed
+    '''
+    manifest = Manifest(manifestPath)
+    todo = [point for point in points if pointKey(point) not in manifest]
+    print(label + ": " + str(len(points) - len(todo)) + " points already done, " + str(len(todo)) +
+          " to run on " + str(len(resources)) + " resources")
+    progress = Progress(len(todo), label)
+    failed = []
+    free = queue.Queue()
+    for resource in resources:
+        free.put(resource)
+
+    def runPoint(point):
+        resource = free.get()
+        try:
+            task(point, resource)
+        finally:
+            free.put(resource)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(resources))) as pool:
+        futures = {pool.submit(runPoint, point): pointKey(point) for point in todo}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                future.result()
+            except Exception as err:
+                sys.stderr.write("[FAILED] " + key + ": " + repr(err) + "\n")
+                failed.append(key)
+                continue
+            manifest.markDone(key)
+            progress.update(key)
+    return failed
@@ -0,0 +1,252 @@
+'''
+Open-loop load generator for the prover REST API.
+
+The requests arrive as a Poisson process of the given rate, independently
+of the answers (as many verifiers would), with a configurable mix of:
+    root    /MMR/root
+    leaf    /MMR/getLeafProof/<d>, d drawn as the verifier does for the prover
+            chain (Verifier.sampleDifficulties with the given c and L)
+    index   /MMR/getLeafProofByIndex/<block>, block uniform in the chain covered by the MMR
+    tx      /MMR/getTxProof/<txHash>, txHash uniform among the transactions of the
+            covered blocks (read from the node given with --rpc, e.g. the ganache
+            instance filled by FillMMR.js)
+The latency of a request is measured from its scheduled arrival, so the time
+spent waiting for a connection slot (--max-in-flight) is included; the
+requests arriving when the slots are all taken for more than --timeout are
+counted as errors. For every rate the throughput (answers per second), the
+p50/p95/p99 latency and the error rate of each kind of request are reported.
+
+usage:
+python -m smartfly.loadTest <prover url> [--rates 10,50,100] [--duration 30] [--mix root=1,leaf=8,index=1,tx=0]
+                            [--rpc http://127.0.0.1:7200] [--binary] [--json results.json]
+'''
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import urllib.request
+from collections import namedtuple
+
+import numpy as np
+
+from . import proofCodec
+from .difficultyNode import DifficultyNode
+from .verifier import ProverError, Verifier, fieldToInt, httpGet
+
+#header fields (see verifier.py)
+NumberIdx = 8
+
+KINDS = ("root", "leaf", "index", "tx")
+
+RequestResult = namedtuple("RequestResult", ["kind", "latency", "error"])
+
+
+def parseMix(mix):
+    '''
+    @param mix "root=1,leaf=8,..." relative weights of the kinds of request
+    @returns {kind: weight} of the kinds with weight > 0
+    '''
+    weights = {}
+    for item in mix.split(","):
+        kind, _, weight = item.partition("=")
+        if kind.strip() not in KINDS:
+            raise ValueError("unknown request kind " + kind + " (" + ", ".join(KINDS) + ")")
+        if float(weight) > 0:
+            weights[kind.strip()] = float(weight)
+    if not weights:
+        raise ValueError("empty request mix")
+    return weights
+
+
+def rpcCall(rpc, method, params):
+    request = urllib.request.Request(rpc, json.dumps({"jsonrpc": "2.0", "id": 1, "method": method,
+                                                      "params": params}).encode(),
+                                     {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())["result"]
+
+
+class Workload:
+    '''
+    Paths of the requests, drawn from the state of the prover
+    '''
+
+    def __init__(self, prover, mix, c=0.5, L=50, rpc=None, seed=None, timeout=30):
+        self.prover = prover.rstrip("/")
+        self.mix = mix
+        self.c = c
+        self.L = L
+        self.rpc = rpc
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        #sampler of the verifier and root of the prover chain (leaf requests)
+        self.verifier = None
+        self.root = None
+        #relative difficulties of the last sampling not requested yet
+        self.difficulties = []
+        self.firstBlock = None
+        self.lastBlock = None
+        self.txHashes = []
+
+    async def _getJSON(self, path):
+        _, body = await httpGet(self.prover + path, self.timeout)
+        document = json.loads(body)
+        if isinstance(document, dict) and "error" in document:
+            raise ProverError(path + ": " + str(document["error"]))
+        return document
+
+    async def prepare(self):
+        '''
+        Read the chain covered by the prover (and its transactions if the tx requests are in the mix)
+        '''
+        self.root = DifficultyNode.fromJSON((await self._getJSON("/MMR/root"))["rootDifficultyNode"])
+        self.verifier = Verifier([self.prover], c=self.c, L=self.L, seed=self.random.getrandbits(64))
+        firstLeaf, lastLeaf = await asyncio.gather(self._getJSON("/MMR/getLeafProof/0"),
+                                                   self._getJSON("/MMR/getLeafProof/1"))
+        self.firstBlock = fieldToInt(firstLeaf["leafBlocks"][0][NumberIdx])
+        self.lastBlock = fieldToInt(lastLeaf["leafBlocks"][-1][NumberIdx])
+        if "tx" in self.mix:
+            if self.rpc is None:
+                raise ValueError("--rpc is needed to draw the transactions of the tx requests")
+            for blockIdx in range(self.firstBlock, self.lastBlock + 1):
+                self.txHashes.extend(rpcCall(self.rpc, "eth_getBlockByNumber", [hex(blockIdx), False])["transactions"])
+            if not self.txHashes:
+                raise ValueError("no transactions in the blocks covered by the prover")
+
+    def nextRequest(self):
+        '''
+        @returns (kind, path) of a request drawn from the mix
+        '''
+        kind = self.random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if kind == "root":
+            return kind, "/MMR/root"
+        if kind == "leaf":
+            #the queries of a verification are independent: one is taken at a time
+            if not self.difficulties:
+                self.difficulties = self.verifier.sampleDifficulties(self.root)
+            return kind, "/MMR/getLeafProof/" + repr(self.difficulties.pop())
+        if kind == "index":
+            return kind, "/MMR/getLeafProofByIndex/" + str(self.random.randint(self.firstBlock, self.lastBlock))
+        return kind, "/MMR/getTxProof/" + self.random.choice(self.txHashes)
+
+
+async def runRate(workload, rate, duration, maxInFlight=256, binary=False, timeout=30):
+    '''
+    Poisson arrivals of rate requests/s for duration seconds
+    @returns (list of RequestResult, elapsed seconds until the last answer)
+    '''
+    slots = asyncio.Semaphore(maxInFlight)
+    accept = proofCodec.MIME_TYPE if binary else "application/json"
+    results = []
+
+    async def request(kind, path, scheduled):
+        error = None
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout - (time.perf_counter() - scheduled))
+        except (asyncio.TimeoutError, ValueError):
+            results.append(RequestResult(kind, time.perf_counter() - scheduled, "no connection slot"))
+            return
+        try:
+            contentType, body = await httpGet(workload.prover + path, timeout, accept)
+            #the errors of the prover are JSON documents {error: }
+            if contentType.startswith("application/json") and body[:9] == b'{"error":':
+                error = "prover error"
+        except ProverError as err:
+            error = str(err).split(": ", 1)[-1]
+        finally:
+            slots.release()
+        results.append(RequestResult(kind, time.perf_counter() - scheduled, error))
+
+    tasks = []
+    start = time.perf_counter()
+    scheduled = start
+    while True:
+        scheduled += workload.random.expovariate(rate)
+        if scheduled - start >= duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind, path = workload.nextRequest()
+        tasks.append(asyncio.ensure_future(request(kind, path, scheduled)))
+    await asyncio.gather(*tasks)
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    '''
+    @returns {kind or "all": {requests:, throughput:, errorRate:, p50Ms:, p95Ms:, p99Ms:}}
+    '''
+    summary = {}
+    for kind in ("all",) + KINDS:
+        selected = [result for result in results if kind == "all" or result.kind == kind]
+        if not selected:
+            continue
+        latencies = np.array([result.latency for result in selected if result.error is None]) * 1e3
+        errors = sum(result.error is not None for result in selected)
+        summary[kind] = {"requests": len(selected), "throughput": (len(selected) - errors) / elapsed,
+                         "errorRate": errors / len(selected)}
+        for name, q in (("p50Ms", 50), ("p95Ms", 95), ("p99Ms", 99)):
+            summary[kind][name] = float(np.percentile(latencies, q)) if len(latencies) else None
+    return summary
+
+
+async def loadTest(prover, rates, duration, mix, c=0.5, L=50, rpc=None, maxInFlight=256, binary=False, seed=None,
+                   timeout=30):
+    '''
+    @returns list of (rate, summary, error messages with their count)
+    '''
+    workload = Workload(prover, mix, c, L, rpc, seed, timeout)
+    await workload.prepare()
+    report = []
+    for rate in rates:
+        results, elapsed = await runRate(workload, rate, duration, maxInFlight, binary, timeout)
+        errors = {}
+        for result in results:
+            if result.error is not None:
+                errors[result.error] = errors.get(result.error, 0) + 1
+        report.append((rate, summarize(results, elapsed), errors))
+    return report
+
+
+def printReport(report):
+    def milliseconds(value):
+        return "%10.1f" % value if value is not None else "%10s" % "-"
+
+    print("%8s %-6s %9s %11s %8s %10s %10s %10s" % ("rate", "kind", "requests", "throughput", "errors",
+                                                    "p50 ms", "p95 ms", "p99 ms"))
+    for rate, summary, errors in report:
+        for kind, values in summary.items():
+            print("%8g %-6s %9d %11.1f %7.1f%% %s %s %s" % (rate, kind, values["requests"], values["throughput"],
+                                                           values["errorRate"] * 100, milliseconds(values["p50Ms"]),
+                                                           milliseconds(values["p95Ms"]), milliseconds(values["p99Ms"])))
+        for message, count in sorted(errors.items(), key=lambda item: -item[1])[:5]:
+            print("%8s %d x %s" % ("", count, message))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop load test of a SmartFly prover")
+    parser.add_argument("prover", help="prover URL (e.g. http://127.0.0.1:8081)")
+    parser.add_argument("--rates", default="10,50,100", help="arrival rates to test (requests/s)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of every rate")
+    parser.add_argument("--mix", default="root=1,leaf=8,index=1,tx=0", help="weights of the kinds of request")
+    parser.add_argument("--c", type=float, default=0.5, help="c of the verifier sampling the leaf requests")
+    parser.add_argument("--L", type=int, default=50, help="L of the verifier sampling the leaf requests")
+    parser.add_argument("--rpc", default=None, help="node of the prover chain (transactions of the tx requests)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="requests open at the same time")
+    parser.add_argument("--binary", action="store_true", help="ask the proofs in the binary format")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds before a request is an error")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the arrivals and of the requests")
+    parser.add_argument("--json", default=None, help="file where the results are written")
+    args = parser.parse_args()
+
+    report = asyncio.run(loadTest(args.prover, [float(rate) for rate in args.rates.split(",")], args.duration,
+                                  parseMix(args.mix), args.c, args.L, args.rpc, args.max_in_flight, args.binary,
+                                  args.seed, args.timeout))
+    printReport(report)
+    if args.json is not None:
+        with open(args.json, "w") as resultsFile:
+            json.dump([{"rate": rate, "summary": summary, "errors": errors} for rate, summary, errors in report],
+                      resultsFile, indent=1)
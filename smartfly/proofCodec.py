@@ -0,0 +1,243 @@
+'''
+Python side of the binary proof format of the prover (js/Prover Module/ProofCodec.js).
+
+The proofs are RLP lists (see ProofCodec.js for the layout). The decoders
+return the same dictionaries of the JSON API, so the verifier checks both
+formats with the same code.
+'''
+
+import json
+
+MIME_TYPE = "application/x-smartfly-rlp"
+
+
+class DecodingError(ValueError):
+    pass
+
+
+# ********************************* RLP *******************************
+
+def hexToBytes(value):
+    '''
+    Bytes of a hex string as encoded by the JS rlp library ('0x' is empty, odd lengths are padded)
+    '''
+    value = value[2:] if value.startswith("0x") else value
+    if len(value) % 2:
+        value = "0" + value
+    return bytes.fromhex(value)
+
+
+def rlpEncode(item):
+    if isinstance(item, list):
+        payload = b"".join(rlpEncode(element) for element in item)
+        return _rlpLength(len(payload), 0xc0) + payload
+    if isinstance(item, int):
+        item = item.to_bytes((item.bit_length() + 7) // 8, "big")
+    elif isinstance(item, str):
+        item = hexToBytes(item)
+    if len(item) == 1 and item[0] < 0x80:
+        return item
+    return _rlpLength(len(item), 0x80) + item
+
+
+def _rlpLength(length, offset):
+    if length < 56:
+        return bytes([offset + length])
+    lengthBytes = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([offset + 55 + len(lengthBytes)]) + lengthBytes
+
+
+def rlpDecode(data):
+    item, end = _rlpDecodeAt(data, 0)
+    if end != len(data):
+        raise DecodingError("trailing bytes after RLP item")
+    return item
+
+
+def _rlpDecodeAt(data, start):
+    '''
+    @returns (item, end position)
+    '''
+    if start >= len(data):
+        raise DecodingError("truncated RLP item")
+    prefix = data[start]
+    if prefix < 0x80:
+        return data[start:start + 1], start + 1
+    if prefix < 0xc0:
+        offset, length = _rlpHeader(data, start, 0x80)
+        return data[offset:offset + length], offset + length
+    offset, length = _rlpHeader(data, start, 0xc0)
+    items = []
+    position = offset
+    while position < offset + length:
+        item, position = _rlpDecodeAt(data, position)
+        items.append(item)
+    if position != offset + length:
+        raise DecodingError("RLP list length mismatch")
+    return items, position
+
+
+def _rlpHeader(data, start, offset):
+    prefix = data[start] - offset
+    if prefix < 56:
+        begin, length = start + 1, prefix
+    else:
+        lengthOfLength = prefix - 55
+        begin = start + 1 + lengthOfLength
+        length = int.from_bytes(data[start + 1:begin], "big")
+    if begin + length > len(data):
+        raise DecodingError("truncated RLP item")
+    return begin, length
+
+
+# ********************************* PROOFS *******************************
+
+def _int(item):
+    if not isinstance(item, bytes):
+        raise DecodingError("integer expected")
+    return int.from_bytes(item, "big")
+
+
+def _list(item, length=None):
+    if not isinstance(item, list) or (length is not None and len(item) != length):
+        raise DecodingError("list" + ("" if length is None else " of " + str(length) + " items") + " expected")
+    return item
+
+
+def _hex(item):
+    if not isinstance(item, bytes):
+        raise DecodingError("bytes expected")
+    return "0x" + item.hex()
+
+
+def decodeNode(item):
+    fields = _list(item, 7)
+    return {"peak": _hex(fields[0]), "tFirstBlock": _int(fields[1]), "tLastBlock": _int(fields[2]),
+            "dFirstBlock": _int(fields[3]), "dLastBlock": _int(fields[4]),
+            "nodeDifficulty": _int(fields[5]), "numberOfBlocksCoverd": _int(fields[6])}
+
+
+def decodeHeader(item):
+    return [_hex(field) for field in _list(item)]
+
+
+def decodeTxProof(item):
+    if _list(item) == []:
+        return None
+    nodes, blockContainingTx, txIndex = _list(item, 3)
+    return {"JSONProof": json.dumps([_hex(node) for node in _list(nodes)]),
+            "blockContainingTx": _hex(blockContainingTx), "txIndex": _int(txIndex)}
+
+
+def decodeLeafProof(data):
+    leafIdx, lastLeafIdx, nodes, headers, txProof = _list(rlpDecode(data), 5)
+    return {"leafIdx": _int(leafIdx), "lastLeafIdx": _int(lastLeafIdx),
+            "leafProof": [decodeNode(node) for node in _list(nodes)],
+            "leafBlocks": [decodeHeader(header) for header in _list(headers)],
+            "txDifficultyMPTProof": decodeTxProof(txProof)}
+
+
+def decodeRootProof(data):
+    header, txProof, root = _list(rlpDecode(data), 3)
+    return {"blockHeader": decodeHeader(header), "txDifficultyMPTProof": decodeTxProof(txProof),
+            "rootDifficultyNode": decodeNode(root)}
+
+
+def decodeBatchLeafProof(data):
+    lastLeafIdx, nodes, leafs = _list(rlpDecode(data), 3)
+    batchNodes = {}
+    for level, index, node in (_list(item, 3) for item in _list(nodes)):
+        batchNodes[str(_int(level)) + "," + str(_int(index))] = decodeNode(node)
+    batchLeafs = []
+    for leafIdx, positions, headers, txProof in (_list(item, 4) for item in _list(leafs)):
+        batchLeafs.append({"leafIdx": _int(leafIdx),
+                           "proofPositions": [[_int(level), _int(index)] for level, index in
+                                              (_list(position, 2) for position in _list(positions))],
+                           "leafBlocks": [decodeHeader(header) for header in _list(headers)],
+                           "txDifficultyMPTProof": decodeTxProof(txProof)})
+    return {"lastLeafIdx": _int(lastLeafIdx), "nodes": batchNodes, "leafs": batchLeafs}
+
+
+def decodeLeafRecord(item):
+    leafIdx, node, firstBlockIdx, numberOfBlocks, txHash = _list(item, 5)
+    return {"leafIdx": _int(leafIdx), "leaf": decodeNode(node), "firstBlockIdx": _int(firstBlockIdx),
+            "numberOfBlocks": _int(numberOfBlocks), "txHash": _hex(txHash) if txHash else None}
+
+
+def iterLeafRecords(chunks):
+    '''
+    Leaf records of a binary leaf stream (/MMR/leafs/stream), decoded as the chunks arrive
+    @param chunks iterable of bytes (e.g. the reads of an HTTP response)
+    '''
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while start < len(buffer):
+            try:
+                item, end = _rlpDecodeAt(buffer, start)
+            except DecodingError:
+                #the record continues in the next chunk
+                break
+            yield decodeLeafRecord(item)
+            start = end
+        buffer = buffer[start:]
+    if buffer:
+        raise DecodingError("truncated leaf stream")
+
+
+def encodeTxProof(txProof):
+    if txProof is None:
+        return []
+    nodes = [bytes(node["data"]) if isinstance(node, dict) else hexToBytes(node)
+             for node in json.loads(txProof["JSONProof"])]
+    return [nodes, txProof["blockContainingTx"], int(txProof["txIndex"])]
+
+
+def encodeNode(node):
+    return [node["peak"]] + [int(node[field]) for field in ("tFirstBlock", "tLastBlock", "dFirstBlock", "dLastBlock",
+                                                             "nodeDifficulty", "numberOfBlocksCoverd")]
+
+
+def encodeLeafProof(leafProof):
+    '''
+    Binary format of a JSON leaf proof (same bytes of ProofCodec.encodeLeafProof)
+    '''
+    return rlpEncode([int(leafProof["leafIdx"]), int(leafProof["lastLeafIdx"]),
+                      [encodeNode(node) for node in leafProof["leafProof"]], leafProof["leafBlocks"] or [],
+                      encodeTxProof(leafProof["txDifficultyMPTProof"])])
+
+
+def encodeRootProof(rootProof):
+    '''
+    Binary format of a JSON root proof (same bytes of ProofCodec.encodeRootProof)
+    '''
+    return rlpEncode([rootProof["blockHeader"], encodeTxProof(rootProof["txDifficultyMPTProof"]),
+                      encodeNode(rootProof["rootDifficultyNode"])])
+
+
+def encodeBatchLeafProof(batchProof):
+    '''
+    Binary format of a JSON batch proof (same bytes of ProofCodec.encodeBatchLeafProof)
+    '''
+    nodes = [[int(level), int(index), encodeNode(node)] for level, index, node in
+             ((*position.split(","), node) for position, node in batchProof["nodes"].items())]
+    leafs = [[int(leaf["leafIdx"]), [[int(level), int(index)] for level, index in leaf["proofPositions"]],
+              leaf["leafBlocks"] or [], encodeTxProof(leaf["txDifficultyMPTProof"])] for leaf in batchProof["leafs"]]
+    return rlpEncode([int(batchProof["lastLeafIdx"]), nodes, leafs])
+
+
+DECODERS = {"root": decodeRootProof, "leaf": decodeLeafProof, "batch": decodeBatchLeafProof}
+
+
+def decodeProof(kind, contentType, body):
+    '''
+    Proof of an HTTP response in any of the two formats
+    @param kind "root", "leaf" or "batch"
+    '''
+    if contentType.split(";")[0].strip() == MIME_TYPE:
+        return DECODERS[kind](body)
+    try:
+        return json.loads(body)
+    except ValueError as err:
+        raise DecodingError("invalid JSON (" + str(err) + ")")
@@ -0,0 +1,227 @@
+'''
+Vectorized version of Prover.generateProofSimulation (js/Prover Module/Prover.js)
+
+All the expNumber x mQueries samples of the Bunz distribution are drawn at
+once, mapped to the MMR leaves with a vectorized copy of the
+binarySearchClosest of the JS tree and the proof sizes are computed from
+the coordinates of the proof nodes, without building any MMR node.
+
+The sizes have the same meaning of the JS ones:
+    proofSizeWithDuplicates: root + every sampled leaf with its full proof
+    proofSizeNoDuplicates:   root + every leaf sampled for the first time
+                             with only the MMR nodes not already obtained
+                             from the previous proofs of the same experiment
+'''
+
+import math
+
+import numpy as np
+
+from .difficultyMMR import oddLevels
+
+# Proof simulation sizes (same as Prover.js)
+MTPAndReciptSizeInBytes = 600
+BlockHeaderSizeInBytes = 508
+MMRNodeSizeInBytes = 4*8 + 2*16 + 32
+#hash of the block containing the receipt + tx position
+TxInfoSizeInBytes = 32 + 8
+
+
+def getSimulationParameters(numberOfBlocksPerLeaf, c, L, lamb, chainLength):
+    '''
+    Parameters of the Bunz sampling as computed by generateProofSimulation
+    returns numberOfLeafs, wightPercentage (L/n), kFraction, mQueries
+    '''
+    c = float(c)
+    numberOfLeafs = math.ceil(chainLength/numberOfBlocksPerLeaf)
+    #Original FlyClient paper n = chainLength
+    n = numberOfLeafs*numberOfBlocksPerLeaf
+    wightPercentage = L/n
+    kFraction = math.log(L/n) / math.log(c)
+    mQueries = math.ceil(lamb / (math.log(1 - 1/kFraction) / math.log(0.5)))
+    return numberOfLeafs, wightPercentage, kFraction, mQueries
+
+
+def getSimulatedProofLengthInByte(numberOfMMRNodes, blocksPerLeaf):
+    '''
+    Same as Prover.getSimulatedProofLengthInByte, works on arrays of node counts
+    '''
+    return (MMRNodeSizeInBytes*numberOfMMRNodes + BlockHeaderSizeInBytes*blocksPerLeaf
+            + MTPAndReciptSizeInBytes + TxInfoSizeInBytes)
+
+
+def randomSampler(L_n, y):
+    '''
+    Inverse CDF of the Bunz distribution (Prover.randomSampler) applied to y in [0,1)
+    '''
+    return 1 - L_n**y
+
+
+def binarySearchClosest(arr, values):
+    '''
+    Vectorized DifficultyMMRTree.binarySearchClosest: for every value the index
+    where it is found in arr or the last middle point explored by the search
+    '''
+    values = np.asarray(values)
+    start = np.zeros(values.shape, dtype=np.int64)
+    end = np.full(values.shape, len(arr) - 1, dtype=np.int64)
+    mid = np.zeros(values.shape, dtype=np.int64)
+    active = start <= end
+    while active.any():
+        mid = np.where(active, (start + end) // 2, mid)
+        midValues = arr[mid]
+        active &= midValues != values
+        goLeft = active & (values < midValues)
+        end = np.where(goLeft, mid - 1, end)
+        start = np.where(active & ~goLeft, mid + 1, start)
+        active &= start <= end
+    return mid
+
+
+def getLeafFromDifficulty(leafInfoArray, relativeDifficulty):
+    '''
+    Vectorized DifficultyMMRTree.getLeafFromDifficulty
+    '''
+    leafInfoArray = np.asarray(leafInfoArray)
+    requestedDifficulty = np.floor(leafInfoArray[-1] * relativeDifficulty)
+    return binarySearchClosest(leafInfoArray, requestedDifficulty)
+
+
+def bitLength(values):
+    '''
+    int.bit_length() of an array of non negative integers (smaller than 2**53)
+    '''
+    return np.frexp(np.asarray(values, dtype=np.float64))[1].astype(np.int64)
+
+
+def leafPeakLevel(leafIdx, numberOfLeafs):
+    '''
+    Level of the peak covering each leaf
+    '''
+    return bitLength(np.asarray(leafIdx, dtype=np.int64) ^ numberOfLeafs) - 1
+
+
+def leafProofLength(leafIdx, numberOfLeafs):
+    '''
+    Number of MMR nodes in getLeafProof of each leaf
+    '''
+    levels = oddLevels(numberOfLeafs)
+    peakLevel = leafPeakLevel(leafIdx, numberOfLeafs)
+    if len(levels) == 1:
+        return peakLevel
+    #number of bagging nodes given the level of the peak
+    baggingLength = np.zeros(levels[-1] + 1, dtype=np.int64)
+    for j, level in enumerate(levels):
+        baggingLength[level] = len(levels) - max(j, 1)
+    return peakLevel + baggingLength[peakLevel]
+
+
+def leafProofNodeIds(leafIdx, numberOfLeafs):
+    '''
+    Identifiers of the MMR nodes in the proof of each leaf (a node has the same
+    identifier in every proof it belongs to).
+    Returns (owner, nodeId): nodeId[k] is in the proof of leafIdx[owner[k]]
+    '''
+    leafIdx = np.asarray(leafIdx, dtype=np.int64)
+    levels = oddLevels(numberOfLeafs)
+    peakLevel = leafPeakLevel(leafIdx, numberOfLeafs)
+    #node (level, index) -> level*(numberOfLeafs + 1) + index
+    levelStride = numberOfLeafs + 1
+    owners = [np.zeros(0, dtype=np.int64)]
+    nodeIds = [np.zeros(0, dtype=np.int64)]
+    #siblings inside the perfect subtree of the peak
+    for level in range(levels[-1]):
+        inSubtree = np.nonzero(level < peakLevel)[0]
+        owners.append(inSubtree)
+        nodeIds.append(level*levelStride + ((leafIdx[inSubtree] >> level) ^ 1))
+    #bagging nodes
+    if len(levels) > 1:
+        levelToPeakIdx = np.zeros(levels[-1] + 1, dtype=np.int64)
+        for j, level in enumerate(levels):
+            levelToPeakIdx[level] = j
+        peakIdx = levelToPeakIdx[peakLevel]
+        for t, level in enumerate(levels):
+            peakId = level*levelStride + (numberOfLeafs >> level) - 1
+            if t == 0:
+                needed = peakIdx == 1
+            elif t == 1:
+                needed = peakIdx == 0
+            else:
+                needed = peakIdx < t
+            withPeak = np.nonzero(needed)[0]
+            owners.append(withPeak)
+            nodeIds.append(np.full(len(withPeak), peakId, dtype=np.int64))
+            if t >= 2:
+                #provisory node merging the peaks below this level
+                withProvisory = np.nonzero(peakIdx == t)[0]
+                owners.append(withProvisory)
+                nodeIds.append(np.full(len(withProvisory), level*levelStride + (numberOfLeafs >> level),
+                                       dtype=np.int64))
+    return np.concatenate(owners), np.concatenate(nodeIds)
+
+
+def proofSizesFromLeafs(sampledLeafs, numberOfLeafs, numberOfBlocksPerLeaf):
+    '''
+    Proof sizes of experiments given the sampled leaves (one row per experiment)
+    returns {proofSizeNoDuplicates: array, proofSizeWithDuplicates: array}
+    '''
+    sampledLeafs = np.asarray(sampledLeafs, dtype=np.int64)
+    expNumber = sampledLeafs.shape[0]
+    #root: one block + receipt + MPT proof
+    rootSize = BlockHeaderSizeInBytes + MTPAndReciptSizeInBytes
+
+    proofSizeWithDuplicates = rootSize + getSimulatedProofLengthInByte(
+        leafProofLength(sampledLeafs, numberOfLeafs), numberOfBlocksPerLeaf).sum(axis=1)
+
+    #leaves sampled for the first time in each experiment
+    sortedLeafs = np.sort(sampledLeafs, axis=1)
+    firstTime = np.ones(sortedLeafs.shape, dtype=bool)
+    firstTime[:, 1:] = sortedLeafs[:, 1:] != sortedLeafs[:, :-1]
+    experiment, column = np.nonzero(firstTime)
+    uniqueLeafs = sortedLeafs[experiment, column]
+    numberOfUniqueLeafs = np.bincount(experiment, minlength=expNumber)
+
+    #MMR nodes obtained at least once in each experiment
+    owner, nodeIds = leafProofNodeIds(uniqueLeafs, numberOfLeafs)
+    numberOfIds = (max(oddLevels(numberOfLeafs)) + 2)*(numberOfLeafs + 1)
+    uniqueKeys = np.unique(experiment[owner]*numberOfIds + nodeIds)
+    numberOfUniqueNodes = np.bincount(uniqueKeys // numberOfIds, minlength=expNumber)
+
+    proofSizeNoDuplicates = (rootSize
+                             + numberOfUniqueLeafs*getSimulatedProofLengthInByte(0, numberOfBlocksPerLeaf)
+                             + MMRNodeSizeInBytes*numberOfUniqueNodes)
+    return {"proofSizeNoDuplicates": proofSizeNoDuplicates,
+            "proofSizeWithDuplicates": proofSizeWithDuplicates}
+
+
+def dummyLeafInfoArray(numberOfBlocksPerLeaf, chainLength):
+    '''
+    leafInfoArray of the MMR built by Prover.fillDummyMMR
+    '''
+    numberOfLeafs = math.ceil(chainLength/numberOfBlocksPerLeaf)
+    return numberOfBlocksPerLeaf*np.arange(1, numberOfLeafs + 1, dtype=np.int64)
+
+
+def generateProofSimulations(numberOfBlocksPerLeaf, c, L, lamb, chainLength, expNumber,
+                             seed=0, leafInfoArray=None):
+    '''
+    Run expNumber proof simulations at once
+    @param numberOfBlocksPerLeaf Number of blocks per leaf
+    @param c Adversary fraction of power
+    @param L Blocks to always check
+    @param lamb Security coefficient
+    @param chainLength length of the chain (blocks)
+    @param expNumber number of experiments
+    @param seed seed of the experiments (repeatable simulations)
+    @param leafInfoArray cumulative difficulty of the MMR leaves (default: fillDummyMMR MMR)
+    @returns {proofSizeNoDuplicates: array, proofSizeWithDuplicates: array} one element per experiment
+    '''
+    if leafInfoArray is None:
+        leafInfoArray = dummyLeafInfoArray(numberOfBlocksPerLeaf, chainLength)
+    numberOfLeafs, wightPercentage, kFraction, mQueries = getSimulationParameters(
+        numberOfBlocksPerLeaf, c, L, lamb, chainLength)
+
+    rng = np.random.default_rng(seed)
+    relativeDifficulty = randomSampler(wightPercentage, rng.random((expNumber, mQueries)))
+    sampledLeafs = getLeafFromDifficulty(leafInfoArray, relativeDifficulty)
+    return proofSizesFromLeafs(sampledLeafs, len(leafInfoArray), numberOfBlocksPerLeaf)
@@ -0,0 +1,121 @@
+'''
+Proof sizes measured on a running prover next to the ones of the simulations.
+
+The root proof and the leaf proofs of a sampling (same distribution of the
+verifier) are downloaded in the JSON and in the binary format (proofCodec)
+and their bytes on the wire (HTTP body) are reported next to the sizes used
+by the proof simulations (proofSimulation.getSimulatedProofLengthInByte), for
+the single proofs and for one batch request. The same is done for the proof
+components: header, MMR node and receipt MPT proof.
+
+Provers without the binary format answer with JSON: their binary sizes are
+computed locally with the same encoding.
+
+usage:
+python -m smartfly.proofSizes <prover url> [--c C] [--L L] [--lamb LAMBDA] [--seed SEED]
+'''
+
+import argparse
+import asyncio
+import json
+
+from . import proofCodec
+from .difficultyNode import DifficultyNode
+from .proofSimulation import (BlockHeaderSizeInBytes, MMRNodeSizeInBytes, MTPAndReciptSizeInBytes,
+                              getSimulatedProofLengthInByte)
+from .verifier import ProverError, Verifier, httpGet
+
+ENCODERS = {"root": proofCodec.encodeRootProof, "leaf": proofCodec.encodeLeafProof,
+            "batch": proofCodec.encodeBatchLeafProof}
+
+
+async def getBothFormats(url, kind, timeout):
+    '''
+    @returns (proof, JSON bytes, binary bytes)
+    '''
+    (_, JSONBody), (contentType, binaryBody) = await asyncio.gather(
+        httpGet(url, timeout), httpGet(url, timeout, proofCodec.MIME_TYPE))
+    proof = json.loads(JSONBody)
+    if "error" in proof:
+        raise RuntimeError(url + ": " + proof["error"])
+    if contentType.split(";")[0].strip() != proofCodec.MIME_TYPE:
+        binaryBody = ENCODERS[kind](proof)
+    return proof, len(JSONBody), len(binaryBody)
+
+
+def componentSizes(leafProofs):
+    '''
+    Mean binary size of the components of the proofs
+    @returns {component: (mean size, size of the simulations)}
+    '''
+    headers = [header for proof in leafProofs for header in proof["leafBlocks"]]
+    nodes = [node for proof in leafProofs for node in proof["leafProof"]]
+    txProofs = [proof["txDifficultyMPTProof"] for proof in leafProofs if proof["txDifficultyMPTProof"]]
+
+    def mean(sizes):
+        return sum(sizes) / len(sizes) if sizes else 0
+
+    return {"block header": (mean([len(proofCodec.rlpEncode(header)) for header in headers]), BlockHeaderSizeInBytes),
+            "MMR node": (mean([len(proofCodec.rlpEncode(proofCodec.encodeNode(node))) for node in nodes]),
+                         MMRNodeSizeInBytes),
+            "MPT proof": (mean([len(proofCodec.rlpEncode(proofCodec.encodeTxProof(txProof))) for txProof in txProofs]),
+                          MTPAndReciptSizeInBytes)}
+
+
+async def measure(prover, c=0.5, L=50, lamb=10, seed=None, timeout=30):
+    '''
+    @returns dictionary of the measured and simulated sizes (bytes)
+    '''
+    prover = prover.rstrip("/")
+    rootProof, rootJSON, rootBinary = await getBothFormats(prover + "/MMR/root", "root", timeout)
+    root = DifficultyNode.fromJSON(rootProof["rootDifficultyNode"])
+    difficulties = Verifier([prover], c=c, L=L, lamb=lamb, seed=seed).sampleDifficulties(root)
+    leafs = await asyncio.gather(*[getBothFormats(prover + "/MMR/getLeafProof/" + repr(d), "leaf", timeout)
+                                   for d in difficulties])
+    batchPath = prover + "/MMR/getLeafProofs/" + ",".join(repr(d) for d in difficulties)
+    try:
+        batchProof, batchJSON, batchBinary = await getBothFormats(batchPath, "batch", timeout)
+    except (RuntimeError, ProverError):
+        #too many queries for a batch of the prover (error payload or a URL too long for it)
+        batchProof, batchJSON, batchBinary = None, None, None
+
+    leafProofs = [proof for proof, _, _ in leafs]
+    rootSimulated = BlockHeaderSizeInBytes + MTPAndReciptSizeInBytes
+    leafsSimulated = sum(getSimulatedProofLengthInByte(len(proof["leafProof"]), len(proof["leafBlocks"]))
+                         for proof in leafProofs)
+    sizes = {"queries": len(difficulties),
+             "root": (rootJSON, rootBinary, rootSimulated),
+             "leafs": (sum(size for _, size, _ in leafs), sum(size for _, _, size in leafs), leafsSimulated),
+             "components": componentSizes(leafProofs)}
+    if batchProof is not None:
+        #every distinct leaf and MMR node once (proofSizeNoDuplicates of the simulations)
+        distinctLeafs = {leaf["leafIdx"]: leaf for leaf in batchProof["leafs"]}
+        batchSimulated = (MMRNodeSizeInBytes * len(batchProof["nodes"]) +
+                          sum(getSimulatedProofLengthInByte(0, len(leaf["leafBlocks"]))
+                              for leaf in distinctLeafs.values()))
+        sizes["batch"] = (batchJSON, batchBinary, batchSimulated)
+    return sizes
+
+
+def printSizes(sizes):
+    print("Sampled leafs: " + str(sizes["queries"]))
+    print("%-22s %12s %12s %12s %10s" % ("", "JSON", "binary", "simulated", "binary/sim"))
+    for name, label in (("root", "root proof"), ("leafs", "leaf proofs (single)"), ("batch", "leaf proofs (batch)")):
+        if name not in sizes:
+            continue
+        JSONSize, binarySize, simulatedSize = sizes[name]
+        print("%-22s %12d %12d %12d %10.2f" % (label, JSONSize, binarySize, simulatedSize, binarySize / simulatedSize))
+    print("%-22s %12s %12s %12s" % ("mean component", "", "binary", "simulated"))
+    for name, (binarySize, simulatedSize) in sizes["components"].items():
+        print("%-22s %12s %12.1f %12d" % (name, "", binarySize, simulatedSize))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measured vs simulated SmartFly proof sizes")
+    parser.add_argument("prover", help="prover URL (e.g. http://127.0.0.1:8081)")
+    parser.add_argument("--c", type=float, default=0.5, help="adversary fraction of power")
+    parser.add_argument("--L", type=int, default=50, help="blocks always checked")
+    parser.add_argument("--lamb", type=float, default=10, help="security parameter")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the sampled difficulties")
+    args = parser.parse_args()
+    printSizes(asyncio.run(measure(args.prover, c=args.c, L=args.L, lamb=args.lamb, seed=args.seed)))
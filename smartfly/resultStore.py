@@ -0,0 +1,234 @@
+'''
+Columnar binary store for the results of the experiments (proof sizes and
+gas costs), replacing one text file of space separated integers per
+parameter combination.
+
+A store is a directory, every table of the store (e.g. "ProofSizeInteval",
+"GCF") is made of two append-only files:
+    <table>.bin    the samples of all the runs, little endian int64
+    <table>.index  one JSON line per appended chunk:
+                   {"key": {parameter: value}, "offset": first sample, "count": samples}
+Parameter values are stored as strings (str(value), the same text used in
+the old file names), so 0.5 and "0.5" are the same key.
+
+The .bin file is memory mapped: the samples of a key written in a single
+chunk are a zero-copy slice of it. Appends are serialized with a lock file,
+so the processes of gridRunner.runGrid can write to the same store.
+
+The old text files can be imported with:
+python -m smartfly.resultStore <directory with the .txt files> [<store directory>]
+'''
+
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    #no lock available (Windows): only one writer at a time
+    fcntl = None
+
+SAMPLE_DTYPE = np.dtype("<i8")
+
+#old text files: table name and parameters from the file name
+TEXT_FILE_PATTERNS = [
+    (re.compile(r"^(?P<table>(Duplicates)?ProofSizeInteval)_n=(?P<n>[^_]+)_c=(?P<c>[^_]+)_L=(?P<L>[^_]+)"
+                r"_lamb=(?P<lamb>[^_]+)_cl=(?P<cl>[^_]+)\.txt$"), ("n", "c", "L", "lamb", "cl")),
+    (re.compile(r"^(?P<table>GCF)(?P<n>\d+)(?P<semi>_semi)?_exp\.txt$"), ("n",)),
+]
+
+
+def normalizeKey(key):
+    return {name: str(value) for name, value in key.items()}
+
+
+def keyId(key):
+    '''
+    Identifier of a key (independent from the order of the parameters)
+    '''
+    return json.dumps(normalizeKey(key), sort_keys=True)
+
+
+def readTextSamples(path):
+    '''
+    Samples of an old text file (space separated integers)
+    '''
+    with open(path) as f:
+        return np.array([int(data) for data in f.read().split(" ") if data.strip() != ""], dtype=SAMPLE_DTYPE)
+
+
+class ResultTable:
+
+    def __init__(self, directory, name):
+        self.binPath = os.path.join(directory, name + ".bin")
+        self.indexPath = os.path.join(directory, name + ".index")
+        self.lockPath = os.path.join(directory, name + ".lock")
+        self._indexSize = -1
+        self._chunks = {}
+        self._keys = {}
+        self._data = None
+
+    # ********************************* WRITE *******************************
+
+    def append(self, key, values, replace=False):
+        '''
+        Append the samples of a run of key
+        @param key dict {parameter: value}
+        @param values samples (integers)
+        @param replace if True the samples already stored for key are dropped
+        '''
+        values = np.ascontiguousarray(values, dtype=SAMPLE_DTYPE)
+        with open(self.lockPath, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            with open(self.binPath, "ab") as f:
+                #samples left by an interrupted append are never indexed
+                offset = f.seek(0, os.SEEK_END) // SAMPLE_DTYPE.itemsize
+                f.seek(offset*SAMPLE_DTYPE.itemsize)
+                f.truncate()
+                f.write(values.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            entry = {"key": normalizeKey(key), "offset": offset, "count": len(values)}
+            if replace:
+                entry["replace"] = True
+            with open(self.indexPath, "a") as f:
+                f.write(json.dumps(entry, sort_keys=True) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    # ********************************* READ *******************************
+
+    def _refresh(self):
+        '''
+        Reload the index (and the mapping of the samples) if the table changed
+        '''
+        indexSize = os.path.getsize(self.indexPath) if os.path.exists(self.indexPath) else 0
+        if indexSize == self._indexSize:
+            return
+        self._indexSize = indexSize
+        self._chunks = {}
+        self._keys = {}
+        if indexSize > 0:
+            with open(self.indexPath) as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        #last line of an interrupted append
+                        break
+                    entry = json.loads(line)
+                    identifier = keyId(entry["key"])
+                    if entry.get("replace") or identifier not in self._chunks:
+                        self._chunks[identifier] = []
+                    self._chunks[identifier].append((entry["offset"], entry["count"]))
+                    self._keys[identifier] = entry["key"]
+        binSize = os.path.getsize(self.binPath) if os.path.exists(self.binPath) else 0
+        if binSize >= SAMPLE_DTYPE.itemsize:
+            self._data = np.memmap(self.binPath, dtype=SAMPLE_DTYPE, mode="r",
+                                   shape=(binSize // SAMPLE_DTYPE.itemsize,))
+        else:
+            self._data = np.zeros(0, dtype=SAMPLE_DTYPE)
+
+    def keys(self):
+        '''
+        All the keys in the table
+        '''
+        self._refresh()
+        return list(self._keys.values())
+
+    def get(self, **key):
+        '''
+        Samples of a key (read only). A key written in one chunk is a view of the
+        mapped file, more chunks are concatenated
+        @throws KeyError if the key is not in the table
+        '''
+        self._refresh()
+        chunks = self._chunks[keyId(key)]
+        if len(chunks) == 1:
+            offset, count = chunks[0]
+            return self._data[offset:offset + count]
+        return np.concatenate([self._data[offset:offset + count] for offset, count in chunks])
+
+    def select(self, **filters):
+        '''
+        Every key matching the filters (parameter=value or parameter=[values])
+        @returns list of (key, samples) in the order the keys were written
+        '''
+        self._refresh()
+        accepted = {}
+        for name, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            accepted[name] = set(str(v) for v in values)
+        results = []
+        for identifier, key in self._keys.items():
+            if all(key.get(name) in values for name, values in accepted.items()):
+                results.append((key, self.get(**key)))
+        return results
+
+
+class ResultStore:
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._tables = {}
+
+    def table(self, name):
+        if name not in self._tables:
+            self._tables[name] = ResultTable(self.directory, name)
+        return self._tables[name]
+
+    def append(self, table, key, values, replace=False):
+        os.makedirs(self.directory, exist_ok=True)
+        self.table(table).append(key, values, replace)
+
+    def get(self, table, **key):
+        return self.table(table).get(**key)
+
+    def select(self, table, **filters):
+        return self.table(table).select(**filters)
+
+    def keys(self, table):
+        return self.table(table).keys()
+
+    def appendTextFile(self, path, **extraKey):
+        '''
+        Append the samples of an old text file (table and parameters from its name)
+        @param extraKey parameters not in the file name (e.g. cl of the gas costs)
+        @returns table name or None if the file name is not a result file
+        '''
+        fileName = os.path.basename(path)
+        for pattern, names in TEXT_FILE_PATTERNS:
+            match = pattern.match(fileName)
+            if match is None:
+                continue
+            key = {name: match.group(name) for name in names}
+            if match.group("table") == "GCF":
+                #0) untrusted 1) semi-trusted
+                key["trustHp"] = 1 if match.group("semi") else 0
+            key.update(extraKey)
+            self.append(match.group("table"), key, readTextSamples(path), replace=True)
+            return match.group("table")
+        return None
+
+
+def importTextResults(textDirectory, storeDirectory=None):
+    '''
+    Import all the old text result files of a directory in a store
+    (default: the same directory)
+    '''
+    store = ResultStore(storeDirectory or textDirectory)
+    imported = 0
+    for fileName in sorted(os.listdir(textDirectory)):
+        if store.appendTextFile(os.path.join(textDirectory, fileName)) is not None:
+            imported += 1
+    return imported
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("usage: python -m smartfly.resultStore <text directory> [<store directory>]")
+        sys.exit(1)
+    print(str(importTextResults(*sys.argv[1:])) + " files imported")
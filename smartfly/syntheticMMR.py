@@ -0,0 +1,87 @@
+'''
+Difficulty MMR made of identical leaves (the dummy MMR of Prover.fillDummyMMR)
+with structural sharing.
+
+All the perfect subtrees of the same height of such a tree are byte-identical,
+so only one node per level is kept: subtrees[h] is the root of a perfect
+subtree of 2**h leaves. Building a tree of n leaves costs O(log n) merges and
+O(log n) memory, and roots and proofs are the same of a DifficultyMMRTree
+filled leaf by leaf.
+'''
+
+from .difficultyMMR import DifficultyMMRTree
+
+
+class UniformLeafInfoArray:
+    '''
+    Read-only leafInfoArray (cumulative difficulty) of numberOfLeafs leaves
+    with the same difficulty, computed on access
+    '''
+
+    def __init__(self, leafDifficulty, numberOfLeafs=0):
+        self.leafDifficulty = leafDifficulty
+        self.numberOfLeafs = numberOfLeafs
+
+    def __len__(self):
+        return self.numberOfLeafs
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.numberOfLeafs
+        if not 0 <= index < self.numberOfLeafs:
+            raise IndexError("leaf index out of range")
+        return self.leafDifficulty*(index + 1)
+
+
+class SyntheticMMRTree(DifficultyMMRTree):
+
+    def __init__(self, leaf, numberOfLeafs=0):
+        '''
+        @param leaf DifficultyNode repeated in every leaf
+        @param numberOfLeafs number of leaves to add
+        '''
+        self.leaf = leaf
+        #roots of the perfect subtrees, one per height
+        self.subtrees = [leaf]
+        self.numberOfLeafs = 0
+        self.leafInfoArray = UniformLeafInfoArray(leaf.getNodeDifficulty())
+        self._provisoryNodes = {}
+        self.addLeafs(numberOfLeafs)
+
+    def addLeafs(self, numberOfLeafs):
+        '''
+        Append numberOfLeafs copies of the leaf
+        '''
+        if numberOfLeafs <= 0:
+            return
+        self.numberOfLeafs += numberOfLeafs
+        self.leafInfoArray.numberOfLeafs = self.numberOfLeafs
+        while len(self.subtrees) < self.numberOfLeafs.bit_length():
+            self.subtrees.append(self.subtrees[-1].mergeNodes(self.subtrees[-1]))
+        self._provisoryNodes = None
+
+    def addLeaf(self, newDifficultyNode=None):
+        '''
+        Append a leaf: it must be equal to the leaf of the tree
+        '''
+        if newDifficultyNode is not None and newDifficultyNode.toTuple() != self.leaf.toTuple():
+            raise ValueError("A SyntheticMMRTree only accepts copies of its leaf")
+        self.addLeafs(1)
+
+    def _getPeak(self, level):
+        return self.subtrees[level]
+
+    def getNodeValue(self, index, level=0):
+        if 0 <= index < (self.numberOfLeafs >> level):
+            return self.subtrees[level]
+        if index == self.numberOfLeafs >> level:
+            return self._getProvisoryNodes().get(level)
+        return None
+
+    def getLeafIndex(self, hashed_value):
+        if self.numberOfLeafs > 0 and self.leaf.peak == hashed_value:
+            return 0
+        return -1
+
+    def getLeafArray(self):
+        return [self.leaf]*self.numberOfLeafs
@@ -0,0 +1,592 @@
+'''
+Asynchronous SmartFly verifier (sampling protocol against a list of provers).
+
+    1- the root proof (/MMR/root) is requested to all the provers at the same
+       time and verified: header hash, receipt MPT proof and root hash in the
+       EventLogRootHash log of the receipt
+    2- the provers are grouped by root, the heaviest root is checked first
+    3- the relative difficulties to check are drawn from the Bunz distribution
+       (same sampler of Prover.generateProofSimulation) and the leaf proofs
+       (/MMR/getLeafProof, or /MMR/getLeafProofs with batch=True) are requested
+       at the same time, spread over the provers agreeing on the root
+    4- every leaf is rebuilt from its block headers, its MMR path is hashed up
+       to the root, the difficulty of the nodes on the left of the path must
+       place the leaf at the sampled relative difficulty and its receipt MPT
+       proof is checked
+
+A prover failing a check (or a request) is dropped as soon as it happens:
+its requests still running are cancelled and sent to another prover of the
+same group. If no prover of a group is left the next root is checked.
+All the requests of a step run concurrently, so the verification takes
+about two round trips (root, leaves) whatever the number of samples.
+
+With binary=True the proofs are asked in the RLP format of proofCodec.
+
+The proofs are verified in batch: the nodes and the merges shared by the
+paths (the ones near the peaks) are decoded and hashed once per verification.
+
+usage:
+python -m smartfly.verifier <prover url> [<prover url> ...] [--c C] [--L L] [--lamb LAMBDA] [--batch] [--binary]
+'''
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from .difficultyMMR import oddLevels
+from .difficultyNode import DifficultyNode, keccak256, toHex
+from .proofCodec import MIME_TYPE, decodeProof, hexToBytes, rlpDecode, rlpEncode
+from .proofSimulation import getSimulationParameters, randomSampler
+
+#Blocks constants (same inverted names of Prover.js)
+DifficultyIdx = 11
+TimeIdx = 7
+ParentHashIdx = 0
+ReceiptsRootIdx = 5
+
+VerificationResult = namedtuple("VerificationResult",
+                                ["valid", "root", "provers", "leafsChecked", "failedProvers", "elapsed"])
+
+
+class ProverError(Exception):
+    '''
+    The prover did not answer (network, HTTP or JSON error)
+    '''
+    pass
+
+
+class VerificationError(Exception):
+    '''
+    A proof sent by the prover is not valid
+    '''
+    pass
+
+
+# ********************************* BLOCKS *******************************
+
+def headerFields(header):
+    '''
+    Fields of a block header as returned by the prover (BlockManager.getSingleBlock)
+    '''
+    return [hexToBytes(field) for field in header]
+
+
+def blockHash(header):
+    return keccak256(rlpEncode(headerFields(header)))
+
+
+def fieldToInt(field):
+    return int.from_bytes(hexToBytes(field), "big")
+
+
+def leafFromBlocks(blocks):
+    '''
+    MMR leaf covering blocks (same as Prover.createMMRLeafFromArrayOfBlocks):
+    the peak is the hash of the last block, nodeDifficulty the sum of the block
+    difficulties (the number of blocks on chains without difficulty, e.g. Ganache)
+    '''
+    nodeDifficulty = sum(fieldToInt(block[TimeIdx]) for block in blocks)
+    if nodeDifficulty == 0:
+        nodeDifficulty = len(blocks)
+    return DifficultyNode(toHex(blockHash(blocks[-1])),
+                          fieldToInt(blocks[0][DifficultyIdx]), fieldToInt(blocks[-1][DifficultyIdx]),
+                          fieldToInt(blocks[0][TimeIdx]), fieldToInt(blocks[-1][TimeIdx]),
+                          nodeDifficulty, len(blocks))
+
+
+def verifyBlocksChain(blocks):
+    '''
+    Every block must be the parent of the next one
+    @returns hashes of the blocks
+    '''
+    hashes = [blockHash(block) for block in blocks]
+    for i in range(1, len(blocks)):
+        if hexToBytes(blocks[i][ParentHashIdx]) != hashes[i - 1]:
+            raise VerificationError("block " + str(i) + " of the leaf is not a child of the previous one")
+    return hashes
+
+
+# ********************************* RECEIPT MPT PROOF *******************************
+
+def decodeJSONProof(JSONProof):
+    '''
+    Nodes of the JSONProof field (JSON.stringify of an array of Buffers)
+    '''
+    nodes = []
+    for node in json.loads(JSONProof):
+        if isinstance(node, dict):
+            nodes.append(bytes(node["data"]))
+        else:
+            nodes.append(hexToBytes(node))
+    return nodes
+
+
+def _nibbles(data):
+    return [nibble for byte in data for nibble in (byte >> 4, byte & 0x0f)]
+
+
+def verifyMerkleProof(rootHash, key, proofNodes):
+    '''
+    Value stored at key in the Merkle Patricia trie with root rootHash
+    @throws VerificationError if the proof does not prove the key
+    '''
+    nodesByHash = {keccak256(node): node for node in proofNodes}
+    path = _nibbles(key)
+    reference = rootHash
+    while True:
+        if isinstance(reference, list):
+            #node embedded in its parent (shorter than 32 bytes)
+            node = reference
+        else:
+            if reference not in nodesByHash:
+                raise VerificationError("node " + toHex(reference) + " missing in the MPT proof")
+            node = rlpDecode(nodesByHash[reference])
+        if len(node) == 17:
+            if not path:
+                return node[16]
+            reference = node[path[0]]
+            path = path[1:]
+            if reference == b"":
+                raise VerificationError("key not in the MPT")
+        elif len(node) == 2:
+            #hex prefix encoding: first nibble flags (2: leaf, 1: odd length)
+            encodedPath = _nibbles(node[0])
+            isLeaf = encodedPath[0] >= 2
+            nodePath = encodedPath[1:] if encodedPath[0] % 2 else encodedPath[2:]
+            if path[:len(nodePath)] != nodePath:
+                raise VerificationError("key not in the MPT")
+            path = path[len(nodePath):]
+            if isLeaf:
+                if path:
+                    raise VerificationError("key not in the MPT")
+                return node[1]
+            reference = node[1]
+        else:
+            raise VerificationError("invalid MPT node")
+
+
+def receiptLogs(serializedReceipt):
+    '''
+    Logs (address, topics, data) of a serialized receipt
+    '''
+    #typed receipts (EIP-2718) start with the type byte
+    if serializedReceipt and serializedReceipt[0] < 0x7f:
+        serializedReceipt = serializedReceipt[1:]
+    receipt = rlpDecode(serializedReceipt)
+    if not isinstance(receipt, list) or len(receipt) != 4:
+        raise VerificationError("invalid receipt")
+    return [(log[0], log[1], log[2]) for log in receipt[3]]
+
+
+def verifyReceiptProof(txProof, headersByHash):
+    '''
+    Check the MPT proof of a receipt against the receiptsRoot of its block
+    @param txProof {JSONProof:, blockContainingTx:, txIndex:} (BlockManager.extractMerkleProofReceipt)
+    @param headersByHash {block hash: header} of the blocks the receipt can be in
+    @returns the serialized receipt
+    '''
+    header = headersByHash.get(hexToBytes(txProof["blockContainingTx"]))
+    if header is None:
+        raise VerificationError("the receipt is not in the provided blocks")
+    return verifyMerkleProof(hexToBytes(header[ReceiptsRootIdx]), rlpEncode(int(txProof["txIndex"])),
+                             decodeJSONProof(txProof["JSONProof"]))
+
+
+# ********************************* MMR *******************************
+
+def coversDifficulty(interval, root, relativeDifficulty):
+    '''
+    The leaf sampled for relativeDifficulty is the one whose cumulative difficulty range contains
+    floor(relativeDifficulty * total difficulty) (DifficultyMMRTree.getLeafFromDifficulty, the last
+    leaf for relativeDifficulty = 1)
+    @param interval (difficulty of the leaves before the leaf, difficulty of the leaf)
+    '''
+    leftDifficulty, leafDifficulty = interval
+    totalDifficulty = root.getNodeDifficulty()
+    requestedDifficulty = min(math.floor(totalDifficulty * relativeDifficulty), totalDifficulty - 1)
+    return leftDifficulty <= requestedDifficulty < leftDifficulty + leafDifficulty
+
+
+class ProofVerifier:
+    '''
+    Verification of the proofs of one root: the nodes received and the merges
+    computed are shared by all the proofs
+    '''
+
+    def __init__(self):
+        self._nodes = {}
+        self._merges = {}
+
+    def node(self, JSONDNode):
+        key = tuple(str(JSONDNode[field]) for field in ("peak", "tFirstBlock", "tLastBlock", "dFirstBlock",
+                                                        "dLastBlock", "nodeDifficulty", "numberOfBlocksCoverd"))
+        if key not in self._nodes:
+            self._nodes[key] = DifficultyNode.fromJSON(JSONDNode)
+        return self._nodes[key]
+
+    def merge(self, left, right):
+        key = (left.getDigest(), right.getDigest())
+        if key not in self._merges:
+            self._merges[key] = left.mergeNodes(right)
+        return self._merges[key]
+
+    def computeRoot(self, leaf, leafIndex, numberOfLeafs, proof):
+        '''
+        Root obtained hashing leaf with the proof nodes (order of DifficultyMMRTree.getLeafProof)
+        @returns (root, difficulty of the leaves before leaf): the nodes merged on the left of the
+                 path (siblings and peaks) cover exactly the leaves before it
+        '''
+        if leafIndex < 0 or leafIndex >= numberOfLeafs:
+            raise VerificationError("leaf " + str(leafIndex) + " not in a tree of " + str(numberOfLeafs) + " leafs")
+        levels = oddLevels(numberOfLeafs)
+        peakLevel = (leafIndex ^ numberOfLeafs).bit_length() - 1
+        peakIdx = levels.index(peakLevel)
+        expectedLength = peakLevel + (len(levels) - max(peakIdx, 1) if len(levels) > 1 else 0)
+        if len(proof) != expectedLength:
+            raise VerificationError("proof of " + str(len(proof)) + " nodes, " + str(expectedLength) + " expected")
+        node = leaf
+        leftDifficulty = 0
+        #siblings inside the perfect subtree of the peak
+        for level in range(peakLevel):
+            if (leafIndex >> level) & 1:
+                node = self.merge(proof[level], node)
+                leftDifficulty += proof[level].getNodeDifficulty()
+            else:
+                node = self.merge(node, proof[level])
+        if len(levels) == 1:
+            return node, leftDifficulty
+        #bagging of the peaks (see DifficultyMMRTree._getProvisoryNodes)
+        if peakIdx == 0:
+            node = self.merge(proof[peakLevel], node)
+            leftDifficulty += proof[peakLevel].getNodeDifficulty()
+        else:
+            node = self.merge(node, proof[peakLevel])
+        for peak in proof[peakLevel + 1:]:
+            node = self.merge(peak, node)
+            leftDifficulty += peak.getNodeDifficulty()
+        return node, leftDifficulty
+
+    def verifyRootProof(self, rootProof):
+        '''
+        @param rootProof answer of /MMR/root (Prover.getSCRootProof)
+        @returns the root DifficultyNode
+        '''
+        if "error" in rootProof:
+            raise VerificationError(rootProof["error"])
+        root = self.node(rootProof["rootDifficultyNode"])
+        header = rootProof["blockHeader"]
+        headersByHash = {blockHash(header): header}
+        serializedReceipt = verifyReceiptProof(rootProof["txDifficultyMPTProof"], headersByHash)
+        #the SC logs the hash stored in the root (EventLogRootHash)
+        rootHash = hexToBytes(root.peak)
+        for _, topics, data in receiptLogs(serializedReceipt):
+            if rootHash in topics or any(data[i:i + 32] == rootHash for i in range(0, len(data), 32)):
+                return root
+        raise VerificationError("the root hash is not logged in the receipt")
+
+    def verifyLeafProof(self, leafProof, root, relativeDifficulty):
+        '''
+        @param leafProof answer of /MMR/getLeafProof (Prover.getLeafAndProof)
+        @param root DifficultyNode returned by verifyRootProof
+        @param relativeDifficulty sampled value the leaf must cover (see coversDifficulty)
+        '''
+        if not coversDifficulty(self._verifyLeaf(leafProof, root), root, relativeDifficulty):
+            raise VerificationError("leaf " + str(leafProof["leafIdx"]) + " does not cover the relative difficulty " +
+                                    repr(relativeDifficulty))
+
+    def _verifyLeaf(self, leafProof, root):
+        '''
+        @returns (difficulty of the leaves before the leaf, difficulty of the leaf)
+        '''
+        if "error" in leafProof:
+            raise VerificationError(leafProof["error"])
+        blocks = leafProof["leafBlocks"]
+        if not blocks:
+            raise VerificationError("leaf without blocks")
+        hashes = verifyBlocksChain(blocks)
+        leaf = leafFromBlocks(blocks)
+        proof = [self.node(node) for node in leafProof["leafProof"]]
+        computedRoot, leftDifficulty = self.computeRoot(leaf, int(leafProof["leafIdx"]),
+                                                        int(leafProof["lastLeafIdx"]) + 1, proof)
+        self._checkRoot(computedRoot, root)
+        if leafProof.get("txDifficultyMPTProof") is not None:
+            verifyReceiptProof(leafProof["txDifficultyMPTProof"], dict(zip(hashes, blocks)))
+        return leftDifficulty, leaf.getNodeDifficulty()
+
+    def verifyBatchLeafProof(self, batchProof, root, relativeDifficulties):
+        '''
+        @param batchProof answer of /MMR/getLeafProofs (Prover.getBatchLeafAndProof)
+        @param relativeDifficulties sampled values of the request: each one must be covered by a leaf of the batch
+        @returns number of leaves verified
+        '''
+        if "error" in batchProof:
+            raise VerificationError(batchProof["error"])
+        nodes = batchProof["nodes"]
+        intervals = []
+        for leafProof in batchProof["leafs"]:
+            positions = [str(level) + "," + str(index) for level, index in leafProof["proofPositions"]]
+            if any(position not in nodes for position in positions):
+                raise VerificationError("proof node missing in the batch")
+            intervals.append(self._verifyLeaf(dict(leafProof, lastLeafIdx=batchProof["lastLeafIdx"],
+                                                   leafProof=[nodes[position] for position in positions]), root))
+        for relativeDifficulty in relativeDifficulties:
+            if not any(coversDifficulty(interval, root, relativeDifficulty) for interval in intervals):
+                raise VerificationError("no leaf of the batch covers the relative difficulty " +
+                                        repr(relativeDifficulty))
+        return len(batchProof["leafs"])
+
+    def _checkRoot(self, computedRoot, root):
+        if computedRoot.getDigest() != root.getDigest():
+            raise VerificationError("the MMR path does not lead to the root")
+
+
+# ********************************* NETWORK *******************************
+
+async def httpGet(url, timeout, accept="application/json"):
+    '''
+    GET of a document (HTTP/1.1, one connection per request)
+    @returns (content type, body)
+    @throws ProverError
+    '''
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    path = parts.path or "/"
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, port, ssl=parts.scheme == "https"), timeout)
+        try:
+            writer.write(("GET " + path + " HTTP/1.1\r\nHost: " + parts.netloc +
+                          "\r\nAccept: " + accept + "\r\nConnection: close\r\n\r\n").encode())
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout)
+        finally:
+            writer.close()
+    except (OSError, asyncio.TimeoutError) as err:
+        raise ProverError(url + ": " + repr(err))
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    statusLine = lines[0].split(" ")
+    if len(statusLine) < 2 or statusLine[1] != "200":
+        raise ProverError(url + ": " + lines[0])
+    headers = {name.strip().lower(): value.strip() for name, _, value in (line.partition(":") for line in lines[1:])}
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = _decodeChunked(body)
+    return headers.get("content-type", ""), body
+
+
+def _decodeChunked(body):
+    chunks = []
+    position = 0
+    while True:
+        lineEnd = body.index(b"\r\n", position)
+        size = int(body[position:lineEnd].split(b";")[0], 16)
+        if size == 0:
+            return b"".join(chunks)
+        chunks.append(body[lineEnd + 2:lineEnd + 2 + size])
+        position = lineEnd + 2 + size + 2
+
+
+class ProverState:
+
+    def __init__(self, url, maxConnections):
+        self.url = url.rstrip("/")
+        #requests open at the same time on the prover
+        self.connections = asyncio.Semaphore(maxConnections)
+        #set when a proof or a request of the prover fails
+        self.failed = asyncio.Event()
+        self.reason = None
+
+    def fail(self, reason):
+        if not self.failed.is_set():
+            self.reason = reason
+            self.failed.set()
+
+
+# ********************************* PROTOCOL *******************************
+
+class Verifier:
+
+    def __init__(self, provers, c=0.5, L=50, lamb=10, timeout=30, batch=False, seed=None, maxConnections=32,
+                 binary=False):
+        '''
+        @param provers list of prover URLs (e.g. http://127.0.0.1:8081)
+        @param c, L, lamb parameters of the sampling (as in the proof simulations)
+        @param timeout seconds of every request
+        @param batch if True all the leaves of a prover are asked with one /MMR/getLeafProofs request
+        @param seed seed of the sampled difficulties (None: random)
+        @param maxConnections requests open at the same time on every prover
+        @param binary if True the proofs are asked in the binary format (proofCodec)
+        '''
+        self.provers = list(provers)
+        self.c = c
+        self.L = L
+        self.lamb = lamb
+        self.timeout = timeout
+        self.batch = batch
+        self.maxConnections = maxConnections
+        #provers not supporting the binary format answer with JSON
+        self.accept = MIME_TYPE + ", application/json;q=0.5" if binary else "application/json"
+        self.random = random.Random(seed)
+
+    def sampleDifficulties(self, root):
+        '''
+        Relative difficulties to check for a chain of root.numberOfBlocksCoverd blocks
+        '''
+        n = root.numberOfBlocksCoverd
+        if n <= self.L / self.c:
+            #chain too short for the Bunz distribution (k <= 1): uniform sampling
+            return [self.random.random() for _ in range(int(math.ceil(self.lamb)))]
+        _, wightPercentage, _, mQueries = getSimulationParameters(1, self.c, self.L, self.lamb, n)
+        return [randomSampler(wightPercentage, self.random.random()) for _ in range(mQueries)]
+
+    async def verify(self):
+        '''
+        Run the sampling protocol
+        @returns VerificationResult
+        '''
+        startTime = time.time()
+        states = [ProverState(url, self.maxConnections) for url in self.provers]
+        failedProvers = {}
+        rootProofs = await asyncio.gather(*[self._request(state, "/MMR/root", "root") for state in states],
+                                          return_exceptions=True)
+        #root digest -> (root, verifier, provers agreeing on it)
+        groups = {}
+        for state, rootProof in zip(states, rootProofs):
+            try:
+                if isinstance(rootProof, Exception):
+                    raise rootProof
+                proofVerifier = ProofVerifier()
+                root = proofVerifier.verifyRootProof(rootProof)
+            except (ProverError, VerificationError, KeyError, TypeError, ValueError) as err:
+                failedProvers[state.url] = repr(err)
+                continue
+            group = groups.setdefault(root.getDigest(), (root, proofVerifier, []))
+            group[2].append(state)
+
+        #heaviest chain first
+        for root, proofVerifier, groupStates in sorted(groups.values(), key=lambda group: (
+                -group[0].getNodeDifficulty(), -len(group[2]))):
+            difficulties = self.sampleDifficulties(root)
+            if self.batch:
+                checked = await self._verifyBatch(difficulties, root, proofVerifier, groupStates)
+            else:
+                checked = await self._verifyLeafs(difficulties, root, proofVerifier, groupStates)
+            for state in groupStates:
+                if state.failed.is_set():
+                    failedProvers[state.url] = state.reason
+            if checked is not None:
+                return VerificationResult(True, root, [state.url for state in groupStates if not state.failed.is_set()],
+                                          checked, failedProvers, time.time() - startTime)
+        return VerificationResult(False, None, [], 0, failedProvers, time.time() - startTime)
+
+    async def _request(self, state, path, kind):
+        async with state.connections:
+            contentType, body = await httpGet(state.url + path, self.timeout, self.accept)
+        return decodeProof(kind, contentType, body)
+
+    async def _untilFailed(self, state, coroutine):
+        '''
+        Await coroutine, cancelled as soon as state fails
+        @returns (True, result) or (False, None) if the prover failed meanwhile
+        '''
+        task = asyncio.ensure_future(coroutine)
+        failed = asyncio.ensure_future(state.failed.wait())
+        await asyncio.wait({task, failed}, return_when=asyncio.FIRST_COMPLETED)
+        failed.cancel()
+        if not task.done():
+            task.cancel()
+            return False, None
+        return True, task.result()
+
+    async def _verifyLeafs(self, difficulties, root, proofVerifier, states):
+        '''
+        One request per difficulty, round robin over the provers
+        @returns number of leaves verified or None if every prover failed
+        '''
+        async def query(i, difficulty):
+            attempt = 0
+            while True:
+                alive = [state for state in states if not state.failed.is_set()]
+                if not alive:
+                    return False
+                state = alive[(i + attempt) % len(alive)]
+                attempt += 1
+                try:
+                    completed, leafProof = await self._untilFailed(
+                        state, self._request(state, "/MMR/getLeafProof/" + repr(difficulty), "leaf"))
+                    if not completed:
+                        continue
+                    proofVerifier.verifyLeafProof(leafProof, root, difficulty)
+                    return True
+                except (ProverError, VerificationError, KeyError, TypeError, ValueError) as err:
+                    state.fail(repr(err))
+
+        results = await asyncio.gather(*[query(i, difficulty) for i, difficulty in enumerate(difficulties)])
+        return len(results) if all(results) else None
+
+    async def _verifyBatch(self, difficulties, root, proofVerifier, states):
+        '''
+        The difficulties are split among the provers, one batch request per prover
+        @returns number of leaves verified or None if every prover failed
+        '''
+        pending = list(difficulties)
+        checked = 0
+        while pending:
+            alive = [state for state in states if not state.failed.is_set()]
+            if not alive:
+                return None
+            chunks = [pending[i::len(alive)] for i in range(len(alive))]
+
+            async def query(state, chunk):
+                if not chunk:
+                    return 0
+                try:
+                    batchProof = await self._request(state, "/MMR/getLeafProofs/" + ",".join(repr(d) for d in chunk),
+                                                     "batch")
+                    return proofVerifier.verifyBatchLeafProof(batchProof, root, chunk)
+                except (ProverError, VerificationError, KeyError, TypeError, ValueError) as err:
+                    state.fail(repr(err))
+                    return None
+
+            results = await asyncio.gather(*[query(state, chunk) for state, chunk in zip(alive, chunks)])
+            pending = [d for chunk, result in zip(chunks, results) if result is None for d in chunk]
+            checked += sum(result for result in results if result is not None)
+        return checked
+
+
+def verify(provers, **parameters):
+    '''
+    Synchronous wrapper of Verifier.verify
+    '''
+    return asyncio.run(Verifier(provers, **parameters).verify())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SmartFly verifier")
+    parser.add_argument("provers", nargs="+", help="prover URLs (e.g. http://127.0.0.1:8081)")
+    parser.add_argument("--c", type=float, default=0.5, help="adversary fraction of power")
+    parser.add_argument("--L", type=int, default=50, help="blocks always checked")
+    parser.add_argument("--lamb", type=float, default=10, help="security parameter")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds per request")
+    parser.add_argument("--batch", action="store_true", help="one /MMR/getLeafProofs request per prover")
+    parser.add_argument("--connections", type=int, default=32, help="requests open at the same time on a prover")
+    parser.add_argument("--binary", action="store_true", help="ask the proofs in the binary format")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the sampled difficulties")
+    args = parser.parse_args()
+    result = verify(args.provers, c=args.c, L=args.L, lamb=args.lamb, timeout=args.timeout,
+                    batch=args.batch, seed=args.seed, maxConnections=args.connections, binary=args.binary)
+    for url, reason in result.failedProvers.items():
+        print("[FAILED] " + url + ": " + reason)
+    if result.valid:
+        print("Chain verified: root " + result.root.getKeccak256() + " (" + str(result.root.numberOfBlocksCoverd) +
+              " blocks), " + str(result.leafsChecked) + " leaves checked on " + ", ".join(result.provers) +
+              " in " + "%.3f" % result.elapsed + " s")
+    else:
+        print("Verification failed: no honest prover")
+    sys.exit(0 if result.valid else 1)
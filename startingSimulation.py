@@ -5,7 +5,12 @@ It will perform the simulation for multiple number of blocks
 per leaf.
 
 NOTE: A ganache instance with the same parameters configured 
-in the truffle-config.js should be started
+in the truffle-config.js should be started for every port in
+ganachePorts (or set startGanache = True to start them from here).
+The contracts are deployed once per instance and every configuration
+starts from a snapshot of the chain taken after the deployment
+(see smartfly/gasBenchmark.py); with more ports the configurations
+are executed in parallel, one per instance.
 
 example - form terminal execute:
 ganache-cli  -a 100 -e 10000 -m "DifficultyMMR? Why not?" -p 7200 -l 30000000 -i 7200
@@ -19,20 +24,60 @@ For documentation refer to: ganache-cli
 '''
 
 import os
+import subprocess
+import sys
+import tempfile
+
+from smartfly.gasBenchmark import startInstances, stopInstances
+from smartfly.gridRunner import expandGrid, moveResults, runGridOn
+from smartfly.resultStore import ResultStore
 
 #How to start chain from terminal:
 #os.system(ganache-cli  -a 100 -e 10000 -m "DifficultyMMR? Why not?" -p 7200 -l 30000000 -i 7200)
 
-#Starting number of blocks per MMR leaf
-starting = 1
+#Number of blocks per MMR leaf to simulate (from 1 to 512)
+blocksPerLeafArray = [2**x for x in range(0, 10)]
 # 0) untrusted  1) semi-trusted
 trustHp = 1
 # Chain length to simulate - number of blocks in chian
 chainLength = 2048
 
-while starting <= 512 :
-    # reset the smart contract - compile it again and deploy it on chain
-    os.system(" truffle migrate --reset")
+#where the gas costs are stored and file with the configurations already simulated
+outputDirectory = "./data/GasCostsPaper/"
+manifestPath = outputDirectory + "manifest.txt"
+#binary store with the same gas costs (table GCF, keys n and trustHp)
+resultStore = ResultStore(outputDirectory)
+
+#ports of the ganache instances (one configuration at a time on every instance)
+ganachePorts = [7200]
+#True: start ganache-cli on every port (and stop it at the end)
+startGanache = False
+
+def simulateConfiguration(point, instance):
+    '''
+    Revert the chain of instance to the deployment and fill the MMR with point["n"] blocks per leaf.
+    The gas costs are written in a temporary directory and moved in outputDirectory
+    (and in the result store) only when the configuration ends
+    '''
+    tmpDirectory = tempfile.mkdtemp(dir=outputDirectory)
+    # reset the smart contract - same chain state of a new deployment
+    instance.revert()
     # .js code that fill the mmr in the smart contract
-    os.system(" node ./js/DataModule/FillMMR.js " + str(starting)+" "+str(trustHp)+" "+str(chainLength))
-    starting = starting * 2
+    subprocess.run(["node", "./js/DataModule/FillMMR.js", str(point["n"]), str(point["trustHp"]),
+                    str(point["cl"]), tmpDirectory + "/"], check=True, env=instance.env())
+    for fileName in os.listdir(tmpDirectory):
+        resultStore.appendTextFile(os.path.join(tmpDirectory, fileName))
+    moveResults(tmpDirectory, outputDirectory)
+    os.rmdir(tmpDirectory)
+
+# Every ganache instance executes one configuration at a time.
+# The configurations already in the manifest are skipped: delete it to simulate again everything
+if __name__ == "__main__":
+    points = expandGrid([("n", blocksPerLeafArray), ("trustHp", [trustHp]), ("cl", [chainLength])])
+    instances = startInstances(ganachePorts, spawn=startGanache)
+    try:
+        failed = runGridOn(points, simulateConfiguration, manifestPath, instances, label="gas costs")
+    finally:
+        stopInstances(instances)
+    if failed:
+        sys.exit(1)
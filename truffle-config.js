@@ -8,7 +8,8 @@ module.exports = {
   networks: {
     development: {
       host: "127.0.0.1",
-      port: 7200,
+      //GANACHE_PORT: deploy on another instance (see smartfly/gasBenchmark.py)
+      port: process.env.GANACHE_PORT || 7200,
       network_id: "7200"
   //  },
   //  test: {